@@ -0,0 +1,53 @@
+"""
+gunicorn 설정
+
+    gunicorn -c gunicorn.conf.py lungcancer_project.wsgi
+
+preload_app이 켜져 있으면 마스터 프로세스가 wsgi.py를 한 번 import하면서 Django와
+예측 모델(메모리 매핑된 노드 테이블, 위험도 테이블)을 로드하고, 워커는 fork로 이를
+물려받습니다. 노드 테이블은 읽기 전용 파일 매핑이므로 모든 워커가 같은 물리 페이지를
+읽고, fork 직전 gc.freeze()로 기존 객체를 GC 추적 대상에서 빼서 가비지 컬렉션이
+공유 페이지를 건드려 복사되는 일을 줄입니다.
+
+환경 변수
+워커 수, 워커당 스레드 수, 워커당 추론 스레드 수(OpenMP/BLAS, scikit-learn n_jobs)는
+lungcancer/parallelism.py가 사용 가능한 코어 수(affinity, cgroup 제한 반영)로 정하고,
+NumPy가 로드되기 전에 환경 변수로 고정하여 워커들의 스레드가 코어 수를 넘지 않게 합니다.
+아래 환경 변수로 각 값을 직접 지정할 수 있습니다.
+- GUNICORN_BIND: 바인드 주소 (기본 0.0.0.0:8000)
+- GUNICORN_WORKERS: 워커 수 (기본 코어 수 * 2 + 1)
+- GUNICORN_THREADS: 워커당 스레드 수 (기본 1)
+- ML_INFERENCE_THREADS: 워커당 추론 스레드 수 (기본 코어 수 // (워커 수 * 스레드 수), 최소 1)
+- GUNICORN_PRELOAD: 0이면 워커마다 애플리케이션과 모델을 따로 로드
+"""
+
+import gc
+import os
+
+from lungcancer import parallelism
+
+
+# 애플리케이션(NumPy, scikit-learn) 로드 전에 스레드 수 환경 변수를 고정
+parallelism_config = parallelism.configure()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = parallelism_config['workers']
+threads = parallelism_config['threads']
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+timeout = 60
+
+
+def pre_fork(server, worker):
+    # 마스터에서 만든 객체는 이후 GC 대상에서 제외 (워커의 GC가 공유 페이지를 쓰지 않도록)
+    if preload_app:
+        gc.freeze()
+
+
+def when_ready(server):
+    server.log.info(f'병렬도 설정: {parallelism_config}')
+
+
+def post_fork(server, worker):
+    # preload_app이면 마스터에서 이미 로드된 스레드 풀에도 제한을 적용
+    parallelism.limit_threadpools(parallelism_config['inference_threads'])
+    server.log.info(f'워커 시작 (pid {worker.pid}, preload_app={preload_app})')
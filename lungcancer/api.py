@@ -0,0 +1,145 @@
+"""
+REST API (Django REST framework)
+"""
+
+import csv
+import io
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .batch import risk_level, save_batch, validate_rows
+from . import model_provider, parallelism
+
+
+class CSVParser(BaseParser):
+    """text/csv 본문을 행 딕셔너리 목록으로 변환 (첫 줄은 헤더)"""
+
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            text = stream.read().decode(encoding)
+            return list(csv.DictReader(io.StringIO(text)))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ParseError(f'CSV 파싱 오류: {e}')
+
+
+class BatchPredictView(APIView):
+    """설문 여러 건 일괄 예측 및 저장
+
+    본문은 행 목록(JSON 배열 또는 {"rows": [...]}) 또는 헤더가 있는 CSV입니다.
+    각 행의 필드는 예측 폼(PatientForm)과 같습니다 (증상: 2=예, 1=아니오).
+    쿼리 파라미터 save=false 이면 예측만 하고 저장하지 않습니다.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, CSVParser]
+
+    def post(self, request):
+        started = time.perf_counter()
+
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('rows')
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': '예측할 행 목록이 비어 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = getattr(settings, 'BATCH_PREDICT_MAX_ROWS', 1000)
+        if len(rows) > max_rows:
+            return Response(
+                {'error': f'한 번에 최대 {max_rows}건까지 예측할 수 있습니다. (요청: {len(rows)}건)'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        save = request.query_params.get('save', 'true').lower() not in ('0', 'false', 'no')
+
+        # 1. 검증
+        valid, errors = validate_rows(rows)
+        validated = time.perf_counter()
+
+        # 2. 한 번의 벡터 연산으로 예측
+        patients = [patient for _, patient in valid]
+        labels, probabilities, model_version = [], [], None
+        if patients:
+            labels, probabilities, model_version = model_provider.predict_features_batch(
+                [p.get_symptoms_dict() for p in patients]
+            )
+        predicted = time.perf_counter()
+
+        # 3. 일괄 저장
+        records = results = None
+        external_error = None
+        if save and patients:
+            try:
+                records, results, external_error = save_batch(patients, labels, probabilities, model_version)
+            except DatabaseError as e:
+                # 환자 저장은 한 트랜잭션이므로 아무것도 저장되지 않음 - 같은 요청을 다시 보내도 됨
+                return Response(
+                    {'error': f'예측 결과를 저장하지 못했습니다. 저장된 행은 없습니다: {e}'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+        saved = time.perf_counter()
+
+        output = [{'index': index, 'errors': row_errors} for index, row_errors in errors.items()]
+        for i, (index, patient) in enumerate(valid):
+            probability = float(probabilities[i])
+            item = {
+                'index': index,
+                'name': patient.name,
+                'prediction': 'YES' if labels[i] == 1 else 'NO',
+                'probability': probability,
+                'risk_level': risk_level(probability),
+            }
+            if save:
+                item['patient_id'] = patient.id
+                if records is not None:
+                    item['record_id'] = records[i].id
+                    item['result_id'] = results[i].result_id
+            output.append(item)
+        output.sort(key=lambda item: item['index'])
+
+        body = {
+            'count': len(rows),
+            'valid_count': len(valid),
+            'error_count': len(errors),
+            'saved': save and bool(patients),
+            'model_version': model_version,
+            'results': output,
+            'timing_ms': {
+                'validate': round((validated - started) * 1000, 3),
+                'predict': round((predicted - validated) * 1000, 3),
+                'save': round((saved - predicted) * 1000, 3),
+                'total': round((time.perf_counter() - started) * 1000, 3),
+            },
+        }
+        if external_error:
+            body['external_db_error'] = external_error
+        return Response(body)
+
+
+class InferenceStatsView(APIView):
+    """예측 마이크로 배치, 예측 캐시 지표와 워커의 병렬도 설정 (스태프 전용)"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        batcher = model_provider.get_batcher()
+        cache = model_provider.get_prediction_cache()
+        return Response({
+            'model_version': model_provider.get_model_version(),
+            'batching_enabled': batcher is not None,
+            'batching': batcher.stats() if batcher is not None else None,
+            'batching_fallbacks': model_provider.fallback_count(),
+            'cache_enabled': cache is not None,
+            'cache': cache.stats() if cache is not None else None,
+            'parallelism': parallelism.diagnostics(),
+        })
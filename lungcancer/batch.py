@@ -0,0 +1,152 @@
+"""
+일괄 예측 처리
+
+여러 건의 설문 행을 PatientForm 규칙으로 검증하고, 한 번의 벡터 연산으로 예측한 뒤
+Patient / lung_record / lung_result 테이블에 bulk_create로 저장합니다.
+"""
+
+from django.db import DatabaseError, connections, models, transaction
+
+from .forms import PatientForm
+from .models import LungRecord, LungResult, LungResultModelVersion, Patient
+
+
+# 한 번의 INSERT 문으로 저장할 최대 행 수
+BULK_CHUNK_SIZE = 500
+
+SYMPTOM_FIELDS = [
+    'smoking', 'yellow_fingers', 'anxiety', 'peer_pressure', 'chronic_disease',
+    'fatigue', 'allergy', 'wheezing', 'alcohol_consuming', 'coughing',
+    'shortness_of_breath', 'swallowing_difficulty', 'chest_pain',
+]
+
+
+def risk_level(probability):
+    """양성 확률(0~1)에 따른 위험도 수준 (predict 뷰와 동일한 기준)"""
+    probability_percent = probability * 100
+    if probability_percent >= 70:
+        return 'high'
+    elif probability_percent >= 40:
+        return 'medium'
+    return 'low'
+
+
+def validate_rows(rows):
+    """행마다 PatientForm으로 검증
+
+    (유효한 (행 번호, 저장 전 Patient) 목록, {행 번호: 오류}) 를 반환합니다.
+    """
+    valid = []
+    errors = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = {'__all__': ['행은 객체(딕셔너리)여야 합니다.']}
+            continue
+        form = PatientForm(data=row)
+        if form.is_valid():
+            valid.append((index, form.save(commit=False)))
+        else:
+            errors[index] = form.errors.get_json_data()
+    return valid, errors
+
+
+def bulk_create_with_ids(model, objs, using):
+    """bulk_create 후 모든 객체에 pk가 채워지도록 보장
+
+    PostgreSQL / SQLite / MariaDB는 INSERT ... RETURNING으로 pk를 돌려받습니다.
+    MySQL은 이를 지원하지 않으므로 청크마다 LAST_INSERT_ID()로 첫 번째 id를 구하고,
+    연속된 id의 행이 방금 저장한 값과 같은지 확인한 뒤 pk를 지정합니다.
+    (날짜/소수 컬럼은 저장 정밀도가 달라질 수 있어 정수/문자열 컬럼만 비교)
+    """
+    connection = connections[using]
+    manager = model._default_manager.db_manager(using)
+
+    for start in range(0, len(objs), BULK_CHUNK_SIZE):
+        chunk = objs[start:start + BULK_CHUNK_SIZE]
+        with transaction.atomic(using=using):
+            manager.bulk_create(chunk)
+            if connection.features.can_return_rows_from_bulk_insert:
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT LAST_INSERT_ID()')
+                first_id = cursor.fetchone()[0]
+
+            ids = list(range(first_id, first_id + len(chunk)))
+            fields = [
+                f.attname for f in model._meta.concrete_fields
+                if not f.primary_key and isinstance(f, (models.IntegerField, models.CharField))
+            ]
+            stored = {
+                row[0]: row[1:]
+                for row in manager.filter(pk__in=ids).values_list('pk', *fields)
+            }
+            for pk, obj in zip(ids, chunk):
+                if stored.get(pk) != tuple(getattr(obj, f) for f in fields):
+                    # 다른 세션의 INSERT와 id가 섞였으면 이 청크를 롤백
+                    raise DatabaseError(f'{model.__name__} 일괄 저장 후 id를 확인할 수 없습니다.')
+                obj.pk = pk
+
+    return objs
+
+
+def save_batch(patients, labels, probabilities, model_version=''):
+    """예측 결과를 Patient와 외부 데이터베이스(lung_record, lung_result)에 일괄 저장
+
+    외부 데이터베이스 저장 실패는 예외 대신 (records, results, 오류 메시지)로 알려줍니다.
+    Patient 저장에 실패하면 저장한 환자 없이 DatabaseError가 발생합니다.
+    """
+    for patient, label, probability in zip(patients, labels, probabilities):
+        patient.prediction = 'YES' if label == 1 else 'NO'
+        patient.prediction_probability = float(probability)
+        patient.model_version = model_version
+
+    # 청크마다 커밋하지 않고 요청 전체를 한 트랜잭션으로 저장 (실패 시 재요청해도 환자가 중복되지 않음)
+    with transaction.atomic(using='default'):
+        bulk_create_with_ids(Patient, patients, using='default')
+
+    records = [
+        LungRecord(
+            gender=str(patient.gender),
+            age=patient.age,
+            lung_cancer=1,  # 기본값 (아니오)
+            created_at=patient.created_at,
+            **{field: getattr(patient, field) for field in SYMPTOM_FIELDS},
+        )
+        for patient in patients
+    ]
+
+    try:
+        with transaction.atomic(using='heart_db'):
+            bulk_create_with_ids(LungRecord, records, using='heart_db')
+            results = [
+                LungResult(
+                    record_id=record.id,
+                    name=patient.name if patient.name else f'환자 #{patient.id}',
+                    gender=record.gender,
+                    age=record.age,
+                    prediction='양성' if patient.prediction == 'YES' else '음성',
+                    risk_score=round(patient.prediction_probability * 100, 2),
+                    created_at=patient.created_at,
+                )
+                for patient, record in zip(patients, records)
+            ]
+            bulk_create_with_ids(LungResult, results, using='heart_db')
+    except Exception as e:
+        return None, None, str(e)
+
+    LungResultModelVersion.objects.bulk_create(
+        [LungResultModelVersion(result_id=result.result_id, model_version=model_version) for result in results],
+        batch_size=BULK_CHUNK_SIZE,
+    )
+
+    # 저장한 결과를 통계 집계에 반영 (result_rollup이 이 모듈을 import하므로 함수 안에서 import)
+    from . import result_rollup
+
+    try:
+        result_rollup.refresh()
+    except Exception as e:
+        # watermark 이후 행이므로 다음 갱신(예측 저장 또는 backfill 명령)에서 반영됨
+        print(f"통계 집계 갱신 실패: {e}")
+
+    return records, results, None
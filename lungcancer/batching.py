@@ -0,0 +1,180 @@
+"""
+마이크로 배치 예측기
+
+여러 스레드에서 동시에 들어오는 단건 예측 요청을 짧은 시간(예: 2ms) 또는 최대 행 수까지
+모아 한 번의 행렬 연산으로 예측하고, 각 호출자에게 자신의 결과를 돌려줍니다.
+대기열 크기는 제한되며, 가득 차거나 시간 초과되거나 배치 예측이 실패하면 BatcherUnavailable을
+발생시켜 호출자가 직접 예측으로 대체할 수 있게 합니다.
+
+대기 시간(max_wait)은 결과를 기다리는 다른 호출자가 있을 때만 사용합니다. 단일 스레드 워커처럼
+동시에 예측하는 호출자가 없으면 첫 요청을 기다리지 않고 바로 예측합니다.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent import futures
+
+
+class BatcherUnavailable(RuntimeError):
+    """대기열이 가득 찼거나 결과 대기 시간이 초과되었거나 배치 예측이 실패한 경우"""
+
+
+class MicroBatcher:
+    """predict_batch(행 목록) -> 행별 결과 목록 앞단의 배치 스케줄러"""
+
+    def __init__(self, predict_batch, max_batch_size=64, max_wait=0.002,
+                 max_queue=1024, timeout=1.0):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        # submit 안에서 결과를 기다리는 호출자 수 (대기열에 넣기 직전부터 결과를 받을 때까지)
+        self._in_flight = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'rows': 0,
+            'max_batch_size': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+            'rejected': 0,
+            'timeouts': 0,
+            'errors': 0,
+        }
+
+    def _ensure_worker(self):
+        # gunicorn 등에서 fork된 자식 프로세스는 부모의 스레드를 물려받지 않으므로 새로 시작
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._in_flight = 0
+            self._reset_stats()
+            self._thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+            self._thread.start()
+
+    def submit(self, features):
+        """특성 딕셔너리 한 건을 대기열에 넣고 그 행의 예측 결과를 기다림"""
+        self._ensure_worker()
+        future = futures.Future()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            try:
+                self._queue.put_nowait((features, future, time.perf_counter()))
+            except queue.Full:
+                with self._lock:
+                    self._stats['rejected'] += 1
+                raise BatcherUnavailable('예측 대기열이 가득 찼습니다.')
+
+            with self._lock:
+                self._stats['requests'] += 1
+
+            try:
+                return future.result(timeout=self.timeout)
+            except futures.TimeoutError:
+                future.cancel()
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                raise BatcherUnavailable('예측 결과 대기 시간이 초과되었습니다.')
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _collect(self):
+        """첫 요청을 기다린 뒤 max_wait 동안 또는 max_batch_size까지 요청을 모음
+
+        대기열이 비었고 배치에 든 요청 외에 결과를 기다리는 호출자가 없으면 더 기다리지 않습니다.
+        """
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            with self._lock:
+                others = self._in_flight > len(batch)
+            if remaining <= 0 or not others:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+
+            # 호출자가 이미 시간 초과로 포기한 요청은 제외
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            waits = [started - enqueued for _, _, enqueued in batch]
+            try:
+                results = self.predict_batch([features for features, _, _ in batch])
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                # 호출자가 직접 예측으로 대체하도록 BatcherUnavailable로 전달 (한 행의 오류가 배치 전체를 실패시키지 않음)
+                for _, future, _ in batch:
+                    error = BatcherUnavailable(f'배치 예측이 실패했습니다: {e}')
+                    error.__cause__ = e
+                    future.set_exception(error)
+                continue
+
+            for i, (_, future, _) in enumerate(batch):
+                future.set_result(results[i])
+
+            with self._lock:
+                stats = self._stats
+                stats['batches'] += 1
+                stats['rows'] += len(batch)
+                stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+                stats['queue_wait_total'] += sum(waits)
+                stats['queue_wait_max'] = max(stats['queue_wait_max'], max(waits))
+
+    def stats(self):
+        """배치 크기와 대기 시간 지표"""
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats['batches']
+        rows = stats['rows']
+        return {
+            'requests': stats['requests'],
+            'batches': batches,
+            'rows': rows,
+            'mean_batch_size': round(rows / batches, 2) if batches else 0,
+            'max_batch_size': stats['max_batch_size'],
+            'mean_queue_wait_ms': round(stats['queue_wait_total'] / rows * 1000, 3) if rows else 0,
+            'max_queue_wait_ms': round(stats['queue_wait_max'] * 1000, 3),
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'rejected': stats['rejected'],
+            'timeouts': stats['timeouts'],
+            'errors': stats['errors'],
+            'config': {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'max_queue': self.max_queue,
+                'timeout_ms': self.timeout * 1000,
+            },
+        }
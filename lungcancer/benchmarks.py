@@ -0,0 +1,1456 @@
+"""
+성능 벤치마크 모음
+
+`python manage.py benchmark <대상>` 으로 실행합니다.
+각 벤치마크는 기존 방식과 개선된 방식을 같은 입력으로 측정하여 출력합니다.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from . import model_provider, registry
+
+
+def load_model():
+    """활성 버전의 학습된 모델과 특성 이름 로드"""
+    import joblib
+
+    artifact = registry.active_artifact()
+    return joblib.load(artifact.model_path), joblib.load(artifact.feature_path)
+
+
+def random_survey_rows(n, feature_names, seed=42):
+    """설문 스키마(성별, 나이, 증상 1/2)에 맞는 무작위 특성 딕셔너리 생성"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {name: int(rng.integers(1, 3)) for name in feature_names}
+        row['GENDER'] = int(rng.integers(0, 2))
+        row['AGE'] = int(rng.integers(20, 90))
+        rows.append(row)
+    return rows
+
+
+def measure(func, repeat):
+    """func를 repeat회 실행하여 회당 소요 시간(초) 배열 반환"""
+    func()  # 워밍업
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+def print_latency(label, samples, rows=1):
+    """지연 시간 요약 출력 (마이크로초)"""
+    us = samples * 1e6
+    print(
+        f"  {label:<32} p50 {np.percentile(us, 50):9.1f}µs  "
+        f"p99 {np.percentile(us, 99):9.1f}µs  "
+        f"처리량 {rows / samples.mean():12.0f}건/s"
+    )
+
+
+def benchmark_inference(repeat=1000, batch_size=256):
+    """기존 DataFrame + predict_proba/predict 경로와 FlatForest 비교"""
+    import pandas as pd
+    from .inference import FlatForest, features_to_array
+
+    model, feature_names = load_model()
+    forest = FlatForest.from_sklearn(model, feature_names)
+    rows = random_survey_rows(batch_size, feature_names)
+    row = rows[0]
+
+    print("=" * 70)
+    print(f"추론 벤치마크 (트리 {forest.n_trees}개, 노드 {forest.n_nodes}개, 반복 {repeat}회)")
+    print("=" * 70)
+
+    # 결과 동일성 확인
+    frame = pd.DataFrame(rows)[feature_names]
+    labels, proba = forest.predict(features_to_array(rows, feature_names))
+    identical = (
+        np.array_equal(proba, model.predict_proba(frame))
+        and np.array_equal(labels, model.predict(frame))
+    )
+    print(f"sklearn 결과와 비트 단위 일치: {'예' if identical else '아니오'}")
+
+    def current_path():
+        features = pd.DataFrame([row])[feature_names]
+        model.predict_proba(features)[0]
+        model.predict(features)[0]
+
+    print("\n[단일 행]")
+    print_latency('기존 (DataFrame + sklearn x2)', measure(current_path, repeat))
+    print_latency('FlatForest.predict_one', measure(lambda: forest.predict_one(row), repeat))
+
+    batch_repeat = max(1, repeat // 10)
+    print(f"\n[배치 {batch_size}행]")
+    print_latency(
+        '기존 (DataFrame + sklearn x2)',
+        measure(lambda: (model.predict_proba(frame), model.predict(frame)), batch_repeat),
+        rows=batch_size,
+    )
+    print_latency(
+        'FlatForest.predict',
+        measure(lambda: forest.predict(features_to_array(rows, feature_names)), batch_repeat),
+        rows=batch_size,
+    )
+
+    return identical
+
+
+def benchmark_risk_table(repeat=1000):
+    """FlatForest 단일 예측과 위험도 테이블 조회 비교"""
+    from .inference import FlatForest
+    from .risk_table import load_risk_table
+
+    model, feature_names = load_model()
+    artifact = registry.active_artifact()
+    table = load_risk_table(artifact.risk_table_dir, artifact.model_path)
+    if table is None:
+        print("위험도 테이블이 없습니다. 먼저 'python manage.py build_risk_table'을 실행하세요.")
+        return False
+
+    forest = FlatForest.from_sklearn(model, feature_names)
+    row = random_survey_rows(1, feature_names)[0]
+
+    print("=" * 70)
+    print(f"위험도 테이블 벤치마크 (셀 {table.n_cells}개, 반복 {repeat}회)")
+    print("=" * 70)
+    print_latency('FlatForest.predict_one', measure(lambda: forest.predict_one(row), repeat))
+    print_latency('RiskTable.predict_one', measure(lambda: table.predict_one(row), repeat))
+    return True
+
+
+def _form_rows(n, seed=42):
+    """PatientForm 입력 형식(증상 2=예, 1=아니오)의 무작위 행"""
+    from .batch import SYMPTOM_FIELDS
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        row = {'name': f'벤치마크 #{i}', 'gender': int(rng.integers(0, 2)), 'age': int(rng.integers(20, 90))}
+        row.update({field: int(rng.integers(1, 3)) for field in SYMPTOM_FIELDS})
+        rows.append(row)
+    return rows
+
+
+class _Rollback(Exception):
+    pass
+
+
+def benchmark_batch_api(repeat=1000):
+    """단건 예측 폼(/predict/) 반복 제출과 일괄 예측 API의 처리량 비교
+
+    웹 요청 경로와 같은 기본 데이터베이스와 heart_db에 실제로 저장한 뒤 트랜잭션을 롤백하므로,
+    둘 다 로컬 데이터베이스일 때만 실행합니다 (synthetic.require_local_database).
+    """
+    import contextlib
+    import io
+    import json
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .synthetic import require_local_database
+
+    require_local_database('default', 'heart_db')
+
+    n = min(repeat, getattr(settings, 'BATCH_PREDICT_MAX_ROWS', 1000))
+    rows = _form_rows(n)
+
+    print("=" * 70)
+    print(f"일괄 예측 API 벤치마크 ({n}건)")
+    print("=" * 70)
+
+    setup_test_environment()
+    try:
+        with transaction.atomic(), transaction.atomic(using='heart_db'):
+            user = User.objects.create_user(username='__benchmark__', password='benchmark')
+            client = Client()
+            client.force_login(user)
+
+            # predict 뷰의 디버그 출력은 측정에서 제외
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for row in rows:
+                    client.post('/predict/', row)
+                single_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = client.post('/api/predict/batch/', json.dumps(rows), content_type='application/json')
+            batch_elapsed = time.perf_counter() - start
+            body = response.json()
+
+            raise _Rollback
+    except _Rollback:
+        pass
+    finally:
+        teardown_test_environment()
+
+    print(f"  단건 폼 {n}회 제출     {single_elapsed:8.3f}s  처리량 {n / single_elapsed:10.0f}건/s")
+    print(f"  일괄 API 1회 요청      {batch_elapsed:8.3f}s  처리량 {n / batch_elapsed:10.0f}건/s")
+    print(f"  API 구간별 시간(ms): {body.get('timing_ms')}")
+    print(f"  속도 향상: {single_elapsed / batch_elapsed:.1f}배")
+    return body.get('valid_count') == n
+
+
+def benchmark_batching(repeat=1000, threads=16):
+    """동시 스레드의 단건 예측: 직접 예측과 마이크로 배치 비교"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .batching import MicroBatcher
+    from .inference import FlatForest
+
+    model, feature_names = load_model()
+    forest = FlatForest.from_sklearn(model, feature_names)
+    rows = random_survey_rows(repeat, feature_names)
+
+    def predict_batch(batch):
+        labels, proba = forest.predict(np.array(
+            [[row[name] for name in feature_names] for row in batch], dtype=np.float32))
+        return list(zip(labels, proba[:, 1]))
+
+    batcher = MicroBatcher(predict_batch)
+
+    print("=" * 70)
+    print(f"마이크로 배치 벤치마크 (스레드 {threads}개, 요청 {repeat}건)")
+    print("=" * 70)
+
+    for label, func in (('직접 예측', forest.predict_one), ('마이크로 배치', batcher.submit)):
+        latencies = np.empty(repeat)
+
+        def call(i):
+            start = time.perf_counter()
+            func(rows[i])
+            latencies[i] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(call, range(repeat)))
+        elapsed = time.perf_counter() - start
+
+        us = latencies * 1e6
+        print(f"  {label:<12} p50 {np.percentile(us, 50):9.1f}µs  p99 {np.percentile(us, 99):9.1f}µs  "
+              f"처리량 {repeat / elapsed:10.0f}건/s")
+
+    stats = batcher.stats()
+    print(f"  평균 배치 크기 {stats['mean_batch_size']}, 최대 {stats['max_batch_size']}, "
+          f"평균 대기 {stats['mean_queue_wait_ms']}ms")
+    return True
+
+
+def benchmark_cache(repeat=1000, distinct=200):
+    """반복되는 특성 벡터의 단건 예측: 캐시 없음 vs 프로세스 내부 캐시 vs Django 캐시
+
+    요청은 서로 다른 특성 벡터 distinct개 중에서 무작위로 뽑습니다 (같은 입력의 재제출 재현).
+    """
+    from .prediction_cache import PredictionCache, pack_features
+
+    bundle = model_provider.get_bundle()
+    pool = random_survey_rows(distinct, bundle.feature_names)
+    rng = np.random.default_rng(0)
+    rows = [pool[i] for i in rng.integers(0, distinct, repeat)]
+
+    print("=" * 70)
+    print(f"예측 캐시 벤치마크 (요청 {repeat}건, 서로 다른 입력 {distinct}개)")
+    print("=" * 70)
+
+    def no_cache(i):
+        bundle.predict_one(rows[i])
+
+    print_latency('캐시 없음', _measure_rows(no_cache, repeat))
+    for backend in ('local', 'django'):
+        cache = PredictionCache(backend=backend, max_size=distinct * 2)
+
+        def cached(i, cache=cache):
+            packed = pack_features(rows[i], bundle.feature_names)
+            if cache.get(bundle.cache_version, packed) is None:
+                cache.set(bundle.cache_version, packed, bundle.predict_one(rows[i]))
+
+        print_latency(f'캐시 ({backend})', _measure_rows(cached, repeat))
+        print(f"    적중률 {cache.stats()['hit_rate']:.1%}")
+    return True
+
+
+def benchmark_explain(repeat=1000):
+    """예측 설명 지연 시간: 노드별 기여도 사전 계산 후 단건/일괄 설명"""
+    import pandas as pd
+    from .explain import TreeExplainer
+
+    bundle = model_provider.get_bundle()
+    start = time.perf_counter()
+    explainer = TreeExplainer(bundle.forest)
+    build_elapsed = time.perf_counter() - start
+
+    rows = random_survey_rows(256, bundle.feature_names)
+    X = np.array([[row[name] for name in bundle.feature_names] for row in rows], dtype=np.float32)
+
+    # 기준값 + 기여도 합이 predict_proba의 양성 확률과 같은지 확인
+    bias, contributions = explainer.explain(X)
+    expected = bundle.model.predict_proba(pd.DataFrame(X, columns=bundle.feature_names))[:, 1]
+    max_error = float(np.abs(bias + contributions.sum(axis=1) - expected).max())
+
+    print("=" * 70)
+    print(f"예측 설명 벤치마크 (노드 {bundle.forest.n_nodes}개, 반복 {repeat}회)")
+    print(f"  노드별 기여도 사전 계산 {build_elapsed * 1000:.1f}ms, 확률 재구성 최대 오차 {max_error:.2e}")
+    print("=" * 70)
+    print_latency('explain_one (1건)', measure(lambda: explainer.explain_one(rows[0]), repeat))
+    print_latency(f'explain ({len(X)}건)', measure(lambda: explainer.explain(X), max(repeat // 10, 1)), len(X))
+    return max_error < 1e-6
+
+
+def _measure_rows(func, repeat):
+    """func(i)를 i = 0..repeat-1 로 호출한 각각의 소요 시간(초)"""
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples[i] = time.perf_counter() - start
+    return samples
+
+
+# manage.py check를 실행하는 자식 프로세스 코드
+# eager 모드는 기존 views.py처럼 시각화 라이브러리와 모델을 import 시점에 로드하는 경우를 재현
+_STARTUP_CODE = """
+import os, sys
+if {eager}:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot, pandas, seaborn, joblib
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lungcancer_project.settings')
+    django.setup()
+    from lungcancer import model_provider
+    model_provider.warm_up()
+sys.argv = ['manage.py', 'check']
+import manage
+manage.main()
+"""
+
+
+def _run_startup(eager):
+    """manage.py check 자식 프로세스의 (소요 시간 초, 최대 RSS MB)"""
+    import subprocess
+    import sys
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', _STARTUP_CODE.format(eager=eager)],
+        cwd=project_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f'manage.py check 실행 실패 (종료 코드 {process.returncode})')
+    # Linux의 ru_maxrss 단위는 KB
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def benchmark_startup(repeat=5):
+    """manage.py check의 시작 시간과 메모리: 즉시 로드(기존) vs 지연 로드"""
+    repeat = min(repeat, 20)
+
+    print("=" * 70)
+    print(f"시작 시간 벤치마크 (manage.py check, {repeat}회 중앙값)")
+    print("=" * 70)
+
+    results = {}
+    for label, eager in (('즉시 로드 (기존)', True), ('지연 로드', False)):
+        samples = [_run_startup(eager) for _ in range(repeat)]
+        elapsed = float(np.median([t for t, _ in samples]))
+        rss = float(np.median([m for _, m in samples]))
+        results[label] = (elapsed, rss)
+        print(f"  {label:<14} 시간 {elapsed * 1000:8.0f}ms   최대 RSS {rss:7.1f}MB")
+    return results
+
+
+# 모델 로드 방식별 자식 프로세스 코드 - 로드 + 예측 1건의 시간과 /proc/self/status 메모리 출력
+_ARTIFACT_CODE = """
+import json, sys, time
+import numpy as np
+sys.path.insert(0, {project_dir!r})
+from lungcancer.inference import FlatForest
+
+def status():
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f)
+    return {{key: int(fields[key].split()[0]) for key in ('VmRSS', 'RssAnon', 'RssFile')}}
+
+before = status()
+start = time.perf_counter()
+if {compact}:
+    forest, header = FlatForest.load_compact({forest_dir!r})
+else:
+    import joblib
+    model = joblib.load({model_path!r})
+    forest = FlatForest.from_sklearn(model, joblib.load({feature_path!r}))
+forest.predict(np.ones((1, forest.n_features), dtype=np.float32))
+elapsed = time.perf_counter() - start
+after = status()
+print(json.dumps({{'elapsed': elapsed, 'before': before, 'after': after}}))
+"""
+
+
+def _run_artifact_load(artifact, compact):
+    import json
+    import subprocess
+    import sys
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = _ARTIFACT_CODE.format(
+        project_dir=project_dir, compact=compact, forest_dir=artifact.forest_dir,
+        model_path=artifact.model_path, feature_path=artifact.feature_path,
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout)
+
+
+def benchmark_artifact(repeat=5):
+    """모델 로드 시간과 메모리: joblib pickle + 노드 테이블 변환 vs 압축 노드 테이블 메모리 매핑
+
+    각 방식을 새 프로세스에서 실행하고 로드 전후 RSS를 비교합니다.
+    RssFile(파일 매핑)은 같은 파일을 여는 워커끼리 공유되고, RssAnon은 워커마다 따로 차지합니다.
+    """
+    artifact = registry.active_artifact()
+    if not os.path.exists(os.path.join(artifact.forest_dir, 'header.json')):
+        print("압축 노드 테이블이 없습니다. 먼저 'python manage.py export_forest'를 실행하세요.")
+        return False
+    repeat = min(repeat, 20)
+
+    forest_size = sum(
+        os.path.getsize(os.path.join(artifact.forest_dir, name)) for name in os.listdir(artifact.forest_dir)
+    )
+    print("=" * 70)
+    print(f"모델 로드 벤치마크 ({artifact.version}, {repeat}회 중앙값)")
+    print(f"  파일 크기: pickle {os.path.getsize(artifact.model_path) / 1024:.1f}KB, "
+          f"압축 노드 테이블 {forest_size / 1024:.1f}KB")
+    print("=" * 70)
+
+    results = {}
+    for label, compact in (('joblib pickle', False), ('압축 노드 테이블 (mmap)', True)):
+        samples = [_run_artifact_load(artifact, compact) for _ in range(repeat)]
+        elapsed = float(np.median([sample['elapsed'] for sample in samples]))
+        delta = {
+            key: float(np.median([sample['after'][key] - sample['before'][key] for sample in samples])) / 1024
+            for key in ('VmRSS', 'RssAnon', 'RssFile')
+        }
+        results[label] = (elapsed, delta)
+        print(f"  {label:<24} 로드 {elapsed * 1000:8.1f}ms   RSS 증가 {delta['VmRSS']:6.1f}MB "
+              f"(워커별 {delta['RssAnon']:6.1f}MB, 공유 가능 {delta['RssFile']:6.1f}MB)")
+    return results
+
+
+def _survey_split():
+    """train_model.py와 같은 방식으로 전처리한 (X_train, X_test, y_train, y_test) DataFrame, CSV가 없으면 None"""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_path = os.path.join(project_dir, 'survey lung cancer.csv')
+    if not os.path.exists(data_path):
+        return None
+    df = pd.read_csv(data_path)
+    df['GENDER'] = df['GENDER'].map({'M': 1, 'F': 0})
+    df['LUNG_CANCER'] = df['LUNG_CANCER'].map({'YES': 1, 'NO': 0})
+    return train_test_split(
+        df.drop('LUNG_CANCER', axis=1), df['LUNG_CANCER'], test_size=0.2, random_state=42, stratify=df['LUNG_CANCER'],
+    )
+
+
+def _survey_training_data():
+    """train_model.py와 같은 방식으로 전처리한 학습 분할 (X_train, y_train), CSV가 없으면 None"""
+    split = _survey_split()
+    if split is None:
+        return None
+    X_train, _, y_train, _ = split
+    return X_train.to_numpy(), y_train.to_numpy()
+
+
+def benchmark_tuning(repeat=None):
+    """하이퍼파라미터 탐색 시간: 단일 프로세스 전체 그리드 vs successive halving (1 프로세스 / 전체 코어)
+
+    결과 캐시의 영향을 받지 않도록 매번 임시 캐시 디렉터리를 사용합니다.
+    """
+    import shutil
+    import tempfile
+
+    from .tuning import PARAM_GRID, grid_search, halving_search, param_candidates
+
+    data = _survey_training_data()
+    if data is None:
+        print("학습 데이터(survey lung cancer.csv)가 없습니다.")
+        return False
+    X, y = data
+    n_cores = os.cpu_count() or 1
+
+    print("=" * 70)
+    print(f"하이퍼파라미터 탐색 벤치마크 (후보 {len(param_candidates(PARAM_GRID))}개, 5-fold, CPU {n_cores}개)")
+    print("=" * 70)
+
+    cache_root = tempfile.mkdtemp()
+    try:
+        grid = grid_search(X, y, cache_root=cache_root)
+        print(f"  전체 그리드 (1 프로세스)     {grid['elapsed']:8.1f}s  정확도 {grid['best_score']:.4f}  {grid['best_params']}")
+
+        results = {'grid': grid}
+        for label, n_jobs in (('halving (1 프로세스)', 1), (f'halving ({n_cores} 프로세스)', n_cores)):
+            if label in results:
+                continue
+            shutil.rmtree(cache_root)
+            halving = halving_search(X, y, n_jobs=n_jobs, cache_root=cache_root, verbose=False)
+            results[label] = halving
+            print(f"  {label:<24} {halving['elapsed']:8.1f}s  정확도 {halving['best_score']:.4f}  "
+                  f"{halving['best_params']}  (학습 {halving['evaluated']}회, {grid['elapsed'] / halving['elapsed']:.1f}배)")
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+    return results
+
+
+def _load_survey_dataframe(using='heart_db'):
+    """비교용 기존 방식: 모델 인스턴스 딕셔너리 → DataFrame → 열별 변환"""
+    import pandas as pd
+
+    from .batch import SYMPTOM_FIELDS
+    from .models import LungCancerSurvey
+
+    df = pd.DataFrame(list(LungCancerSurvey.objects.using(using).values()))
+    for field in SYMPTOM_FIELDS + ['lung_cancer']:
+        df[field] = df[field].map({2: 1, 1: 0})
+    return df.drop(columns=['id', 'lung_cancer']).to_numpy(), df['lung_cancer'].to_numpy()
+
+
+def benchmark_training_data(repeat=None, sizes=(10000, 40000, 160000), database='bench'):
+    """heart_db 학습 데이터 로드: values() + DataFrame vs keyset 스트리밍 uint8 로더
+
+    테이블 크기별 소요 시간과 tracemalloc 최대 메모리(결과 행렬 제외분 포함)를 비교합니다.
+    database(기본: 로컬 SQLite bench)의 lung_cancer_survey에 행을 추가한 뒤 트랜잭션을 롤백하며,
+    로컬 데이터베이스가 아니면 실행하지 않습니다 (synthetic.prepare_database).
+    """
+    import gc
+    import tracemalloc
+
+    from django.db import transaction
+
+    from .synthetic import SurveyGenerator, prepare_database, write_survey
+    from .training_data import load_training_data
+
+    prepare_database(database)
+
+    print("=" * 70)
+    print("학습 데이터 로드 벤치마크 (lung_cancer_survey)")
+    print("=" * 70)
+
+    def run(func):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, elapsed, peak / 1024 / 1024
+
+    results = {}
+    try:
+        with transaction.atomic(using=database):
+            inserted = 0
+            for size in sizes:
+                write_survey(size - inserted, SurveyGenerator(seed=size), using=database, verbose=False)
+                inserted = size
+
+                (X_old, y_old), old_elapsed, old_peak = run(lambda: _load_survey_dataframe(database))
+                (X_new, y_new, _), new_elapsed, new_peak = run(lambda: load_training_data(using=database))
+                identical = np.array_equal(X_old, X_new) and np.array_equal(y_old, y_new)
+                n = len(X_new)
+                results[size] = (old_elapsed, old_peak, new_elapsed, new_peak, identical)
+                print(f"  {n:>8}행  DataFrame {old_elapsed:7.2f}s 최대 {old_peak:8.1f}MB  |  "
+                      f"스트리밍 {new_elapsed:7.2f}s 최대 {new_peak:7.1f}MB (행렬 {X_new.nbytes / 1024 / 1024:.1f}MB)  "
+                      f"일치: {'예' if identical else '아니오'}")
+                del X_old, y_old, X_new, y_new
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+def _legacy_result_statistics(using='heart_db'):
+    """비교용 기존 시각화 뷰 방식: lung_result 전체를 행별 딕셔너리 → DataFrame으로 만든 뒤 집계"""
+    import pandas as pd
+
+    from .models import LungResult
+    from .result_stats import RISK_BIN_EDGES
+
+    all_data = []
+    for result in LungResult.objects.using(using).all():
+        all_data.append({
+            'name': result.name,
+            'gender': result.gender,
+            'age': result.age,
+            'prediction': 'YES' if result.prediction == '양성' else 'NO',
+            'probability': float(result.risk_score) / 100,
+            'created_at': result.created_at,
+        })
+    df = pd.DataFrame(all_data)
+    df['gender_label'] = df['gender'].apply(lambda x: '남성' if x == 1 or x == '1' else '여성')
+    gender_prediction = pd.crosstab(df['gender_label'], df['prediction']).reindex(columns=['NO', 'YES'], fill_value=0)
+    df['age_decade'] = (df['age'] // 10) * 10
+    age_prediction = pd.crosstab(df['age_decade'], df['prediction']).reindex(columns=['NO', 'YES'], fill_value=0)
+    # 히스토그램 구간은 현재 화면과 같은 고정 구간
+    hist, _ = np.histogram(df['probability'] * 100, bins=RISK_BIN_EDGES)
+    return {
+        'total': len(df),
+        'predictions': {label: int((df['prediction'] == label).sum()) for label in ('NO', 'YES')},
+        'by_gender': {label: {key: int(n) for key, n in row.items()} for label, row in gender_prediction.iterrows()},
+        'by_age_decade': {int(decade): {key: int(n) for key, n in row.items()}
+                          for decade, row in age_prediction.iterrows()},
+        'avg_age': float(df['age'].mean()),
+        'risk_histogram': hist,
+    }
+
+
+def _insert_synthetic_results(n_rows, seed, using='heart_db'):
+    """합성 설문 행의 예측 결과를 lung_result에 bulk_create (lung_record 없이 결과 행만)"""
+    from datetime import timedelta
+
+    from .batch import BULK_CHUNK_SIZE
+    from .models import LungResult
+    from .synthetic import DEFAULT_START, SurveyGenerator
+
+    generator = SurveyGenerator(seed=seed)
+    bundle = model_provider.get_bundle()
+    order = [generator.feature_names.index(name) for name in bundle.feature_names]
+    for start, block in generator.blocks(n_rows):
+        X = block[:, :-1].astype(np.float32)
+        X[:, 2:] = X[:, 2:] == 2
+        labels, probabilities = bundle.predict_array(X[:, order])
+        LungResult.objects.using(using).bulk_create([
+            LungResult(
+                record_id=start + i + 1, name=f'합성 환자 #{start + i + 1}', gender=str(row[0]), age=row[1],
+                prediction='양성' if label == 1 else '음성', risk_score=round(float(probability) * 100, 2),
+                created_at=DEFAULT_START + timedelta(minutes=start + i),
+            )
+            for i, (row, label, probability) in enumerate(zip(block.tolist(), labels, probabilities))
+        ], batch_size=BULK_CHUNK_SIZE)
+
+
+def benchmark_visualization(repeat=None, sizes=(10000, 100000, 1000000), database='bench'):
+    """시각화 페이지 통계: 전체 행 DataFrame 집계(기존) vs 데이터베이스 GROUP BY 집계 (result_stats)
+
+    lung_result 크기별 소요 시간, 쿼리 수, tracemalloc 최대 메모리와 결과 일치 여부를 비교합니다.
+    database(기본: 로컬 SQLite bench)의 lung_result에 행을 추가한 뒤 트랜잭션을 롤백하며, 로컬
+    데이터베이스(SQLite 또는 settings.BENCHMARK_DATABASES)가 아니면 실행하지 않습니다 (synthetic.prepare_database).
+    """
+    import gc
+    import tracemalloc
+
+    from django.db import connections, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from .models import LungResult
+    from .result_stats import result_statistics
+    from .synthetic import prepare_database
+
+    prepare_database(database)
+
+    print("=" * 70)
+    print("시각화 통계 벤치마크 (lung_result)")
+    print("=" * 70)
+
+    def run(func):
+        gc.collect()
+        tracemalloc.start()
+        with CaptureQueriesContext(connections[database]) as queries:
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, elapsed, len(queries), peak / 1024 / 1024
+
+    results = {}
+    try:
+        with transaction.atomic(using=database):
+            existing = LungResult.objects.using(database).count()
+            inserted = 0
+            for size in sizes:
+                _insert_synthetic_results(size - inserted, seed=size, using=database)
+                inserted = size
+
+                old, old_elapsed, old_queries, old_peak = run(lambda: _legacy_result_statistics(database))
+                new, new_elapsed, new_queries, new_peak = run(lambda: result_statistics(using=database))
+                # 기존 방식은 확률(risk_score / 100) * 100으로 히스토그램을 계산하므로 구간 경계의 값이
+                # 부동소수점 오차로 옆 구간에 들어갈 수 있어 구간별 건수는 합계와 최대 차이로 비교
+                histogram_diff = int(np.abs(old.pop('risk_histogram') - new['risk_histogram'][0]).max())
+                identical = old == {key: value for key, value in new.items() if key != 'risk_histogram'}
+                results[size] = (old_elapsed, old_peak, new_elapsed, new_peak, identical, histogram_diff)
+                print(f"  {existing + size:>8}행  DataFrame {old_elapsed:7.2f}s 최대 {old_peak:8.1f}MB  |  "
+                      f"GROUP BY {new_elapsed:7.3f}s 쿼리 {new_queries}개 최대 {new_peak:6.2f}MB  "
+                      f"(기존 쿼리 {old_queries}개)  일치: {'예' if identical else '아니오'}, "
+                      f"히스토그램 구간 최대 차이 {histogram_diff}건")
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+def benchmark_rollup(repeat=5, sizes=(10000, 100000, 1000000), database='bench'):
+    """대시보드 통계: lung_result 원본 GROUP BY 집계 vs 일별 집계 테이블 (result_rollup)
+
+    lung_result 크기별 원본 집계 시간, 새 행을 집계에 반영(catch_up)하는 시간, 집계 테이블 조회 시간과
+    집계 테이블 행 수/날짜 수를 비교합니다. database(lung_result, 기본: 로컬 SQLite bench)와 기본
+    데이터베이스(집계 테이블) 모두 트랜잭션을 롤백하며, 둘 중 하나라도 로컬 데이터베이스가 아니면
+    실행하지 않습니다 (synthetic.require_local_database).
+    """
+    from django.db import transaction
+
+    from . import result_rollup
+    from .models import LungResult, LungResultRollup
+    from .result_stats import result_statistics
+    from .synthetic import prepare_database, require_local_database
+
+    require_local_database('default')
+    prepare_database(database)
+
+    repeat = min(repeat, 5)
+    print("=" * 70)
+    print("일별 집계 테이블 벤치마크 (lung_result)")
+    print("=" * 70)
+
+    def best_of(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = func()
+            timings.append(time.perf_counter() - start)
+        return value, min(timings)
+
+    results = {}
+    try:
+        with transaction.atomic(using=database), transaction.atomic():
+            # 기존 집계는 다른 lung_result 데이터베이스의 watermark일 수 있으므로 지우고 처음부터 집계 (롤백으로 복원)
+            result_rollup.reset()
+            existing = LungResult.objects.using(database).count()
+            inserted = 0
+            for size in sizes:
+                _insert_synthetic_results(size - inserted, seed=size, using=database)
+                inserted = size
+
+                start = time.perf_counter()
+                caught_up = result_rollup.catch_up(using=database, create=True)
+                catch_up_elapsed = time.perf_counter() - start
+
+                raw, raw_elapsed = best_of(lambda: result_statistics(using=database))
+                rolled, rollup_elapsed = best_of(result_rollup.statistics)
+                identical = all(raw[key] == rolled[key] for key in raw if key != 'risk_histogram') and all(
+                    np.array_equal(a, b) for a, b in zip(raw['risk_histogram'], rolled['risk_histogram'])
+                )
+                status = result_rollup.status()
+                results[size] = (raw_elapsed, catch_up_elapsed, rollup_elapsed, status['rows'], identical)
+                print(f"  {existing + size:>8}행  원본 GROUP BY {raw_elapsed * 1000:8.1f}ms  |  "
+                      f"집계 테이블 {rollup_elapsed * 1000:6.1f}ms ({status['rows']}행, {status['days']}일)  "
+                      f"새 {caught_up}행 반영 {catch_up_elapsed:6.2f}s  일치: {'예' if identical else '아니오'}")
+
+            # 예측 1건 저장 후 요청에서 반영하는 비용
+            _insert_synthetic_results(1, seed=0, using=database)
+            start = time.perf_counter()
+            result_rollup.refresh(using=database)
+            refresh_elapsed = time.perf_counter() - start
+            print(f"  예측 1건 저장 후 refresh: {refresh_elapsed * 1000:.1f}ms "
+                  f"(집계 테이블 {LungResultRollup.objects.count()}행)")
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
+
+
+def benchmark_charts(repeat=5):
+    """시각화 페이지: 차트 4개를 매번 렌더링하여 base64로 넣기(기존) vs 데이터 버전별 차트 URL + 캐시
+
+    설정된 heart_db의 lung_result로 페이지와 차트 요청을 직접 호출하여 시간(중앙값)과 전송 바이트를 비교합니다.
+    - 기존: 페이지 + 차트 4개 PNG 렌더링 + base64 (이미지가 HTML에 포함되어 브라우저 캐시 불가)
+    - 첫 방문: 페이지 + 차트 요청 4개 (서버 캐시 없음, 렌더링)
+    - 서버 캐시: 페이지 + 차트 요청 4개 (다른 사용자가 이미 본 데이터 버전)
+    - 재방문: 페이지 + If-None-Match 차트 요청 4개 (304)
+    """
+    import base64
+    import statistics
+
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+    from django.urls import resolve, reverse
+
+    from . import chart_cache, charts, views
+
+    repeat = min(repeat, 10)
+    print("=" * 70)
+    print("시각화 페이지 차트 벤치마크")
+    print("=" * 70)
+
+    factory = RequestFactory()
+    cache = chart_cache.get_cache()
+    if cache is None:
+        print("  CHART_CACHE가 비활성화되어 있습니다.")
+        return {}
+    summary = views._visualization_summary()
+    if summary is None or summary['total'] == 0:
+        print("  lung_result에 데이터가 없습니다.")
+        return {}
+
+    def get(path, **headers):
+        request = factory.get(path, **headers)
+        request.user = AnonymousUser()
+        match = resolve(path)
+        return match.func(request, *match.args, **match.kwargs)
+
+    page_url = reverse('lungcancer:visualization')
+    version = chart_cache.data_version(summary)
+    urls = [reverse('lungcancer:visualization_chart', args=[version, chart, 'png']) for chart in charts.CHARTS]
+    etags = {}
+
+    def legacy():
+        # 페이지의 통계 계산 + 차트 4개 렌더링 (차트 요청 없음)
+        nbytes = len(get(page_url).content)
+        for chart, url in zip(charts.CHARTS, urls):
+            data = base64.b64encode(charts.render(chart, summary)).decode()
+            # 차트 URL 자리에 data URI가 들어간 HTML 크기
+            nbytes += len('data:image/png;base64,') + len(data) - len(url)
+        return nbytes
+
+    def visit(conditional=False):
+        nbytes = len(get(page_url).content)
+        for url in urls:
+            response = get(url, **({'HTTP_IF_NONE_MATCH': etags[url]} if conditional else {}))
+            etags[url] = response['ETag']
+            nbytes += len(response.content)
+        return nbytes
+
+    def cold():
+        cache.clear()
+        return visit()
+
+    results = {}
+    for label, func in (('기존 (inline base64)', legacy), ('첫 방문 (렌더링)', cold),
+                        ('서버 캐시', visit), ('재방문 (304)', lambda: visit(conditional=True))):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            nbytes = func()
+            timings.append(time.perf_counter() - start)
+        results[label] = (statistics.median(timings), nbytes)
+        print(f"  {label:<20} {statistics.median(timings) * 1000:8.1f}ms  {nbytes / 1024:8.1f}KB")
+    return results
+
+
+def benchmark_chart_render(repeat=20, threads=4):
+    """차트별 렌더링 시간 (charts.render, Figure 객체 API + 프로세스당 한 번 폰트 설정)
+
+    - 폰트/스타일 결정: 기존에는 요청마다 폰트 목록을 읽고 rcParams를 바꿨으며, 지금은 프로세스당 한 번
+    - 차트별 PNG/SVG 렌더링 시간 (중앙값)
+    - threads개 스레드에서 동시에 렌더링한 이미지가 순차 렌더링과 같은지와 처리량
+    """
+    import statistics
+    from concurrent.futures import ThreadPoolExecutor
+
+    from . import charts, views
+
+    repeat = min(repeat, 100)
+    print("=" * 70)
+    print(f"차트 렌더링 벤치마크 ({repeat}회 중앙값)")
+    print("=" * 70)
+
+    summary = views._visualization_summary()
+    if summary is None or summary['total'] == 0:
+        print("  lung_result에 데이터가 없습니다.")
+        return {}
+
+    def median_ms(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    start = time.perf_counter()
+    charts.initialize()
+    print(f"  첫 initialize (폰트/스타일 결정 및 적용): {(time.perf_counter() - start) * 1000:.1f}ms")
+    results = {'resolve_style': median_ms(charts.resolve_style), 'initialize': median_ms(charts.initialize)}
+    print(f"  폰트/스타일 결정 (기존: 요청마다): {results['resolve_style']:.2f}ms  "
+          f"| 이후 initialize: {results['initialize'] * 1000:.1f}us")
+
+    for fmt in ('png', 'svg'):
+        for chart in charts.CHARTS:
+            elapsed = median_ms(lambda: charts.render(chart, summary, fmt=fmt))
+            size = len(charts.render(chart, summary, fmt=fmt))
+            results[f'{chart}.{fmt}'] = elapsed
+            print(f"  {chart:<12} {fmt}  {elapsed:7.1f}ms  {size / 1024:6.1f}KB")
+
+    # 순차 렌더링 결과와 스레드 동시 렌더링 결과 비교
+    jobs = [chart for chart in charts.CHARTS for _ in range(max(1, repeat // 4))]
+    expected = {chart: charts.render(chart, summary) for chart in charts.CHARTS}
+    start = time.perf_counter()
+    for chart in jobs:
+        charts.render(chart, summary)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        images = list(pool.map(lambda chart: charts.render(chart, summary), jobs))
+    concurrent = time.perf_counter() - start
+    identical = all(image == expected[chart] for chart, image in zip(jobs, images))
+    results['threads'] = (sequential, concurrent, identical)
+    print(f"  {len(jobs)}개 렌더링: 순차 {sequential:.2f}s, {threads}스레드 {concurrent:.2f}s  "
+          f"이미지 일치: {'예' if identical else '아니오'}")
+    return results
+
+
+def benchmark_prerender(repeat=5, jobs=(1, 2, 4)):
+    """새 데이터 버전의 첫 차트 요청: 요청 중 렌더링 vs 미리 렌더링 워커 (chart_prerender)
+
+    통계를 조금씩 바꾼 새 데이터 버전마다 차트 요청 4개(chart_cache.get_chart)의 시간(중앙값)을 비교하고,
+    워커가 한 버전을 렌더링하여 게시하는 시간을 프로세스 수(jobs)별로 측정합니다 (local 캐시 사용).
+    """
+    import copy
+    import statistics
+
+    from . import chart_cache, chart_prerender, charts, views
+
+    repeat = min(repeat, 10)
+    print("=" * 70)
+    print(f"차트 미리 렌더링 벤치마크 ({repeat}회 중앙값)")
+    print("=" * 70)
+
+    summary = views._visualization_summary()
+    if summary is None or summary['total'] == 0:
+        print("  lung_result에 데이터가 없습니다.")
+        return {}
+
+    counter = iter(range(1, 1_000_000))
+
+    def new_summary():
+        # 새 결과가 저장된 것처럼 통계를 바꿔 새 데이터 버전을 만듦
+        changed = copy.deepcopy(summary)
+        n = next(counter)
+        changed['total'] += n
+        changed['predictions']['NO'] += n
+        return changed
+
+    def first_requests(cache, summary):
+        # 페이지가 참조하는 버전의 차트 요청 4개
+        version = chart_cache.serving_version(chart_cache.data_version(summary))
+        for chart in charts.CHARTS:
+            image, _ = chart_cache.get_chart(version, chart, 'png', charts.DEFAULT_DPI, lambda: summary)
+            assert image is not None
+
+    def median_ms(timings):
+        return statistics.median(timings) * 1000
+
+    results = {}
+    cache = chart_cache.ChartCache(max_size=256)
+    previous = chart_cache._cache
+    chart_cache._cache = cache
+    try:
+        charts.initialize()
+        timings = []
+        for _ in range(repeat):
+            changed = new_summary()
+            chart_cache.publish_summary(changed)
+            start = time.perf_counter()
+            first_requests(cache, changed)
+            timings.append(time.perf_counter() - start)
+        results['on_request'] = median_ms(timings)
+        print(f"  {'첫 차트 요청 4개 - 요청 중 렌더링':<36} {results['on_request']:8.1f}ms")
+
+        prerenderer = chart_prerender.Prerenderer(cache)
+        prerenderer.publish(new_summary())
+        timings = []
+        for _ in range(repeat):
+            # 워커가 새 버전을 렌더링하기 전에 도착한 요청 - 직전 게시 버전을 제공
+            changed = new_summary()
+            prerenderer.heartbeat()
+            chart_cache.publish_summary(changed)
+            start = time.perf_counter()
+            first_requests(cache, changed)
+            timings.append(time.perf_counter() - start)
+            prerenderer.check(changed)
+        results['prerendered'] = median_ms(timings)
+        print(f"  {'첫 차트 요청 4개 - 직전 게시 버전 제공':<36} {results['prerendered']:8.1f}ms")
+
+        for n_jobs in jobs:
+            prerenderer = chart_prerender.Prerenderer(cache, jobs=n_jobs)
+            try:
+                # 프로세스 풀 시작과 워커별 폰트 설정은 제외
+                prerenderer.publish(new_summary())
+                timings = []
+                for _ in range(repeat):
+                    changed = new_summary()
+                    start = time.perf_counter()
+                    prerenderer.publish(changed)
+                    timings.append(time.perf_counter() - start)
+            finally:
+                prerenderer.close()
+            results[f'publish_jobs{n_jobs}'] = median_ms(timings)
+            print(f"  {f'워커 게시 (jobs={n_jobs}, 렌더링+저장)':<36} {median_ms(timings):8.1f}ms")
+    finally:
+        chart_cache._cache = previous
+    return results
+
+
+_BACKEND_LABELS = {'rf': 'RandomForest', 'hgb': 'HistGradientBoosting'}
+
+
+def _fit_backend(backend, X, y):
+    """(학습된 모델, 학습 시간) - hgb는 train_model.py와 같이 uint8 특성으로 학습"""
+    from .train_model import build_model, to_uint8
+
+    model = build_model(backend)
+    if backend == 'hgb':
+        X = to_uint8(X)
+    start = time.perf_counter()
+    model.fit(X, y)
+    return model, time.perf_counter() - start
+
+
+def benchmark_backends(repeat=1000, batch_size=256, synthetic_rows=(10000, 100000)):
+    """RandomForest vs HistGradientBoosting(uint8 특성): 학습 시간, 예측 지연 시간, 정확도
+
+    실제 설문 CSV는 train_model.py와 같은 분할로 테스트/교차 검증 정확도와 서빙 경로(FlatForest)
+    지연 시간을 비교하고, 합성 데이터(synthetic.SurveyGenerator)로 행 수별 학습 시간을 비교합니다.
+    """
+    import pandas as pd
+    from sklearn.model_selection import cross_val_score
+
+    from .inference import FlatForest, features_to_array
+    from .synthetic import SurveyGenerator
+    from .train_model import BACKENDS, to_uint8
+
+    split = _survey_split()
+    if split is None:
+        print("학습 데이터(survey lung cancer.csv)가 없습니다.")
+        return False
+    X_train, X_test, y_train, y_test = split
+    feature_names = X_train.columns.tolist()
+
+    print("=" * 70)
+    print(f"학습 백엔드 벤치마크 (설문 CSV 학습 {len(X_train)}행 / 테스트 {len(X_test)}행, 반복 {repeat}회)")
+    print("=" * 70)
+
+    results = {}
+    models = {}
+    for backend in BACKENDS:
+        model, fit_seconds = _fit_backend(backend, X_train, y_train)
+        X_eval = to_uint8(X_test) if backend == 'hgb' else X_test
+        cv_X = to_uint8(X_train) if backend == 'hgb' else X_train
+        cv = cross_val_score(model, cv_X, y_train, cv=5, scoring='accuracy')
+        forest = FlatForest.from_sklearn(model, feature_names)
+        models[backend] = (model, forest)
+        results[backend] = {
+            'fit_seconds': fit_seconds,
+            'test_accuracy': float(np.mean(model.predict(X_eval) == y_test)),
+            'cv_accuracy': float(cv.mean()),
+        }
+        print(f"  {_BACKEND_LABELS[backend]:<22} 학습 {fit_seconds:7.3f}s  테스트 정확도 "
+              f"{results[backend]['test_accuracy']:.4f}  교차 검증 {cv.mean():.4f} (+/- {cv.std() * 2:.4f})  "
+              f"트리 {forest.n_trees}개, 노드 {forest.n_nodes}개")
+
+    rows = random_survey_rows(batch_size, feature_names)
+    row = rows[0]
+    frame = pd.DataFrame([row])[feature_names]
+    print("\n[단일 행]")
+    for backend, (model, forest) in models.items():
+        name = _BACKEND_LABELS[backend]
+        print_latency(f'{name} sklearn', measure(lambda: model.predict_proba(frame), repeat))
+        print_latency(f'{name} FlatForest', measure(lambda: forest.predict_one(row), repeat))
+
+    batch_repeat = max(1, repeat // 10)
+    batch_frame = pd.DataFrame(rows)[feature_names]
+    print(f"\n[배치 {batch_size}행]")
+    for backend, (model, forest) in models.items():
+        name = _BACKEND_LABELS[backend]
+        print_latency(f'{name} sklearn', measure(lambda: model.predict_proba(batch_frame), batch_repeat),
+                      rows=batch_size)
+        print_latency(
+            f'{name} FlatForest',
+            measure(lambda: forest.predict(features_to_array(rows, feature_names)), batch_repeat),
+            rows=batch_size,
+        )
+
+    generator = SurveyGenerator()
+    print("\n[합성 데이터 학습 시간 (80% 학습 / 20% 테스트)]")
+    for n_rows in synthetic_rows:
+        data = np.concatenate([block for _, block in generator.blocks(n_rows)])
+        X = pd.DataFrame(data[:, :-1], columns=generator.feature_names)
+        y = (data[:, -1] == 2).astype(np.int64)
+        n_train = int(n_rows * 0.8)
+        line = f"  {n_rows:>8}행"
+        for backend in BACKENDS:
+            model, fit_seconds = _fit_backend(backend, X[:n_train], y[:n_train])
+            X_eval = to_uint8(X[n_train:]) if backend == 'hgb' else X[n_train:]
+            accuracy = float(np.mean(model.predict(X_eval) == y[n_train:]))
+            results[(backend, n_rows)] = {'fit_seconds': fit_seconds, 'test_accuracy': accuracy}
+            line += f"  |  {backend} 학습 {fit_seconds:7.2f}s 정확도 {accuracy:.4f}"
+        print(line)
+    return results
+
+
+def _forest_bytes(forest):
+    """FlatForest 노드 배열이 차지하는 메모리 (바이트)"""
+    return sum(
+        array.nbytes for array in (forest.feature, forest.threshold, forest.left, forest.right, forest.value, forest.roots)
+    )
+
+
+def _published_student(teacher_version):
+    """teacher_version을 교사로 게시된 가장 최근 학생 버전 (없으면 None)"""
+    for version in reversed(registry.list_versions()):
+        manifest = registry.read_manifest(version)
+        if manifest.get('distillation', {}).get('teacher_version') == teacher_version:
+            return registry.get_artifact(version)
+    return None
+
+
+def benchmark_distill(repeat=1000, batch_size=256):
+    """교사 포레스트와 증류된 학생 트리의 예측 지연 시간, 메모리, 입력 공간 전체 일치율 비교
+
+    활성 버전을 교사로 게시된 학생 버전이 있으면 그것을, 없으면 메모리에서 증류한 학생을 사용합니다.
+    """
+    import joblib
+    import pickle
+    from .distill import agreement, distill
+    from .inference import FlatForest, features_to_array
+
+    teacher, feature_names = load_model()
+    artifact = registry.active_artifact()
+    published = _published_student(artifact.version)
+    if published is not None:
+        student = joblib.load(published.model_path)
+        source = f'게시된 버전 {published.version}'
+    else:
+        student, _ = distill(teacher, feature_names, verbose=False)
+        source = '메모리에서 증류 (게시된 학생 버전 없음)'
+
+    teacher_forest = FlatForest.from_sklearn(teacher, feature_names)
+    student_forest = FlatForest.from_sklearn(student, feature_names)
+    rows = random_survey_rows(batch_size, feature_names)
+    row = rows[0]
+
+    print("=" * 70)
+    print(f"증류 벤치마크 (교사 {artifact.version}, 학생: {source}, 반복 {repeat}회)")
+    print("=" * 70)
+    stats = agreement(teacher, student, feature_names)
+    print(f"입력 {stats['n_inputs']}가지 전체: 최대 확률 차이 {stats['max_deviation']:.4f}, "
+          f"평균 {stats['mean_deviation']:.4f}, 라벨 일치 {stats['label_agreement']:.4%}")
+
+    print("\n[크기]")
+    for label, model, forest in (('교사', teacher, teacher_forest), ('학생', student, student_forest)):
+        print(f"  {label}  트리 {forest.n_trees:>4}개, 노드 {forest.n_nodes:>6}개, "
+              f"노드 배열 {_forest_bytes(forest) / 1024:8.1f}KB, pickle {len(pickle.dumps(model)) / 1024:8.1f}KB")
+
+    print("\n[단일 행]")
+    print_latency('교사 FlatForest.predict_one', measure(lambda: teacher_forest.predict_one(row), repeat))
+    print_latency('학생 FlatForest.predict_one', measure(lambda: student_forest.predict_one(row), repeat))
+
+    batch_repeat = max(1, repeat // 10)
+    print(f"\n[배치 {batch_size}행]")
+    for label, forest in (('교사 FlatForest.predict', teacher_forest), ('학생 FlatForest.predict', student_forest)):
+        print_latency(
+            label, measure(lambda: forest.predict(features_to_array(rows, feature_names)), batch_repeat),
+            rows=batch_size,
+        )
+    return stats
+
+
+def benchmark_compression(repeat=1000, batch_size=256, n_check=100000):
+    """노드 테이블 압축 전후 비교 (활성 버전): 파일 크기, 로드 시간, 예측 지연 시간, 결과 동일성
+
+    동일성은 특성별 정수 값(성별/증상 0~2, 나이 AGE_MIN~AGE_MAX) n_check행으로 확률을 비트 단위로 비교합니다.
+    """
+    import shutil
+    import tempfile
+
+    from .compression import compress_forest
+    from .inference import FlatForest, features_to_array
+    from .risk_table import AGE_FEATURE, AGE_MAX, AGE_MIN
+
+    model, feature_names = load_model()
+    forest = FlatForest.from_sklearn(model, feature_names)
+    start = time.perf_counter()
+    compressed, stats = compress_forest(forest)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 70)
+    print(f"노드 테이블 압축 벤치마크 ({registry.active_version()}, 트리 {forest.n_trees}개, 반복 {repeat}회)")
+    print("=" * 70)
+    print(f"  노드 {stats['nodes_before']}개 → {stats['nodes_after']}개 (공유 서브트리 {stats['shared_subtrees']}개, "
+          f"제거한 분할 {stats['pruned_splits']}개, 최대 깊이 {forest.max_depth} → {compressed.max_depth}, "
+          f"압축 {elapsed * 1000:.1f}ms)")
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 3, (n_check, len(feature_names))).astype(np.float32)
+    X[:, feature_names.index(AGE_FEATURE)] = rng.integers(AGE_MIN, AGE_MAX + 1, n_check)
+    identical = all(
+        np.array_equal(forest.predict_proba(X[i:i + 10000]), compressed.predict_proba(X[i:i + 10000]))
+        for i in range(0, n_check, 10000)
+    )
+    print(f"  정수 입력 {n_check}행 확률 비트 단위 일치: {'예' if identical else '아니오'}")
+
+    directory = tempfile.mkdtemp()
+    results = {'stats': stats, 'identical': identical}
+    try:
+        rows = random_survey_rows(batch_size, feature_names)
+        row = rows[0]
+        for label, table in (('원본', forest), ('압축', compressed)):
+            path = os.path.join(directory, label)
+            table.save_compact(path)
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            load = measure(lambda: FlatForest.load_compact(path, mmap_mode=None), max(1, repeat // 10))
+            loaded, _ = FlatForest.load_compact(path)
+            print(f"\n[{label}] 파일 {size / 1024:.1f}KB, 로드(전체 읽기) p50 {np.median(load) * 1000:.2f}ms")
+            single = measure(lambda: loaded.predict_one(row), repeat)
+            batch = measure(lambda: loaded.predict(features_to_array(rows, feature_names)), max(1, repeat // 10))
+            print_latency('predict_one', single)
+            print_latency(f'predict ({batch_size}행)', batch, rows=batch_size)
+            results[label] = {'size': size, 'load': float(np.median(load)),
+                              'single': float(np.median(single)), 'batch': float(np.median(batch))}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def _process_memory(pid):
+    """/proc/<pid>/smaps_rollup 기준 (RSS, PSS, USS) KB - USS는 그 프로세스만 쓰는 메모리"""
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        fields = {}
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def _worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def _run_gunicorn(n_workers, preload, timeout=180):
+    """gunicorn을 실행하여 워커가 모두 뜨고 메모리가 안정되면 워커별 (RSS, PSS, USS) 측정"""
+    import signal
+    import subprocess
+    import sys
+    import tempfile
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    socket_path = os.path.join(tempfile.mkdtemp(), 'gunicorn.sock')
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f'unix:{socket_path}',
+        GUNICORN_WORKERS=str(n_workers),
+        GUNICORN_PRELOAD='1' if preload else '0',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'lungcancer_project.wsgi'],
+        cwd=project_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        previous = None
+        while time.monotonic() < deadline:
+            time.sleep(1)
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn 실행 실패 (종료 코드 {process.returncode})')
+            pids = _worker_pids(process.pid)
+            if len(pids) != n_workers:
+                continue
+            memory = {pid: _process_memory(pid) for pid in pids}
+            rss = {pid: values[0] for pid, values in memory.items()}
+            if rss == previous:
+                return memory, _process_memory(process.pid)
+            previous = rss
+        raise RuntimeError('gunicorn 워커가 제한 시간 안에 준비되지 않았습니다.')
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+
+
+def benchmark_workers(repeat=None, worker_counts=(1, 4, 16)):
+    """gunicorn 워커 수별 메모리: 워커마다 로드 vs preload_app (마스터에서 한 번 로드)
+
+    RSS는 공유 페이지를 워커마다 중복 계산하므로, 실제 사용량은 PSS(공유 페이지를 나눠 계산)와
+    USS(워커 전용)로 비교합니다.
+    """
+    print("=" * 70)
+    print("gunicorn 워커 메모리 벤치마크 (워커 평균, MB)")
+    print("=" * 70)
+
+    results = {}
+    for n_workers in worker_counts:
+        for label, preload in (('워커별 로드', False), ('preload_app', True)):
+            memory, master = _run_gunicorn(n_workers, preload)
+            rss, pss, uss = (float(np.mean([values[i] for values in memory.values()])) / 1024 for i in range(3))
+            total = (sum(values[1] for values in memory.values()) + master[1]) / 1024
+            results[(n_workers, preload)] = {'rss': rss, 'pss': pss, 'uss': uss, 'total_pss': total}
+            print(f"  워커 {n_workers:>2}개 {label:<12} RSS {rss:7.1f}  PSS {pss:7.1f}  USS {uss:7.1f}  "
+                  f"전체 PSS(마스터 포함) {total:8.1f}")
+    return results
+
+
+# 병렬도 구성별 워커 프로세스 코드 - 준비되면 ready를 출력하고 stdin의 시작 신호를 기다린 뒤
+# threads개 스레드로 예측하고 요청별 지연 시간(초)과 전체 소요 시간을 출력
+_PARALLELISM_CODE = """
+import json, sys, threading, time
+sys.path.insert(0, {project_dir!r})
+import django
+django.setup()
+import pandas as pd
+from lungcancer import model_provider, parallelism
+from lungcancer.benchmarks import random_survey_rows
+from lungcancer.inference import features_to_array
+
+parallelism.limit_threadpools({inference_threads})
+bundle = model_provider.get_bundle()
+model = parallelism.pin_model(bundle.model, {inference_threads})
+rows = random_survey_rows({batch_size}, bundle.feature_names, seed={seed})
+if {workload!r} == 'sklearn':
+    frame = pd.DataFrame(rows[:1])[bundle.feature_names]
+    predict = lambda: model.predict_proba(frame)
+else:
+    X = features_to_array(rows, bundle.feature_names)
+    predict = lambda: bundle.forest.predict(X)
+predict()
+latencies = [[] for _ in range({threads})]
+
+def run(samples):
+    for _ in range({per_thread}):
+        start = time.perf_counter()
+        predict()
+        samples.append(time.perf_counter() - start)
+
+print('ready', flush=True)
+sys.stdin.readline()
+start = time.perf_counter()
+workers = [threading.Thread(target=run, args=(samples,)) for samples in latencies]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+print(json.dumps({{'elapsed': time.perf_counter() - start, 'latencies': sum(latencies, [])}}))
+"""
+
+
+def _run_parallelism(config, workload, requests, batch_size):
+    """config의 워커 수만큼 프로세스를 띄워 동시에 예측 - (지연 시간 배열, 처리량)"""
+    import json
+    import subprocess
+    import sys
+
+    from .parallelism import THREAD_ENV_VARS
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    per_thread = max(10, requests // (config['workers'] * config['threads']))
+    env = dict(os.environ, ML_INFERENCE_THREADS=str(config['inference_threads']))
+    env.update({name: str(config['inference_threads']) for name in THREAD_ENV_VARS})
+
+    processes = []
+    try:
+        for seed in range(config['workers']):
+            code = _PARALLELISM_CODE.format(
+                project_dir=project_dir, inference_threads=config['inference_threads'], threads=config['threads'],
+                per_thread=per_thread, workload=workload, batch_size=batch_size, seed=seed,
+            )
+            processes.append(subprocess.Popen(
+                [sys.executable, '-c', code], cwd=project_dir, env=env, text=True,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            ))
+        # 모든 워커가 모델을 로드한 뒤 동시에 시작
+        for process in processes:
+            if process.stdout.readline().strip() != 'ready':
+                raise RuntimeError(f'벤치마크 워커 실행 실패 (종료 코드 {process.wait()})')
+        for process in processes:
+            process.stdin.write('go\n')
+            process.stdin.flush()
+        results = [json.loads(process.stdout.readline()) for process in processes]
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+    latencies = np.concatenate([result['latencies'] for result in results])
+    throughput = len(latencies) * (batch_size if workload == 'forest' else 1) / max(
+        result['elapsed'] for result in results)
+    return latencies, throughput
+
+
+def benchmark_parallelism(repeat=1000, batch_size=64):
+    """워커 수 x 웹 스레드 수 x 추론 스레드 수 구성별 동시 예측 지연 시간(p50/p99)과 처리량
+
+    각 구성마다 워커 수만큼 프로세스를 띄우고(스레드 라이브러리 환경 변수와 n_jobs 고정),
+    모든 워커가 웹 스레드 수만큼의 스레드로 동시에 예측합니다.
+    - sklearn: model.predict_proba 단일 행 (n_jobs = 추론 스레드 수)
+    - forest: FlatForest.predict batch_size행
+    추론 스레드 수가 코어 수인 구성은 라이브러리 기본값(코어 수만큼 스레드)에 해당하고,
+    '*' 표시는 parallelism.plan()의 기본 구성입니다.
+    """
+    from .parallelism import available_cpus, plan
+
+    cpus = available_cpus()
+    default = plan(cpus=cpus, workers=cpus * 2 + 1, threads=1)
+    configs = []
+    for workers in sorted({1, cpus, cpus * 2 + 1}):
+        for threads in (1, 4):
+            for inference_threads in sorted({1, cpus}):
+                configs.append(plan(cpus=cpus, workers=workers, threads=threads,
+                                    inference_threads=inference_threads))
+
+    print("=" * 70)
+    print(f"추론 병렬도 벤치마크 (코어 {cpus}개, 구성별 요청 약 {repeat}건)")
+    print("=" * 70)
+
+    results = {}
+    for workload, title in (('sklearn', 'sklearn predict_proba (1행)'), ('forest', f'FlatForest.predict ({batch_size}행)')):
+        print(f"\n[{title}]")
+        for config in configs:
+            latencies, throughput = _run_parallelism(config, workload, repeat, batch_size)
+            key = (workload, config['workers'], config['threads'], config['inference_threads'])
+            results[key] = {
+                'p50': float(np.percentile(latencies, 50)), 'p99': float(np.percentile(latencies, 99)),
+                'throughput': throughput,
+            }
+            us = latencies * 1e6
+            marker = '*' if config == default else ' '
+            print(f" {marker}워커 {config['workers']:>2} x 스레드 {config['threads']} x 추론 {config['inference_threads']:>2} "
+                  f"(스레드/코어 {config['oversubscription']:5.2f})  p50 {np.percentile(us, 50):9.1f}µs  "
+                  f"p99 {np.percentile(us, 99):9.1f}µs  처리량 {throughput:10.0f}행/s")
+    return results
+
+
+BENCHMARKS = {
+    'inference': benchmark_inference,
+    'risk_table': benchmark_risk_table,
+    'batch_api': benchmark_batch_api,
+    'batching': benchmark_batching,
+    'cache': benchmark_cache,
+    'explain': benchmark_explain,
+    'startup': benchmark_startup,
+    'artifact': benchmark_artifact,
+    'workers': benchmark_workers,
+    'tuning': benchmark_tuning,
+    'training_data': benchmark_training_data,
+    'distill': benchmark_distill,
+    'backends': benchmark_backends,
+    'compression': benchmark_compression,
+    'parallelism': benchmark_parallelism,
+    'visualization': benchmark_visualization,
+    'rollup': benchmark_rollup,
+    'charts': benchmark_charts,
+    'chart_render': benchmark_chart_render,
+    'prerender': benchmark_prerender,
+}
@@ -0,0 +1,349 @@
+"""
+시각화 차트 이미지 캐시
+
+차트 이미지는 통계(summary)만으로 결정되므로, 통계와 렌더링 버전(charts.RENDER_VERSION)의 해시를
+데이터 버전으로 사용합니다. 시각화 페이지는 데이터 버전이 들어간 URL로 차트를 참조하고,
+차트 URL은 (데이터 버전, 차트, 형식, dpi)를 키로 렌더링된 이미지를 캐시에서 제공합니다.
+
+- 새 결과가 저장되거나 수정/삭제되어 통계가 바뀌면 데이터 버전이 바뀌어 새 URL이 되므로,
+  이전 이미지는 더 이상 참조되지 않고 TTL/LRU로 정리됩니다 (별도 무효화 불필요).
+- 같은 URL의 이미지는 바뀌지 않으므로 브라우저가 오래 캐시할 수 있습니다 (Cache-Control: immutable).
+- 페이지를 그릴 때 계산한 통계를 데이터 버전별로 함께 저장하여, 차트 요청은 캐시에 이미지가
+  없어도 통계를 다시 계산하지 않고 렌더링합니다.
+
+- 미리 렌더링 워커(chart_prerender)는 데이터 버전의 차트를 모두 저장한 뒤 게시 버전(published)을 바꾸고,
+  워커가 동작 중이면 페이지는 아직 렌더링되지 않은 새 버전 대신 마지막 게시 버전을 참조합니다 (serving_version).
+
+- local: 프로세스 내부 LRU (최대 항목 수, TTL)
+- django: Django 캐시 프레임워크(settings.CACHES) - 여러 워커가 공유
+- files: 디렉터리의 항목별 파일 (임시 파일에 쓴 뒤 교체) - 같은 서버의 여러 프로세스가 공유
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from . import charts
+
+
+KEY_PREFIX = 'lungchart'
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIRECTORY = os.path.join(current_dir, 'ml_model', 'chart_cache')
+
+# 데이터 버전과 관계없는 항목 (항목 수 제한으로 지우지 않음)
+PUBLISHED_KEY = 'published'
+WORKER_KEY = 'worker'
+LATEST_KEY = 'latest'
+META_KEYS = (PUBLISHED_KEY, WORKER_KEY, LATEST_KEY)
+
+# 데이터 버전 형식 (data_version, 차트 URL)
+VERSION_PATTERN = r'[0-9a-f]{16}'
+
+
+def data_version(summary):
+    """통계로부터 데이터 버전 (16자리 16진수)"""
+    histogram = summary['risk_histogram']
+    payload = {
+        'render': charts.RENDER_VERSION,
+        'total': summary['total'],
+        'predictions': summary['predictions'],
+        'by_gender': summary['by_gender'],
+        'by_age_decade': summary['by_age_decade'],
+        'avg_age': round(summary['avg_age'], 6),
+        'risk_histogram': None if histogram is None else [histogram[0].tolist(), histogram[1].tolist()],
+    }
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+class ChartCache:
+    """(데이터 버전, 차트, 형식, dpi) → 이미지 바이트, 데이터 버전 → 통계 캐시"""
+
+    def __init__(self, backend='local', max_size=64, ttl=86400, alias='default', directory=DEFAULT_DIRECTORY):
+        if backend not in ('local', 'django', 'files'):
+            raise ValueError(f'지원하지 않는 차트 캐시 백엔드입니다: {backend}')
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self.alias = alias
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    def _django_cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key.replace(':', '_')}.pickle")
+
+    def _file_keys(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name for name in names if name.endswith('.pickle')]
+
+    def _get_file(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires <= time.time():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return value
+
+    def _set_file(self, key, value):
+        # 임시 파일에 쓴 뒤 교체하여 다른 프로세스가 쓰다 만 파일을 읽지 않도록 함
+        os.makedirs(self.directory, exist_ok=True)
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((expires, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        # 최대 항목 수를 넘으면 오래된(마지막 수정 시각) 항목부터 삭제
+        excluded = {os.path.basename(self._path(name)) for name in META_KEYS}
+        names = [name for name in self._file_keys() if name not in excluded]
+        if len(names) > self.max_size:
+            paths = [os.path.join(self.directory, name) for name in names]
+            mtimes = {}
+            for path in paths:
+                try:
+                    mtimes[path] = os.path.getmtime(path)
+                except FileNotFoundError:
+                    pass
+            for path in sorted(mtimes, key=mtimes.get)[:len(mtimes) - self.max_size]:
+                try:
+                    os.remove(path)
+                    self._count('evictions')
+                except FileNotFoundError:
+                    pass
+
+    def _get(self, key):
+        if self.backend == 'django':
+            return self._django_cache().get(f'{KEY_PREFIX}:{key}')
+        if self.backend == 'files':
+            return self._get_file(key)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _set(self, key, value):
+        if self.backend == 'django':
+            self._django_cache().set(f'{KEY_PREFIX}:{key}', value, timeout=self.ttl)
+            return
+        if self.backend == 'files':
+            self._set_file(key, value)
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                oldest = next((name for name in self._entries if name not in META_KEYS), None)
+                if oldest is None:
+                    break
+                del self._entries[oldest]
+                self._stats['evictions'] += 1
+
+    def get_chart(self, version, chart, fmt, dpi):
+        """캐시된 이미지 바이트 또는 None"""
+        image = self._get(f'{version}:{chart}:{dpi}.{fmt}')
+        self._count('misses' if image is None else 'hits')
+        return image
+
+    def set_chart(self, version, chart, fmt, dpi, image):
+        self._set(f'{version}:{chart}:{dpi}.{fmt}', image)
+        self._count('sets')
+
+    def get_summary(self, version):
+        """데이터 버전의 통계 또는 None"""
+        return self._get(f'{version}:summary')
+
+    def set_summary(self, version, summary):
+        self._set(f'{version}:summary', summary)
+
+    def get_latest(self):
+        """시각화 페이지가 마지막으로 계산한 통계의 데이터 버전 또는 None"""
+        return self._get(LATEST_KEY)
+
+    def set_latest(self, version):
+        self._set(LATEST_KEY, version)
+
+    def get_published(self):
+        """마지막으로 게시된 데이터 버전 {'version', 'published_at'} 또는 None"""
+        return self._get(PUBLISHED_KEY)
+
+    def set_published(self, version):
+        """데이터 버전의 차트를 모두 저장한 뒤 호출 - 페이지가 이 버전을 바로 참조할 수 있음을 표시"""
+        self._set(PUBLISHED_KEY, {'version': version, 'published_at': time.time()})
+
+    def get_worker(self):
+        """미리 렌더링 워커의 상태 (마지막 확인 시각, 지표) 또는 None"""
+        return self._get(WORKER_KEY)
+
+    def set_worker(self, info):
+        self._set(WORKER_KEY, info)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend == 'files':
+            for name in self._file_keys():
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        """적중/미적중 횟수와 현재 크기 (django 백엔드의 횟수는 이 프로세스 기준)"""
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+            nbytes = sum(len(value) for value, _ in self._entries.values() if isinstance(value, bytes))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['backend'] = self.backend
+        stats['config'] = {'max_size': self.max_size, 'ttl': self.ttl}
+        if self.backend == 'local':
+            stats['size'] = size
+            stats['bytes'] = nbytes
+        elif self.backend == 'files':
+            stats['size'] = len(self._file_keys())
+            stats['config']['directory'] = self.directory
+        else:
+            stats['config']['alias'] = self.alias
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """설정(settings.CHART_CACHE)에 따른 차트 캐시 (비활성화 시 None)"""
+    global _cache
+    from django.conf import settings
+
+    config = getattr(settings, 'CHART_CACHE', {})
+    if not config.get('ENABLED', True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ChartCache(
+                    backend=config.get('BACKEND', 'local'),
+                    max_size=config.get('MAX_SIZE', 64),
+                    ttl=config.get('TTL', 86400),
+                    alias=config.get('ALIAS', 'default'),
+                    directory=config.get('DIRECTORY', DEFAULT_DIRECTORY),
+                )
+    return _cache
+
+
+def publish_summary(summary):
+    """페이지에서 계산한 통계를 저장하고 데이터 버전 반환 (차트 요청에서 다시 계산하지 않도록)"""
+    version = data_version(summary)
+    cache = get_cache()
+    if cache is not None:
+        if cache.get_summary(version) is None:
+            cache.set_summary(version, summary)
+        if cache.get_latest() != version:
+            cache.set_latest(version)
+    return version
+
+
+def current_version():
+    """통계를 다시 계산하지 않고 캐시로 정한 현재 데이터 버전 (페이지가 참조하는 버전, 모르면 None)"""
+    cache = get_cache()
+    if cache is None:
+        return None
+    latest = cache.get_latest()
+    if latest is not None:
+        return serving_version(latest)
+    published = cache.get_published()
+    return published['version'] if published is not None else None
+
+
+def get_chart(version, chart, fmt, dpi, load_summary):
+    """(이미지 바이트, 데이터 버전) - 캐시에 없으면 데이터 버전의 통계로 렌더링하여 저장
+
+    캐시에 데이터 버전의 통계가 없으면, 캐시로 알 수 있는 현재 데이터 버전(current_version)이 요청한
+    버전과 다를 때 통계를 계산하지 않고 (None, 현재 데이터 버전)을 반환합니다. 현재 버전을 모르거나
+    요청한 버전이 현재 버전이면 load_summary()로 현재 통계를 계산하며, 그 사이 데이터가 바뀌어
+    요청한 버전과 다르면 역시 (None, 현재 데이터 버전)을 반환합니다.
+    """
+    cache = get_cache()
+    image = cache.get_chart(version, chart, fmt, dpi) if cache is not None else None
+    if image is not None:
+        return image, version
+
+    summary = cache.get_summary(version) if cache is not None else None
+    if summary is None:
+        # 알 수 없는 버전의 요청마다 전체 집계를 하지 않도록 캐시된 현재 버전으로 보냄
+        current = current_version()
+        if current is not None and current != version:
+            return None, current
+        summary = load_summary()
+        current = publish_summary(summary)
+        if current != version:
+            return None, current
+
+    image = charts.render(chart, summary, fmt=fmt, dpi=dpi)
+    if cache is not None:
+        cache.set_chart(version, chart, fmt, dpi, image)
+    return image, version
+
+
+def serving_version(version):
+    """페이지에서 참조할 차트의 데이터 버전
+
+    미리 렌더링 워커가 동작 중(STALE_TIMEOUT초 안에 확인 기록이 있음)이고 아직 version의 차트를 게시하지
+    않았으면, 마지막으로 게시된 이전 버전을 반환하여 차트 요청이 렌더링을 기다리지 않도록 합니다.
+    워커가 없거나, 게시된 버전이 없거나, 워커가 version의 렌더링에 실패했으면 version을 반환합니다
+    (차트 요청에서 렌더링).
+    """
+    from django.conf import settings
+
+    cache = get_cache()
+    if cache is None:
+        return version
+    published = cache.get_published()
+    if published is None or published['version'] == version:
+        return version
+    worker = cache.get_worker()
+    stale_timeout = getattr(settings, 'CHART_CACHE', {}).get('STALE_TIMEOUT', 60)
+    if worker is None or time.time() - worker['heartbeat'] > stale_timeout or worker.get('failed') == version:
+        return version
+    return published['version']
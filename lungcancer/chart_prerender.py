@@ -0,0 +1,230 @@
+"""
+시각화 차트 미리 렌더링 (python manage.py prerender_charts)
+
+새 결과가 저장되어 데이터 버전이 바뀌면, 캐시가 있어도 새 버전의 첫 차트 요청은 웹 워커 안에서 차트를
+렌더링합니다. 이 모듈은 요청과 별도로 현재 통계의 데이터 버전을 확인하고, 아직 게시되지 않은 버전이면
+차트를 모두 렌더링해 차트 캐시에 저장한 뒤 게시 버전을 바꿉니다 (chart_cache.set_published).
+차트를 모두 저장한 뒤에 게시하므로 페이지는 항상 완성된 차트 묶음(새 버전 또는 직전 버전)을 참조합니다
+(chart_cache.serving_version).
+
+- 렌더링은 프로세스 풀(jobs)에서 차트 단위로 실행하며, 동시에 실행되는 렌더링 수는 jobs개로 제한됩니다.
+  jobs가 1이면 현재 프로세스에서 순서대로 렌더링합니다.
+- 차트별 렌더링 시간(횟수, 합계, 최대, 마지막)과 게시/실패 횟수를 지표로 모아 워커 상태와 함께 차트 캐시에
+  기록합니다 (prerender_charts status로 확인, serving_version은 마지막 확인 시각으로 워커 동작 여부를 판단).
+- 웹 서버와 다른 프로세스에서 실행하므로 차트 캐시가 프로세스 간에 공유되어야 합니다
+  (CHART_CACHE['BACKEND'] = 'files', 또는 공유 CACHES를 쓰는 'django').
+- 로컬 모드(CHART_CACHE['PRERENDER'] = 'local'): 별도 프로세스 없이 웹 프로세스의 백그라운드 스레드가
+  시각화 페이지에서 계산한 통계로 렌더링합니다. local 백엔드에서도 동작하므로 개발 서버와 테스트용입니다.
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from concurrent import futures
+
+from . import chart_cache, charts
+
+logger = logging.getLogger(__name__)
+
+
+# 데이터 버전 확인 간격(초)
+DEFAULT_INTERVAL = 5.0
+
+
+def _init_worker():
+    # 워커 프로세스마다 폰트/스타일을 한 번 적용
+    charts.initialize()
+
+
+def _render(chart, summary, fmt, dpi):
+    """(이미지 바이트, 렌더링 시간(초))"""
+    start = time.perf_counter()
+    image = charts.render(chart, summary, fmt=fmt, dpi=dpi)
+    return image, time.perf_counter() - start
+
+
+class Prerenderer:
+    """데이터 버전의 차트를 모두 렌더링하여 차트 캐시에 저장하고 게시 - jobs > 1이면 프로세스 풀에서 렌더링"""
+
+    def __init__(self, cache, formats=('png',), dpis=(charts.DEFAULT_DPI,), jobs=1, mode='daemon'):
+        self.cache = cache
+        self.formats = tuple(formats)
+        self.dpis = tuple(dpis)
+        self.jobs = jobs
+        self.mode = mode
+        # 렌더링에 실패한 데이터 버전 (데이터가 바뀔 때까지 다시 시도하지 않고 차트 요청에서 렌더링)
+        self.failed = None
+        self.metrics = {
+            'started_at': time.time(),
+            'checks': 0,
+            'published': 0,
+            'failures': 0,
+            'last_version': None,
+            'last_published_at': None,
+            'last_duration': None,
+            'last_error': None,
+            'renders': {},
+        }
+        self.pool = None
+        if jobs > 1:
+            self.pool = futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker)
+
+    def _submit(self, chart, summary, fmt, dpi):
+        if self.pool is not None:
+            return self.pool.submit(_render, chart, summary, fmt, dpi)
+        future = futures.Future()
+        try:
+            future.set_result(_render(chart, summary, fmt, dpi))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _record(self, name, seconds):
+        entry = self.metrics['renders'].setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+        entry['count'] += 1
+        entry['total'] += seconds
+        entry['max'] = max(entry['max'], seconds)
+        entry['last'] = seconds
+
+    def publish(self, summary, version=None):
+        """summary의 차트를 모두 렌더링해 저장한 뒤 게시하고 데이터 버전 반환 (렌더링 실패 시 예외, 게시하지 않음)"""
+        version = version or chart_cache.data_version(summary)
+        start = time.perf_counter()
+        # 이미 캐시에 있는 차트(예: 데이터가 이전 버전으로 돌아간 경우)는 다시 렌더링하지 않음
+        tasks = [
+            (chart, fmt, dpi) for chart in charts.CHARTS for fmt in self.formats for dpi in self.dpis
+            if self.cache.get_chart(version, chart, fmt, dpi) is None
+        ]
+        try:
+            pending = [(task, self._submit(task[0], summary, task[1], task[2])) for task in tasks]
+            rendered = [(task, future.result()) for task, future in pending]
+        except Exception as e:
+            self.failed = version
+            self.metrics['failures'] += 1
+            self.metrics['last_error'] = f'{version}: {e}'
+            raise
+
+        self.cache.set_summary(version, summary)
+        for (chart, fmt, dpi), (image, seconds) in rendered:
+            self.cache.set_chart(version, chart, fmt, dpi, image)
+            self._record(f'{chart}.{fmt}', seconds)
+        # 모든 차트를 저장한 뒤 게시 버전을 바꿈
+        self.cache.set_published(version)
+
+        self.failed = None
+        self.metrics['published'] += 1
+        self.metrics['last_version'] = version
+        self.metrics['last_published_at'] = time.time()
+        self.metrics['last_duration'] = time.perf_counter() - start
+        return version
+
+    def check(self, summary):
+        """현재 통계의 데이터 버전이 게시되지 않았으면 렌더링하여 게시 - 게시한 데이터 버전 또는 None"""
+        self.metrics['checks'] += 1
+        try:
+            if summary is None or summary['total'] == 0:
+                return None
+            version = chart_cache.data_version(summary)
+            published = self.cache.get_published()
+            if version == self.failed or (published is not None and published['version'] == version):
+                return None
+            return self.publish(summary, version)
+        finally:
+            self.heartbeat()
+
+    def heartbeat(self):
+        """워커 상태 기록 (serving_version이 마지막 확인 시각으로 워커 동작 여부를 판단)"""
+        self.cache.set_worker({
+            'heartbeat': time.time(),
+            'pid': os.getpid(),
+            'mode': self.mode,
+            'jobs': self.jobs,
+            'failed': self.failed,
+            'metrics': copy.deepcopy(self.metrics),
+        })
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def run(prerenderer, load_summary, interval=DEFAULT_INTERVAL, stop=None, once=False):
+    """interval초마다 load_summary()로 현재 통계를 확인하여 새 데이터 버전의 차트를 게시 (stop이 설정되면 종료)"""
+    from django.db import close_old_connections
+
+    stop = stop or threading.Event()
+    while True:
+        # 오래 실행되는 프로세스이므로 끊어진 데이터베이스 연결을 정리
+        close_old_connections()
+        try:
+            version = prerenderer.check(load_summary())
+            if version is not None:
+                logger.info(f"차트 게시: {version} ({prerenderer.metrics['last_duration']:.2f}s)")
+        except Exception as e:
+            logger.warning(f"차트 미리 렌더링 실패: {e}")
+            prerenderer.heartbeat()
+        if once or stop.wait(interval):
+            break
+
+
+class LocalWorker(threading.Thread):
+    """로컬 모드의 백그라운드 렌더링 스레드 - notify로 받은 가장 최근 통계를 렌더링하여 게시"""
+
+    def __init__(self, prerenderer, interval=DEFAULT_INTERVAL):
+        super().__init__(name='chart-prerender', daemon=True)
+        self.prerenderer = prerenderer
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = None
+
+    def notify(self, summary):
+        with self._lock:
+            self._pending = summary
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            with self._lock:
+                self._wakeup.clear()
+                summary, self._pending = self._pending, None
+            try:
+                if summary is not None:
+                    self.prerenderer.check(summary)
+                else:
+                    self.prerenderer.heartbeat()
+            except Exception as e:
+                logger.warning(f"차트 미리 렌더링 실패: {e}")
+
+
+_local_worker = None
+_local_lock = threading.Lock()
+
+
+def notify(summary):
+    """시각화 페이지에서 계산한 통계 전달 - 로컬 모드이면 백그라운드 스레드가 렌더링 (아니면 아무것도 하지 않음)"""
+    global _local_worker
+    from django.conf import settings
+
+    config = getattr(settings, 'CHART_CACHE', {})
+    if config.get('PRERENDER') != 'local':
+        return
+    cache = chart_cache.get_cache()
+    if cache is None:
+        return
+    if _local_worker is None:
+        with _local_lock:
+            if _local_worker is None:
+                prerenderer = Prerenderer(
+                    cache,
+                    formats=config.get('PRERENDER_FORMATS', ('png',)),
+                    dpis=config.get('PRERENDER_DPI', (charts.DEFAULT_DPI,)),
+                    mode='local',
+                )
+                worker = LocalWorker(prerenderer)
+                worker.start()
+                _local_worker = worker
+    _local_worker.notify(summary)
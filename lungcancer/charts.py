@@ -0,0 +1,195 @@
+"""
+시각화 페이지 차트 렌더링 (matplotlib)
+
+summary는 result_stats.result_statistics / result_rollup.statistics 형식의 통계이며,
+차트 이미지는 summary만으로 결정됩니다 (chart_cache가 이를 이용해 캐시 키를 만듦).
+
+- 한글 폰트와 스타일(rcParams)은 프로세스당 한 번만 결정하여 적용합니다 (initialize).
+  이후에는 rcParams를 바꾸지 않으므로 여러 스레드가 동시에 읽어도 안전합니다.
+- 차트마다 pyplot 전역 상태(현재 Figure) 대신 독립된 Figure 객체를 만들어 그리므로, 여러 스레드에서
+  동시에 render를 호출할 수 있습니다 (matplotlib은 FreeType 폰트 객체를 스레드별로 캐시함).
+"""
+
+import logging
+import threading
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+
+# 차트 이름 (URL에 사용)
+CHARTS = ('predictions', 'gender', 'age', 'risk')
+
+# 이미지 형식별 Content-Type
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# 허용하는 해상도 (캐시 항목 수를 제한하기 위해 고정된 값만 허용)
+DEFAULT_DPI = 100
+DPI_CHOICES = (50, 100, 150, 200)
+
+# 차트 모양(렌더링 코드)을 바꾸면 올려서 이전에 캐시된 이미지(브라우저 포함)를 무효화
+RENDER_VERSION = 2
+
+# 한글 폰트 후보 (우선순위 순) - 설치된 첫 번째 폰트를 사용하고, 그 폰트에 없는 글자는 FALLBACK_FONT로 표시
+KOREAN_FONTS = (
+    'NanumGothic',
+    'Apple SD Gothic Neo',
+    'AppleGothic',
+    'Malgun Gothic',
+    'Noto Sans CJK KR',
+    'Noto Sans KR',
+    'Arial Unicode MS',
+)
+FALLBACK_FONT = 'DejaVu Sans'
+
+_style = None
+_style_lock = threading.Lock()
+
+
+def resolve_style():
+    """설치된 폰트 목록에서 한글 폰트를 찾아 차트 스타일(rcParams 값) 구성"""
+    from matplotlib import font_manager
+
+    available = {font.name for font in font_manager.fontManager.ttflist}
+    korean = [name for name in KOREAN_FONTS if name in available][:1]
+    return {
+        'font.family': korean + [FALLBACK_FONT],
+        'font.size': 10,
+        # 유니코드 마이너스 기호 대신 '-' 사용 (한글 폰트에 없는 경우가 많음)
+        'axes.unicode_minus': False,
+        # SVG 요소 id를 고정된 값으로 생성 (같은 통계 → 같은 이미지)
+        'svg.hashsalt': 'lungcancer',
+    }
+
+
+def initialize():
+    """폰트와 스타일을 프로세스당 한 번 적용하고 반환 (여러 스레드에서 동시에 호출해도 한 번만 실행)"""
+    global _style
+    if _style is None:
+        with _style_lock:
+            if _style is None:
+                import matplotlib
+
+                style = resolve_style()
+                matplotlib.rcParams.update(style)
+                _style = style
+                logger.info(f"차트 폰트 설정: {', '.join(style['font.family'])}")
+    return _style
+
+
+def _predictions_chart(fig, summary):
+    """1. 예측 결과 분포 (파이 차트)"""
+    ax = fig.subplots()
+    # 건수가 많은 순서 (0건인 결과는 제외)
+    prediction_counts = sorted(
+        ((label, n) for label, n in summary['predictions'].items() if n > 0), key=lambda item: -item[1]
+    )
+
+    if len(prediction_counts) > 0:
+        colors = ['#ff6b6b' if idx == 'YES' else '#51cf66' for idx, _ in prediction_counts]
+        labels = ['폐암 양성' if idx == 'YES' else '폐암 음성' for idx, _ in prediction_counts]
+        ax.pie([n for _, n in prediction_counts], labels=labels,
+               autopct='%1.1f%%', startangle=90, colors=colors)
+    else:
+        # 데이터가 없을 때 빈 차트 표시
+        ax.text(0.5, 0.5, '데이터가 없습니다', ha='center', va='center',
+                transform=ax.transAxes, fontsize=14)
+
+    ax.set_title('폐암 예측 결과 분포', fontsize=16, fontweight='bold')
+
+
+def _grouped_bars(ax, groups, width=0.35):
+    """그룹별 음성/양성 막대를 나란히 그리고 (음성 막대, 양성 막대) 반환"""
+    x_pos = range(len(groups))
+    negative = ax.bar([x - width/2 for x in x_pos], [counts['NO'] for counts in groups.values()], width,
+                      label='음성', color='#51cf66', alpha=0.8)
+    positive = ax.bar([x + width/2 for x in x_pos], [counts['YES'] for counts in groups.values()], width,
+                      label='양성', color='#ff6b6b', alpha=0.8)
+    ax.set_xticks(x_pos)
+    ax.set_ylabel('환자 수', fontsize=12)
+    ax.legend(loc='upper right')
+    return negative, positive
+
+
+def _gender_chart(fig, summary):
+    """2. 성별 폐암 예측 분포 (바 차트)"""
+    ax = fig.subplots()
+
+    # 성별(남성/여성) x 예측 결과(NO, YES) 건수
+    gender_prediction = summary['by_gender']
+    bars = _grouped_bars(ax, gender_prediction)
+
+    # 막대 위에 값 표시
+    for bar in (bar for group in bars for bar in group):
+        height = bar.get_height()
+        if height > 0:
+            ax.text(bar.get_x() + bar.get_width()/2., height + 0.05,
+                    f'{int(height)}', ha='center', va='bottom', fontweight='bold')
+
+    ax.set_title('성별 폐암 예측 분포', fontsize=16, fontweight='bold')
+    ax.set_xlabel('성별', fontsize=12)
+    ax.set_xticklabels(list(gender_prediction))
+
+
+def _age_chart(fig, summary):
+    """3. 연령대별 폐암 예측 분포 (바 차트)"""
+    ax = fig.subplots()
+
+    # 연령 10단위(20대, 30대, ...) x 예측 결과(NO, YES) 건수
+    age_prediction = summary['by_age_decade']
+    _grouped_bars(ax, age_prediction)
+
+    ax.set_title('연령대별 폐암 예측 분포', fontsize=16, fontweight='bold')
+    ax.set_xlabel('연령대', fontsize=12)
+    ax.set_xticklabels([f"{int(x)}대" for x in age_prediction])
+
+
+def _risk_chart(fig, summary):
+    """4. 위험도 분포 (히스토그램)"""
+    ax = fig.subplots()
+
+    if summary['risk_histogram'] is None:
+        # 결과가 모두 삭제된 경우 빈 차트 표시
+        ax.text(0.5, 0.5, '데이터가 없습니다', ha='center', va='center',
+                transform=ax.transAxes, fontsize=14)
+        ax.set_title('폐암 위험도 분포', fontsize=16, fontweight='bold')
+        return
+
+    # 위험 점수(%) 구간별 건수 (데이터베이스에서 값별로 센 결과로 계산한 히스토그램)
+    risk_counts, risk_edges = summary['risk_histogram']
+
+    ax.hist(risk_edges[:-1], bins=risk_edges, weights=risk_counts, color='#339af0', edgecolor='black', alpha=0.7)
+    ax.axvline(x=50, color='red', linestyle='--', linewidth=2, label='기준선 (50%)')
+    ax.set_title('폐암 위험도 분포', fontsize=16, fontweight='bold')
+    ax.set_xlabel('위험도 (%)', fontsize=12)
+    ax.set_ylabel('환자 수', fontsize=12)
+    ax.legend()
+
+
+# 차트별 (그리기 함수, 그림 크기)
+_CHARTS = {
+    'predictions': (_predictions_chart, (8, 6)),
+    'gender': (_gender_chart, (10, 6)),
+    'age': (_age_chart, (10, 6)),
+    'risk': (_risk_chart, (10, 6)),
+}
+
+
+def render(chart, summary, fmt='png', dpi=DEFAULT_DPI):
+    """차트 이미지 바이트 (fmt: FORMATS의 키)"""
+    from matplotlib.figure import Figure
+
+    initialize()
+    draw, figsize = _CHARTS[chart]
+    fig = Figure(figsize=figsize)
+    draw(fig, summary)
+    # 여백 조정은 한 번만 (layout='tight'로 두면 savefig의 그리기마다 다시 계산됨)
+    fig.tight_layout()
+    buffer = BytesIO()
+    # SVG에 생성 시각을 넣지 않음 (같은 통계 → 같은 이미지)
+    metadata = {'Date': None} if fmt == 'svg' else None
+    fig.savefig(buffer, format=fmt, dpi=dpi, metadata=metadata)
+    return buffer.getvalue()
@@ -0,0 +1,90 @@
+"""
+노드 테이블 압축 (정수 임계값 + 중복 서브트리 공유 + 불필요한 분할 제거)
+
+입력 특성은 모두 정수(AGE)이거나 이진값이므로, 정수 x에 대해 x <= t 는 x <= floor(t) 와 같습니다.
+
+1. 임계값 정수화: 분할 임계값을 floor(t)로 바꿔 정수 배열로 저장합니다.
+2. 중복 서브트리 공유: 각 트리를 아래에서부터 (특성, 정수 임계값, 왼쪽 자식, 오른쪽 자식) 또는
+   리프 값으로 식별하여, 구조와 값이 같은 서브트리는 모든 트리가 노드 풀의 한 항목을 함께 사용합니다
+   (자식 번호는 풀 전체 기준).
+3. 분할 제거: 두 자식이 같은 서브트리이면(예: 양쪽 모두 같은 확률의 순수 리프) 어느 쪽으로 가도
+   같은 리프 값에 도달하여 예측 클래스와 확률이 바뀌지 않으므로 분할을 자식으로 대체합니다.
+
+리프 값은 그대로이므로 정수 입력에 대한 확률과 라벨은 원래 노드 테이블과 비트 단위로 같습니다.
+압축된 노드 테이블은 정수가 아닌 입력을 거부합니다 (FlatForest._validate).
+공유된 분할 노드의 값(설명 기여도 계산용)은 처음 만난 서브트리의 값을 사용하므로, 기여도는
+원래 트리와 조금 다를 수 있지만 기준값 + 기여도 합은 항상 양성 확률과 같습니다.
+"""
+
+import numpy as np
+
+from .inference import FlatForest
+
+
+def compress_forest(forest):
+    """(압축된 FlatForest, 통계) - forest는 압축되지 않은 노드 테이블
+
+    통계: {'nodes_before', 'nodes_after', 'shared_subtrees', 'pruned_splits'}
+    """
+    if forest.pooled:
+        raise ValueError('이미 압축된 노드 테이블입니다.')
+
+    feature = np.asarray(forest.feature, dtype=np.intp)
+    threshold = np.floor(np.asarray(forest.threshold, dtype=np.float64)).astype(np.int64)
+    left = np.asarray(forest.left, dtype=np.intp)
+    right = np.asarray(forest.right, dtype=np.intp)
+    value = np.asarray(forest.value)
+
+    pool = {}
+    pool_feature, pool_threshold, pool_left, pool_right, pool_value, pool_depth = [], [], [], [], [], []
+    stats = {'nodes_before': int(forest.n_nodes), 'shared_subtrees': 0, 'pruned_splits': 0}
+
+    def intern(key, split_feature, split_threshold, left_id, right_id, leaf_value, depth):
+        node = pool.get(key)
+        if node is not None:
+            stats['shared_subtrees'] += 1
+            return node
+        node = len(pool_feature)
+        pool[key] = node
+        pool_feature.append(split_feature)
+        pool_threshold.append(split_threshold)
+        # 리프는 자기 자신을 가리킴 (고정 횟수 순회)
+        pool_left.append(node if left_id is None else left_id)
+        pool_right.append(node if right_id is None else right_id)
+        pool_value.append(leaf_value)
+        pool_depth.append(depth)
+        return node
+
+    def build(node, root):
+        # node: 전체 노드 번호 (자식 번호는 root 기준 트리 내부 번호)
+        if left[node] == node - root:
+            return intern(('leaf', value[node].tobytes()), 0, 0, None, None, value[node], 0)
+
+        f, t = int(feature[node]), int(threshold[node])
+        left_id = build(root + left[node], root)
+        right_id = build(root + right[node], root)
+        if left_id == right_id:
+            stats['pruned_splits'] += 1
+            return left_id
+        depth = 1 + max(pool_depth[left_id], pool_depth[right_id])
+        return intern(('split', f, t, left_id, right_id), f, t, left_id, right_id, value[node], depth)
+
+    roots = [build(root, root) for root in np.asarray(forest.roots, dtype=np.intp)]
+
+    stats['nodes_after'] = len(pool_feature)
+    compressed = FlatForest(
+        feature=np.array(pool_feature, dtype=np.intp),
+        threshold=np.array(pool_threshold, dtype=np.int64),
+        left=np.array(pool_left, dtype=np.intp),
+        right=np.array(pool_right, dtype=np.intp),
+        value=np.array(pool_value, dtype=value.dtype),
+        roots=np.array(roots, dtype=np.intp),
+        classes=forest.classes,
+        max_depth=max(pool_depth[node] for node in roots),
+        n_features=forest.n_features,
+        feature_names=forest.feature_names,
+        aggregation=forest.aggregation,
+        baseline=forest.baseline,
+        pooled=True,
+    )
+    return compressed, stats
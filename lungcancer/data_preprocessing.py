@@ -1,11 +1,23 @@
 """
 폐암 데이터 전처리 및 탐색적 데이터 분석 (EDA)
+
+- load_and_explore_data ~ split_and_scale_data: 단계별 결과를 출력하는 탐색용 함수 (--eda)
+- run_pipeline: 같은 전처리를 캐시되는 단계(load → clean → split → scale)로 실행
+
+파이프라인의 각 단계는 (단계 이름, 입력 단계의 키, 파라미터)의 해시를 키로 하여
+ml_model/preprocess_cache/<단계>-<키>/ 에 결과를 .npy로 저장하고, 다음 실행부터는
+메모리 매핑으로 엽니다. 첫 단계의 입력 키는 CSV 파일 내용의 해시이므로, CSV나 파라미터가
+바뀐 단계와 그 뒤 단계만 다시 실행됩니다.
+chunksize를 주면 CSV를 청크 단위로 읽고, 중복 행은 전체 DataFrame의 df.duplicated() 대신
+행 해시(행당 8바이트)로 찾으므로 메모리보다 큰 CSV도 처리할 수 있습니다.
 """
 
+import hashlib
+import json
+import shutil
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import os
@@ -205,6 +217,339 @@ def split_and_scale_data(df, test_size=0.2, random_state=42):
     
     return X_train, X_test, y_train, y_test, X.columns.tolist()
 
+# ---------------------------------------------------------------------------
+# 캐시되는 전처리 파이프라인
+# ---------------------------------------------------------------------------
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(os.path.dirname(current_dir), 'survey lung cancer.csv')
+CACHE_ROOT = os.path.join(current_dir, 'ml_model', 'preprocess_cache')
+
+# 단계 구현이 바뀌면 올려서 이전 캐시를 무효화
+PIPELINE_VERSION = 1
+
+TARGET = 'LUNG_CANCER'
+
+# 문자열 열의 인코딩 (preprocess_data와 동일)
+CATEGORY_CODES = {
+    'GENDER': {'M': 1, 'F': 0},
+    'LUNG_CANCER': {'YES': 1, 'NO': 0},
+}
+
+# 정수 행렬에서 결측치를 나타내는 값
+MISSING = -1
+
+# 메모리 매핑 배열을 처리하는 행 단위
+ROW_CHUNK = 100000
+
+
+class StageCache:
+    """단계 하나의 결과 디렉터리 (arrays: .npy 파일들, meta: meta.json)"""
+
+    def __init__(self, cache_root, stage, key):
+        self.stage = stage
+        self.key = key
+        self.directory = os.path.join(cache_root, f'{stage}-{key[:16]}')
+
+    @classmethod
+    def for_inputs(cls, cache_root, stage, input_key, params=None):
+        payload = json.dumps(
+            {'stage': stage, 'version': PIPELINE_VERSION, 'input': input_key, 'params': params or {}},
+            sort_keys=True,
+        )
+        return cls(cache_root, stage, hashlib.sha256(payload.encode()).hexdigest())
+
+    @property
+    def ready(self):
+        return os.path.exists(os.path.join(self.directory, 'meta.json'))
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.npy')
+
+    def begin(self):
+        """결과를 쓸 임시 디렉터리 (commit 전까지는 캐시로 인식되지 않음)"""
+        self.tmp_dir = f'{self.directory}.tmp-{os.getpid()}'
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        return self.tmp_dir
+
+    def commit(self, meta):
+        with open(os.path.join(self.tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.rename(self.tmp_dir, self.directory)
+
+    def meta(self):
+        with open(os.path.join(self.directory, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, name):
+        return np.load(self.path(name), mmap_mode='r')
+
+
+def file_content_key(path, cache_root=CACHE_ROOT):
+    """CSV 내용의 sha256 (파일 크기/수정 시각이 같으면 이전에 계산한 값을 재사용)"""
+    stat = os.stat(path)
+    stamp = f'{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    index_path = os.path.join(cache_root, 'content_hashes.json')
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        index = {}
+    if stamp in index:
+        return index[stamp]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    index[stamp] = digest.hexdigest()
+    os.makedirs(cache_root, exist_ok=True)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return index[stamp]
+
+
+def _count_csv_rows(path):
+    """헤더를 제외한 줄 수 (결과 배열 크기 상한)"""
+    count = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            count += block.count(b'\n')
+            last = block[-1:]
+    return count - 1 + (last != b'\n')
+
+
+def _encode_chunk(chunk):
+    """CSV 청크 → int16 행렬 (문자열 열은 CATEGORY_CODES로 변환, 결측치는 MISSING)"""
+    encoded = np.empty(chunk.shape, dtype=np.int16)
+    for j, column in enumerate(chunk.columns):
+        values = chunk[column]
+        if column in CATEGORY_CODES:
+            values = values.map(CATEGORY_CODES[column])
+        encoded[:, j] = values.fillna(MISSING).to_numpy(dtype=np.int16)
+    return encoded
+
+
+def stage_load(csv_path, cache_root, chunksize=None):
+    """CSV를 읽어 인코딩된 int16 행렬(data.npy)로 저장"""
+    cache = StageCache.for_inputs(cache_root, 'load', file_content_key(csv_path, cache_root))
+    if cache.ready:
+        return cache, False
+
+    tmp_dir = cache.begin()
+    chunks = pd.read_csv(csv_path, chunksize=chunksize) if chunksize else [pd.read_csv(csv_path)]
+    data = None
+    filled = 0
+    missing = None
+    for chunk in chunks:
+        if data is None:
+            columns = chunk.columns.tolist()
+            n_rows = _count_csv_rows(csv_path) if chunksize else len(chunk)
+            data = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, 'data.npy'), mode='w+', dtype=np.int16, shape=(n_rows, len(columns)),
+            )
+            missing = np.zeros(len(columns), dtype=np.int64)
+        encoded = _encode_chunk(chunk)
+        data[filled:filled + len(encoded)] = encoded
+        missing += (encoded == MISSING).sum(axis=0)
+        filled += len(encoded)
+    data.flush()
+    del data
+
+    # 빈 줄은 줄 수에는 포함되지만 읽히지 않으므로 실제 행 수를 함께 저장
+    cache.commit({'columns': columns, 'n_rows': filled, 'missing': dict(zip(columns, missing.tolist()))})
+    return cache, True
+
+
+def row_hashes(block):
+    """int16 행렬의 행별 64비트 해시 (FNV-1a + splitmix64 마무리)"""
+    words = np.ascontiguousarray(block).view(np.uint16).astype(np.uint64)
+    h = np.full(len(block), 0xcbf29ce484222325, dtype=np.uint64)
+    for j in range(words.shape[1]):
+        h ^= words[:, j]
+        h *= np.uint64(0x100000001b3)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xff51afd7ed558ccd)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xc4ceb9fe1a85ec53)
+    h ^= h >> np.uint64(33)
+    return h
+
+
+def _fill_values(data, keep, columns):
+    """결측치 대체값: 문자열 열은 최빈값, 수치 열은 중앙값 (정수 히스토그램으로 청크 단위 계산)"""
+    counts = [np.zeros(0, dtype=np.int64) for _ in columns]
+    for start in range(0, len(keep), ROW_CHUNK):
+        block = data[keep[start:start + ROW_CHUNK]]
+        for j in range(len(columns)):
+            values = block[:, j]
+            values = values[values != MISSING].astype(np.int64)
+            if len(values) == 0:
+                continue
+            # 값의 범위가 작으므로 (음수 제외) bincount로 누적
+            hist = np.bincount(values, minlength=len(counts[j]))
+            counts[j] = np.pad(counts[j], (0, len(hist) - len(counts[j]))) + hist
+
+    fill = {}
+    for j, column in enumerate(columns):
+        hist = counts[j]
+        if hist.sum() == 0:
+            continue
+        if column in CATEGORY_CODES:
+            fill[column] = int(hist.argmax())
+        else:
+            # 짝수 개일 때는 두 중앙값 중 작은 값 (정수 행렬 유지)
+            fill[column] = int(np.searchsorted(np.cumsum(hist), (hist.sum() + 1) // 2))
+    return fill
+
+
+def stage_clean(load, cache_root):
+    """중복 행 제거(행 해시, 첫 행 유지)와 결측치 대체"""
+    cache = StageCache.for_inputs(cache_root, 'clean', load.key)
+    if cache.ready:
+        return cache, False
+
+    meta = load.meta()
+    columns = meta['columns']
+    data = load.load('data')[:meta['n_rows']]
+
+    hashes = np.empty(len(data), dtype=np.uint64)
+    for start in range(0, len(data), ROW_CHUNK):
+        hashes[start:start + ROW_CHUNK] = row_hashes(data[start:start + ROW_CHUNK])
+    # 해시별 첫 등장 위치 (원래 순서 유지 = drop_duplicates(keep='first'))
+    _, first = np.unique(hashes, return_index=True)
+    keep = np.sort(first)
+    del hashes
+
+    fill = {}
+    if any(meta['missing'].values()):
+        fill = {
+            column: value for column, value in _fill_values(data, keep, columns).items()
+            if meta['missing'][column]
+        }
+
+    tmp_dir = cache.begin()
+    out = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, 'data.npy'), mode='w+', dtype=np.int16, shape=(len(keep), len(columns)),
+    )
+    for start in range(0, len(keep), ROW_CHUNK):
+        block = data[keep[start:start + ROW_CHUNK]]
+        for j, column in enumerate(columns):
+            if column in fill:
+                block[block[:, j] == MISSING, j] = fill[column]
+        out[start:start + len(block)] = block
+    out.flush()
+    del out
+
+    cache.commit({
+        'columns': columns,
+        'n_rows': int(len(keep)),
+        'removed_duplicates': int(meta['n_rows'] - len(keep)),
+        'fill_values': fill,
+    })
+    return cache, True
+
+
+def stage_split(clean, cache_root, test_size=0.2, random_state=42):
+    """층화 학습/테스트 분할 인덱스 (train_index.npy, test_index.npy)"""
+    params = {'test_size': test_size, 'random_state': random_state}
+    cache = StageCache.for_inputs(cache_root, 'split', clean.key, params)
+    if cache.ready:
+        return cache, False
+
+    columns = clean.meta()['columns']
+    y = np.asarray(clean.load('data')[:, columns.index(TARGET)])
+    train_index, test_index = train_test_split(
+        np.arange(len(y)), test_size=test_size, random_state=random_state, stratify=y,
+    )
+
+    tmp_dir = cache.begin()
+    np.save(os.path.join(tmp_dir, 'train_index.npy'), train_index)
+    np.save(os.path.join(tmp_dir, 'test_index.npy'), test_index)
+    cache.commit({'n_train': int(len(train_index)), 'n_test': int(len(test_index))})
+    return cache, True
+
+
+def stage_scale(clean, split, cache_root):
+    """학습 세트로 StandardScaler를 청크 단위 partial_fit 후 학습/테스트 특성을 float32로 변환"""
+    cache = StageCache.for_inputs(cache_root, 'scale', split.key, {'clean': clean.key})
+    if cache.ready:
+        return cache, False
+
+    columns = clean.meta()['columns']
+    features = [j for j, column in enumerate(columns) if column != TARGET]
+    data = clean.load('data')
+
+    scaler = StandardScaler()
+    train_index = split.load('train_index')
+    for start in range(0, len(train_index), ROW_CHUNK):
+        scaler.partial_fit(data[np.sort(train_index[start:start + ROW_CHUNK])][:, features])
+
+    tmp_dir = cache.begin()
+    for name in ('train', 'test'):
+        index = split.load(f'{name}_index')
+        out = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, f'X_{name}_scaled.npy'), mode='w+', dtype=np.float32,
+            shape=(len(index), len(features)),
+        )
+        for start in range(0, len(index), ROW_CHUNK):
+            out[start:start + ROW_CHUNK] = scaler.transform(data[index[start:start + ROW_CHUNK]][:, features])
+        out.flush()
+        del out
+    np.save(os.path.join(tmp_dir, 'mean.npy'), scaler.mean_)
+    np.save(os.path.join(tmp_dir, 'scale.npy'), scaler.scale_)
+    cache.commit({'feature_names': [columns[j] for j in features]})
+    return cache, True
+
+
+def run_pipeline(csv_path=DEFAULT_CSV, cache_root=CACHE_ROOT, chunksize=None, test_size=0.2,
+                 random_state=42, verbose=False):
+    """캐시된 단계는 건너뛰고 전처리 파이프라인 실행
+
+    {'feature_names', 'X', 'y', 'X_train', 'X_test', 'y_train', 'y_test',
+     'X_train_scaled', 'X_test_scaled', 'mean', 'scale', 'stages'} 를 반환합니다.
+    X/y 및 scaled 배열은 캐시 파일의 메모리 매핑(읽기 전용)이고, 분할된 X_train 등은
+    split_and_scale_data와 같은 순서의 배열입니다. stages는 {단계: 'ran' | 'cached'}.
+    """
+    stages = {}
+
+    def record(name, result):
+        cache, ran = result
+        stages[name] = 'ran' if ran else 'cached'
+        if verbose:
+            print(f"  {name:<6} {'실행' if ran else '캐시 사용'}  ({cache.directory})")
+        return cache
+
+    load = record('load', stage_load(csv_path, cache_root, chunksize=chunksize))
+    clean = record('clean', stage_clean(load, cache_root))
+    split = record('split', stage_split(clean, cache_root, test_size=test_size, random_state=random_state))
+    scale = record('scale', stage_scale(clean, split, cache_root))
+
+    columns = clean.meta()['columns']
+    features = [j for j, column in enumerate(columns) if column != TARGET]
+    data = clean.load('data')
+    X = data[:, features]
+    y = data[:, columns.index(TARGET)]
+    train_index = split.load('train_index')
+    test_index = split.load('test_index')
+    return {
+        'feature_names': [columns[j] for j in features],
+        'X': X,
+        'y': y,
+        'X_train': X[train_index],
+        'X_test': X[test_index],
+        'y_train': y[train_index],
+        'y_test': y[test_index],
+        'X_train_scaled': scale.load('X_train_scaled'),
+        'X_test_scaled': scale.load('X_test_scaled'),
+        'mean': scale.load('mean'),
+        'scale': scale.load('scale'),
+        'stages': stages,
+    }
+
 def main():
     """전체 전처리 파이프라인 실행"""
     
@@ -241,5 +586,22 @@ def main():
     return df_processed, X_train, X_test, y_train, y_test, feature_names
 
 if __name__ == '__main__':
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='폐암 데이터 전처리')
+    parser.add_argument('--eda', action='store_true', help='단계별 탐색 결과를 출력하는 기존 전처리 실행')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='입력 CSV 경로')
+    parser.add_argument('--chunksize', type=int, default=None, help='CSV를 이 행 수 단위로 나누어 읽기')
+    parser.add_argument('--cache-dir', default=CACHE_ROOT, help='단계별 결과 캐시 디렉터리')
+    args = parser.parse_args()
+    
+    if args.eda:
+        main()
+    else:
+        import time
+        
+        started = time.perf_counter()
+        result = run_pipeline(args.csv, cache_root=args.cache_dir, chunksize=args.chunksize, verbose=True)
+        print(f"전처리 완료: 학습 {result['X_train'].shape}, 테스트 {result['X_test'].shape} "
+              f"({time.perf_counter() - started:.2f}초)")
 
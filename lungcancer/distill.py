@@ -0,0 +1,246 @@
+"""
+지식 증류 (작은 학생 모델)
+
+입력 공간은 성별 + 13개 이진 증상 (2^14가지)과 나이뿐이므로, 교사 포레스트가 사용하는
+나이 임계값으로 나이를 구간화하면 (나이 구간, 이진 특성 조합) 전체를 열거할 수 있습니다
+(risk_table과 같은 방식). 열거한 모든 셀에서 교사 모델의 양성 확률을 구하고,
+이를 소프트 라벨로 하여 깊이가 제한된 결정 트리 하나를 학습합니다.
+
+- 각 셀을 (음성, 가중치 1-p) / (양성, 가중치 p) 두 행으로 넣으면 리프 값이 셀 확률의
+  가중 평균이 되고, 지니 기준의 분할은 확률에 대한 제곱 오차 기준의 분할과 같습니다.
+- 셀 가중치는 구간에 속한 나이 수이므로 모든 정수 나이 x 특성 조합을 균등하게 반영합니다.
+- 학생 트리는 트리 1개짜리 RandomForestClassifier(bootstrap 없음, 전체 특성 사용)로 만들어
+  기존 저장소/노드 테이블/위험도 테이블/설명 경로를 그대로 사용합니다.
+
+평가는 표본이 아니라 교사와 학생의 나이 임계값을 합친 구간으로 입력 공간 전체를 다시 열거하여
+계산하므로, 보고되는 최대 확률 차이와 라벨 일치율은 입력 범위(AGE_MIN~AGE_MAX) 안의 모든
+입력에 대해 성립합니다.
+"""
+
+import time
+
+import numpy as np
+
+from .inference import iter_trees
+from .risk_table import AGE_FEATURE, AGE_MAX, AGE_MIN, BUILD_CHUNK, _age_buckets, _forest_thresholds
+
+
+# 증류 후보 트리 깊이 (작은 것부터 시도)
+DEPTHS = (4, 6, 8, 10, 12)
+
+# 기본 합격 기준
+MIN_AGREEMENT = 0.95
+MAX_DEVIATION = 0.15
+
+
+def _binary_values(model, feature_names):
+    """이진 특성별 (아니오 값, 예 값) - 교사 포레스트의 임계값 기준 (사용되지 않은 특성은 (0, 1))"""
+    age_index = feature_names.index(AGE_FEATURE)
+    thresholds = _forest_thresholds(model, len(feature_names))
+    low = []
+    for i, name in enumerate(feature_names):
+        if i == age_index:
+            continue
+        if len(thresholds[i]) > 1:
+            raise ValueError(f"'{name}' 특성에 임계값이 여러 개라 이진 특성으로 볼 수 없습니다.")
+        low.append(np.floor(thresholds[i][0]) if len(thresholds[i]) else 0.0)
+    return np.array(low), thresholds[age_index]
+
+
+def enumerate_space(feature_names, binary_low, age_thresholds, age_min=AGE_MIN, age_max=AGE_MAX):
+    """(입력 행렬 float32, 셀 가중치) - 나이 구간 x 이진 특성 조합 전체
+
+    셀 가중치는 구간에 속한 정수 나이 수입니다.
+    """
+    age_index = feature_names.index(AGE_FEATURE)
+    bucket_of_age, representative_ages = _age_buckets(np.asarray(age_thresholds), age_min, age_max)
+    ages_per_bucket = np.bincount(bucket_of_age, minlength=len(representative_ages))
+
+    n_bits = len(binary_low)
+    masks = np.arange(1 << n_bits, dtype=np.int64)
+    bits = (masks[:, np.newaxis] >> np.arange(n_bits)) & 1
+
+    X = np.empty((len(representative_ages) << n_bits, len(feature_names)), dtype=np.float32)
+    binary_index = [i for i in range(len(feature_names)) if i != age_index]
+    X[:, binary_index] = np.tile(binary_low + bits, (len(representative_ages), 1))
+    X[:, age_index] = np.repeat(representative_ages, 1 << n_bits)
+    weights = np.repeat(ages_per_bucket, 1 << n_bits).astype(np.float64)
+    return X, weights
+
+
+def _predict(model, feature_names, X):
+    """(라벨, 양성 확률) - 입력 공간 전체처럼 큰 행렬은 sklearn이 더 빠르므로 청크 단위 predict_proba 사용
+
+    (FlatForest와 비트 단위로 같은 결과이며, 리프 인덱스 행렬이 커지지 않도록 청크로 나눔)
+    """
+    import pandas as pd
+
+    classes = np.asarray(model.classes_)
+    labels = np.empty(len(X), dtype=classes.dtype)
+    positive = np.empty(len(X))
+    for start in range(0, len(X), BUILD_CHUNK):
+        proba = model.predict_proba(pd.DataFrame(X[start:start + BUILD_CHUNK], columns=feature_names))
+        labels[start:start + BUILD_CHUNK] = classes.take(np.argmax(proba, axis=1))
+        positive[start:start + BUILD_CHUNK] = proba[:, 1]
+    return labels, positive
+
+
+class TeacherSpace:
+    """교사 모델의 입력 공간 전체 예측 (나이 구간 x 이진 특성 조합)"""
+
+    def __init__(self, teacher, feature_names, age_min=AGE_MIN, age_max=AGE_MAX):
+        self.teacher = teacher
+        self.feature_names = list(feature_names)
+        self.age_min = age_min
+        self.age_max = age_max
+        self.age_index = self.feature_names.index(AGE_FEATURE)
+        self.binary_low, self.age_thresholds = _binary_values(teacher, self.feature_names)
+        self.bucket_of_age, _ = _age_buckets(self.age_thresholds, age_min, age_max)
+        self.X, self.weights = enumerate_space(self.feature_names, self.binary_low, self.age_thresholds,
+                                               age_min, age_max)
+        self.labels, self.proba = _predict(teacher, self.feature_names, self.X)
+
+    def compare(self, student):
+        """입력 공간 전체에서 교사와 학생 비교
+
+        교사와 학생의 나이 임계값을 합친 구간으로 다시 열거하고, 교사 값은 교사 구간의 예측을 조회합니다.
+        {'max_deviation', 'mean_deviation', 'label_agreement', 'disagreeing_inputs', 'n_inputs'}
+        (평균과 일치율은 정수 나이 x 특성 조합 기준)
+        """
+        student_ages = _forest_thresholds(student, len(self.feature_names))[self.age_index]
+        X, weights = enumerate_space(self.feature_names, self.binary_low,
+                                     np.union1d(self.age_thresholds, student_ages), self.age_min, self.age_max)
+
+        n_masks = 1 << len(self.binary_low)
+        ages = X[::n_masks, self.age_index].astype(np.intp)
+        cells = (self.bucket_of_age[ages - self.age_min].astype(np.int64)[:, np.newaxis] * n_masks
+                 + np.arange(n_masks)).ravel()
+        student_labels, student_proba = _predict(student, self.feature_names, X)
+
+        deviation = np.abs(self.proba[cells] - student_proba)
+        agree = self.labels[cells] == student_labels
+        return {
+            'max_deviation': round(float(deviation.max()), 6),
+            'mean_deviation': round(float(np.average(deviation, weights=weights)), 6),
+            'label_agreement': round(float(np.average(agree, weights=weights)), 6),
+            'disagreeing_inputs': int(weights[~agree].sum()),
+            'n_inputs': int(weights.sum()),
+        }
+
+
+def agreement(teacher, student, feature_names):
+    """입력 공간 전체에서 교사와 학생 비교 (TeacherSpace.compare 참고)"""
+    return TeacherSpace(teacher, feature_names).compare(student)
+
+
+def data_agreement(teacher, student, feature_names, X):
+    """실제 데이터 행에서의 교사/학생 비교 {'data_max_deviation', 'data_label_agreement'}"""
+    X = np.asarray(X, dtype=np.float32)
+    teacher_labels, teacher_proba = _predict(teacher, feature_names, X)
+    student_labels, student_proba = _predict(student, feature_names, X)
+    return {
+        'data_max_deviation': round(float(np.abs(teacher_proba - student_proba).max()), 6),
+        'data_label_agreement': round(float(np.mean(teacher_labels == student_labels)), 6),
+    }
+
+
+def fit_student(X, soft_labels, weights, feature_names, max_depth):
+    """소프트 라벨로 깊이 max_depth의 트리 1개짜리 포레스트 학습"""
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    n = len(X)
+    X_doubled = pd.DataFrame(np.concatenate([X, X]), columns=feature_names)
+    y_doubled = np.concatenate([np.zeros(n, dtype=np.int64), np.ones(n, dtype=np.int64)])
+    sample_weight = np.concatenate([weights * (1 - soft_labels), weights * soft_labels])
+    keep = sample_weight > 0
+
+    student = RandomForestClassifier(
+        n_estimators=1, max_depth=max_depth, bootstrap=False, max_features=None, random_state=0,
+    )
+    student.fit(X_doubled[keep], y_doubled[keep], sample_weight=sample_weight[keep])
+    return student
+
+
+def distill(teacher, feature_names, depths=DEPTHS, min_agreement=MIN_AGREEMENT,
+            max_deviation=MAX_DEVIATION, X_data=None, verbose=True):
+    """기준(입력 공간 전체의 라벨 일치율, 최대 확률 차이)을 만족하는 가장 얕은 학생 모델 탐색
+
+    X_data(실제 학습 데이터 특성 행렬)를 주면 그 행들에서의 일치율도 함께 보고합니다.
+    (학생 모델, 보고서) 를 반환합니다. 보고서의 'passed'가 False이면 어떤 깊이도 기준을
+    만족하지 못한 것이며 이때는 가장 깊은 후보를 반환합니다.
+    """
+    feature_names = list(feature_names)
+    started = time.perf_counter()
+    space = TeacherSpace(teacher, feature_names)
+    if verbose:
+        print(f"  입력 공간: 셀 {len(space.X)}개 (정수 나이 x 특성 조합 {int(space.weights.sum())}가지)")
+
+    candidates = []
+    student = None
+    for depth in depths:
+        student = fit_student(space.X, space.proba, space.weights, feature_names, depth)
+        stats = space.compare(student)
+        if X_data is not None:
+            stats.update(data_agreement(teacher, student, feature_names, X_data))
+        stats['max_depth'] = depth
+        stats['n_leaves'] = int(student.estimators_[0].get_n_leaves())
+        candidates.append(stats)
+        if verbose:
+            line = (f"  깊이 {depth:>2} (리프 {stats['n_leaves']:>5}개): 최대 차이 {stats['max_deviation']:.4f}, "
+                    f"평균 차이 {stats['mean_deviation']:.4f}, 라벨 일치 {stats['label_agreement']:.4%}")
+            if X_data is not None:
+                line += f" (학습 데이터 {stats['data_label_agreement']:.4%})"
+            print(line)
+        if stats['label_agreement'] >= min_agreement and stats['max_deviation'] <= max_deviation:
+            break
+
+    best = candidates[-1]
+    teacher_trees = list(iter_trees(teacher))
+    report = {
+        **best,
+        'passed': best['label_agreement'] >= min_agreement and best['max_deviation'] <= max_deviation,
+        'min_agreement': min_agreement,
+        'max_deviation_bound': max_deviation,
+        'teacher_trees': len(teacher_trees),
+        'teacher_nodes': int(sum(len(tree[0]) for tree in teacher_trees)),
+        'student_nodes': int(student.estimators_[0].tree_.node_count),
+        'candidates': candidates,
+        'elapsed': round(time.perf_counter() - started, 2),
+    }
+    return student, report
+
+
+def publish_student(teacher_artifact, teacher=None, feature_names=None, activate_version=False, **options):
+    """교사 버전을 증류하여 학생 모델을 새 버전으로 게시 (기본: 활성화하지 않음)
+
+    (게시된 ModelArtifact, 보고서) 를 반환합니다.
+    """
+    import joblib
+
+    from . import registry
+
+    if teacher is None:
+        teacher = joblib.load(teacher_artifact.model_path)
+    if feature_names is None:
+        feature_names = joblib.load(teacher_artifact.feature_path)
+
+    student, report = distill(teacher, feature_names, **options)
+    metrics = {
+        key: report[key] for key in ('max_deviation', 'mean_deviation', 'label_agreement', 'student_nodes')
+    }
+    extra = {
+        'distillation': {
+            'teacher_version': teacher_artifact.version,
+            **{key: value for key, value in report.items() if key != 'candidates'},
+            'candidates': report['candidates'],
+        },
+    }
+    # 학생은 교사의 분할 임계값으로 만든 입력(교사의 학습 인코딩)으로 학습되므로 교사의 인코딩을 항상 기록
+    extra['data'] = {
+        **(teacher_artifact.manifest.get('data') or {}),
+        'symptom_encoding': registry.symptom_encoding(teacher_artifact.manifest),
+    }
+    artifact = registry.publish(student, feature_names, metrics=metrics, activate_version=activate_version,
+                                extra=extra)
+    return artifact, report
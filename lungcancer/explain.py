@@ -0,0 +1,128 @@
+"""
+예측 설명 (트리 경로 기여도)
+
+Saabas 방식으로 각 트리에서 루트부터 리프까지 내려가며 분할 특성별로
+(자식 노드의 양성 확률 - 부모 노드의 양성 확률)을 더하고 트리 수로 평균합니다.
+
+    양성 확률 = 기준값(루트 확률 평균) + 특성별 기여도의 합
+
+노드별 누적 기여도(노드 수 x 특성 수)를 모델 로드 후 한 번 계산해 두므로,
+예측 한 건의 설명은 리프 탐색(FlatForest.apply)과 행 합계 한 번으로 끝납니다.
+
+gradient boosting(logit) 모델은 같은 방식으로 원점수 기여도를 구한 뒤, 합이
+(양성 확률 - sigmoid(기준 원점수))가 되도록 비율을 맞춰 확률 단위로 환산합니다.
+"""
+
+import numpy as np
+
+
+def _sigmoid(x):
+    from scipy.special import expit
+
+    return expit(x)
+
+
+# 모델 특성 이름 → 화면 표시 이름 (Patient 필드의 verbose_name과 동일)
+FEATURE_LABELS = {
+    'GENDER': '성별',
+    'AGE': '나이',
+    'SMOKING': '흡연',
+    'YELLOW_FINGERS': '손가락 변색',
+    'ANXIETY': '불안',
+    'PEER_PRESSURE': '또래 압박',
+    'CHRONIC DISEASE': '만성 질환',
+    'FATIGUE ': '피로',
+    'ALLERGY ': '알레르기',
+    'WHEEZING': '쌕쌕거림',
+    'ALCOHOL CONSUMING': '음주',
+    'COUGHING': '기침',
+    'SHORTNESS OF BREATH': '호흡 곤란',
+    'SWALLOWING DIFFICULTY': '삼킴 곤란',
+    'CHEST PAIN': '가슴 통증',
+}
+
+
+class TreeExplainer:
+    """FlatForest 노드 테이블 기반 특성별 기여도 계산기"""
+
+    def __init__(self, forest, positive_index=1):
+        from .inference import AGGREGATION_LOGIT
+
+        # 노드 풀을 공유하는 압축 테이블은 경로마다 누적 기여도가 다르므로 트리별로 펼쳐서 사용
+        forest = forest.unpooled()
+        self.forest = forest
+        self.feature_names = forest.feature_names
+        self.logit = forest.aggregation == AGGREGATION_LOGIT
+
+        roots = np.asarray(forest.roots, dtype=np.intp)
+        # logit 모델은 노드별 원점수(1열)의 변화량을 누적
+        positive = np.asarray(forest.value[:, 0 if self.logit else positive_index], dtype=np.float64)
+        feature = np.asarray(forest.feature, dtype=np.intp)
+
+        # 루트에서 각 노드까지 경로의 특성별 확률 변화량 누적
+        contributions = np.zeros((forest.n_nodes, forest.n_features))
+        tree_of_node = np.repeat(np.arange(forest.n_trees), np.diff(np.append(roots, forest.n_nodes)))
+        frontier = roots
+        for _ in range(forest.max_depth):
+            offsets = roots[tree_of_node[frontier]]
+            left = offsets + np.asarray(forest.left[frontier], dtype=np.intp)
+            right = offsets + np.asarray(forest.right[frontier], dtype=np.intp)
+            # 리프는 자기 자신을 가리키므로 분할 노드만 다음 단계로 진행
+            split = left != frontier
+            parents = np.concatenate([frontier[split], frontier[split]])
+            children = np.concatenate([left[split], right[split]])
+            if len(children) == 0:
+                break
+            contributions[children] = contributions[parents]
+            contributions[children, feature[parents]] += positive[children] - positive[parents]
+            frontier = children
+
+        if self.logit:
+            self.raw_bias = forest.baseline + float(positive[roots].sum())
+            self.bias = float(_sigmoid(self.raw_bias))
+        else:
+            self.bias = float(positive[roots].mean())
+        self.node_contributions = contributions
+
+    def explain(self, X):
+        """(기준값, 특성별 기여도 (n_samples, n_features)) - 기준값 + 기여도 합 = 양성 확률"""
+        leaves = self.forest.apply(X)
+        if not self.logit:
+            contributions = self.node_contributions[leaves].sum(axis=1) / self.forest.n_trees
+            return self.bias, contributions
+
+        # 원점수 기여도를 확률 변화량(sigmoid(원점수) - 기준값)에 비례하도록 환산
+        # (sigmoid는 단조 증가이므로 부호가 유지되고 합은 양성 확률과 같아짐)
+        raw = self.node_contributions[leaves].sum(axis=1)
+        delta = raw.sum(axis=1)
+        change = _sigmoid(self.raw_bias + delta) - self.bias
+        slope = self.bias * (1 - self.bias)   # delta가 0에 가까울 때의 극한값
+        nonzero = np.abs(delta) > 1e-12
+        scale = np.where(nonzero, change / np.where(nonzero, delta, 1.0), slope)
+        return self.bias, raw * scale[:, np.newaxis]
+
+    def explain_one(self, features, top=None):
+        """특성 딕셔너리 한 건의 설명
+
+        {'bias', 'probability', 'contributions': [{'feature', 'label', 'contribution'}, ...]}
+        기여도는 절댓값이 큰 순서이며 top을 주면 그 개수만 반환합니다.
+        """
+        from .inference import features_to_array
+
+        bias, contributions = self.explain(features_to_array(features, self.feature_names))
+        contributions = contributions[0]
+        order = np.argsort(-np.abs(contributions), kind='stable')
+        if top is not None:
+            order = order[:top]
+        return {
+            'bias': bias,
+            'probability': bias + float(contributions.sum()),
+            'contributions': [
+                {
+                    'feature': self.feature_names[i],
+                    'label': FEATURE_LABELS.get(self.feature_names[i], self.feature_names[i].strip()),
+                    'contribution': float(contributions[i]),
+                }
+                for i in order
+            ],
+        }
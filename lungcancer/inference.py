@@ -0,0 +1,432 @@
+"""
+폐암 예측 추론 엔진
+
+학습된 RandomForestClassifier를 평탄화된 NumPy 노드 테이블(특성, 임계값,
+자식 노드, 리프 확률)로 변환하여 한 번의 벡터 연산으로 예측합니다.
+요청마다 DataFrame을 만들고 predict_proba / predict를 따로 호출하던 방식보다
+빠르며, 결과는 scikit-learn과 비트 단위로 동일합니다.
+
+이진 분류 HistGradientBoostingClassifier도 같은 노드 테이블로 변환합니다
+(aggregation='logit': 리프 값은 원점수이며 양성 확률 = sigmoid(baseline + 트리별 리프 값의 합)).
+
+노드 테이블은 pickle 없이 .npy 배열 디렉터리(압축 형식)로 저장할 수 있으며,
+메모리 매핑으로 로드하면 여러 워커 프로세스가 같은 페이지를 공유합니다.
+
+    forest/
+        header.json     # 형식 버전, 트리/노드 수, 특성 이름, 클래스, 합산 방식, 모델 체크섬
+        feature.npy     # int8 (특성 128개 이상이면 int16)
+        threshold.npy   # float32 - float64 임계값 이하의 가장 큰 float32 (비교 결과 동일), 압축 시 int8
+        left.npy        # uint16 - 트리 내부 노드 번호 (리프는 자기 자신, 압축 시 노드 풀 번호)
+        right.npy       # uint16
+        value.npy       # float64 - 노드별 클래스 확률 (logit 모델은 원점수 1열)
+        roots.npy       # int32 - 트리별 첫 노드 위치
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+COMPACT_FORMAT_VERSION = 3
+# 형식 1은 aggregation/baseline 항목이 없는 RandomForest 노드 테이블, 형식 2는 pooled 항목이 없음
+SUPPORTED_FORMAT_VERSIONS = (1, 2, 3)
+
+# 트리 결과 합산 방식
+AGGREGATION_MEAN = 'mean'      # RandomForest: 트리별 클래스 확률의 평균
+AGGREGATION_LOGIT = 'logit'    # gradient boosting: sigmoid(baseline + 트리별 원점수의 합)
+
+
+def features_to_array(rows, feature_names):
+    """특성 딕셔너리 목록을 feature_names 순서의 float32 행렬로 변환"""
+    if isinstance(rows, dict):
+        rows = [rows]
+    return np.array(
+        [[row[name] for name in feature_names] for row in rows],
+        dtype=np.float32,
+    ).reshape(len(rows), len(feature_names))
+
+
+def _boosting_node_values(nodes, is_leaf, left, right):
+    """HistGradientBoosting 트리의 노드별 원점수
+
+    리프는 학습률이 적용된 리프 값을 그대로 사용하고, 분할 노드는 (학습률이 적용되지 않은 값이
+    저장되어 있으므로) 자식 값의 샘플 수 가중 평균으로 다시 계산합니다 (설명 기여도용).
+    노드는 전위 순회 순서로 저장되어 자식 번호가 항상 부모보다 큽니다.
+    """
+    value = nodes['value'].astype(np.float64)
+    count = nodes['count'].astype(np.float64)
+    for node in np.flatnonzero(~is_leaf)[::-1]:
+        l, r = left[node], right[node]
+        total = count[l] + count[r]
+        value[node] = (count[l] * value[l] + count[r] * value[r]) / total if total else value[l]
+    return value[:, np.newaxis]
+
+
+def iter_trees(model):
+    """모델의 트리별 (분할 특성, 임계값, 왼쪽 자식, 오른쪽 자식, 노드 값, 최대 깊이)
+
+    리프의 자식 번호는 -1이며, X[특성] <= 임계값 이면 왼쪽으로 이동합니다.
+    RandomForestClassifier는 노드별 클래스 확률, HistGradientBoostingClassifier는 노드별 원점수(1열)입니다.
+    """
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError('다중 출력 모델은 지원하지 않습니다.')
+
+    if hasattr(model, '_predictors'):
+        if model.n_trees_per_iteration_ != 1:
+            raise ValueError('다중 클래스 gradient boosting 모델은 지원하지 않습니다.')
+        for (predictor,) in model._predictors:
+            nodes = predictor.nodes
+            if nodes['is_categorical'].any():
+                raise ValueError('범주형 분할이 있는 gradient boosting 모델은 지원하지 않습니다.')
+            is_leaf = nodes['is_leaf'].astype(bool)
+            left = np.where(is_leaf, -1, nodes['left']).astype(np.intp)
+            right = np.where(is_leaf, -1, nodes['right']).astype(np.intp)
+            yield (nodes['feature_idx'], nodes['num_threshold'], left, right,
+                   _boosting_node_values(nodes, is_leaf, left, right), int(nodes['depth'].max()))
+        return
+
+    n_classes = len(model.classes_)
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        # scikit-learn 1.4 이상은 tree_.value에 클래스 비율을 저장하므로
+        # DecisionTreeClassifier.predict_proba와 같이 그대로 사용
+        yield (tree.feature, tree.threshold, tree.children_left, tree.children_right,
+               tree.value[:, 0, :n_classes].astype(np.float64), tree.max_depth)
+
+
+class FlatForest:
+    """RandomForestClassifier (또는 이진 분류 HistGradientBoostingClassifier)를 평탄화한 노드 테이블"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes,
+                 max_depth, n_features, feature_names=None, aggregation=AGGREGATION_MEAN, baseline=0.0,
+                 pooled=False):
+        self.feature = feature          # 노드별 분할 특성 인덱스
+        self.threshold = threshold      # 노드별 분할 임계값 (float64)
+        self.left = left                # 왼쪽 자식의 트리 내부 번호 (리프는 자기 자신, pooled이면 전체 번호)
+        self.right = right              # 오른쪽 자식의 트리 내부 번호 (리프는 자기 자신, pooled이면 전체 번호)
+        self.value = value              # 노드별 정규화된 클래스 확률 (logit이면 원점수 1열)
+        self.roots = roots              # 트리별 루트 노드 인덱스
+        self.classes = classes
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.aggregation = aggregation
+        self.baseline = float(baseline)  # logit 모델의 초기 원점수
+        # True이면 트리들이 노드 풀을 공유하는 압축 테이블 (compression.compress_forest)
+        self.pooled = pooled
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model, feature_names=None):
+        """학습된 RandomForestClassifier / HistGradientBoostingClassifier에서 노드 테이블 생성"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for feature, threshold, children_left, children_right, value, depth in iter_trees(model):
+            is_leaf = children_left == -1
+            node_ids = np.arange(len(is_leaf))
+
+            # 리프는 자기 자신을 가리키게 하여 고정 횟수 순회가 가능하도록 함
+            left = np.where(is_leaf, node_ids, children_left)
+            right = np.where(is_leaf, node_ids, children_right)
+
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.where(is_leaf, 0.0, threshold))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+
+            offset += len(is_leaf)
+            max_depth = max(max_depth, depth)
+
+        if feature_names is None and hasattr(model, 'feature_names_in_'):
+            feature_names = model.feature_names_in_
+
+        boosting = hasattr(model, '_predictors')
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            feature_names=feature_names,
+            aggregation=AGGREGATION_LOGIT if boosting else AGGREGATION_MEAN,
+            baseline=float(np.ravel(model._baseline_prediction)[0]) if boosting else 0.0,
+        )
+
+    def apply(self, X):
+        """각 행이 트리별로 도달하는 리프 노드 인덱스 (n_samples, n_trees)"""
+        X = self._validate(X)
+        if X.shape[0] == 1 and self.n_trees == 1:
+            # 트리 1개(증류된 학생 모델)의 단일 행은 깊이만큼 배열 연산을 반복하는 것보다
+            # 스칼라 순회가 빠르고 리프에 도달하면 바로 멈출 수 있음
+            row = X[0].tolist()
+            offset = 0 if self.pooled else int(self.roots[0])
+            node = int(self.roots[0]) - offset
+            for _ in range(self.max_depth):
+                child = self.left[offset + node] if row[self.feature[offset + node]] <= self.threshold[offset + node] \
+                    else self.right[offset + node]
+                if child == node:
+                    break
+                node = child
+            return np.array([[offset + node]], dtype=np.intp)
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        roots = self.roots.astype(np.intp)
+        nodes = np.broadcast_to(roots, (X.shape[0], self.n_trees))
+        # 자식 번호가 트리 내부 번호이면 트리별 시작 위치를 더해 전체 노드 번호로 변환
+        # (압축 테이블도 0을 더해 uint16 자식 번호를 intp로 바꿈 - 작은 정수형 인덱스는 매번 변환되어 느림)
+        offsets = np.zeros_like(roots) if self.pooled else roots
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = offsets + np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X):
+        """클래스별 예측 확률 (RandomForestClassifier / HistGradientBoostingClassifier.predict_proba와 동일)"""
+        leaves = self.apply(X)
+
+        if self.aggregation == AGGREGATION_LOGIT:
+            from scipy.special import expit
+
+            # scikit-learn은 baseline부터 트리 순서대로 원점수를 하나씩 더함 - add.reduce는 행 수에 따라
+            # 합산 순서가 달라질 수 있으므로 항상 순차 누적하는 cumsum의 마지막 행을 사용
+            scores = np.empty((self.n_trees + 1, leaves.shape[0]))
+            scores[0] = self.baseline
+            scores[1:] = self.value[leaves.T, 0]
+            raw = np.cumsum(scores, axis=0)[-1]
+            proba = np.empty((len(raw), 2))
+            proba[:, 1] = expit(raw)
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+
+        # (n_trees, n_samples, n_classes) 배열을 트리 순서대로 float64로 누적하여
+        # scikit-learn의 누적 순서와 부동소수점 결과를 맞춤
+        proba = np.add.reduce(self.value[leaves.T], axis=0, dtype=np.float64)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """예측 라벨과 클래스별 확률을 한 번의 순회로 함께 반환"""
+        proba = self.predict_proba(X)
+        labels = self.classes.take(np.argmax(proba, axis=1), axis=0)
+        return labels, proba
+
+    def predict_one(self, features):
+        """특성 딕셔너리 한 건을 예측하여 (라벨, 양성 확률) 반환"""
+        labels, proba = self.predict(features_to_array(features, self.feature_names))
+        return labels[0], float(proba[0, 1])
+
+    def _validate(self, X):
+        # 트리 학습 시와 동일하게 float32로 변환 후 float64 임계값과 비교
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f'특성 개수가 일치하지 않습니다: {X.shape[1]} (기대값 {self.n_features})')
+        if not np.isfinite(X).all():
+            raise ValueError('입력 특성에 NaN 또는 무한대 값이 포함되어 있습니다.')
+        if self.threshold.dtype.kind in 'iu' and not (X == np.floor(X)).all():
+            raise ValueError('정수 임계값으로 압축된 노드 테이블은 정수 특성 값만 예측할 수 있습니다.')
+        return X
+
+    def unpooled(self):
+        """노드 풀을 공유하는 압축 테이블을 트리별 연속 노드 테이블로 펼친 복사본 (트리 경로 기여도 계산용)"""
+        if not self.pooled:
+            return self
+        left = np.asarray(self.left, dtype=np.intp)
+        right = np.asarray(self.right, dtype=np.intp)
+        order, new_left, new_right, roots = [], [], [], []
+        for root in np.asarray(self.roots, dtype=np.intp):
+            start = len(order)
+            roots.append(start)
+            # 전위 순회로 복사하며 자식 번호를 트리 내부 번호로 다시 매김
+            stack = [(int(root), None, None)]
+            while stack:
+                node, parent, side = stack.pop()
+                local = len(order) - start
+                order.append(node)
+                new_left.append(local)
+                new_right.append(local)
+                if parent is not None:
+                    (new_left if side == 'left' else new_right)[parent] = local
+                if left[node] != node:
+                    stack.append((int(right[node]), start + local, 'right'))
+                    stack.append((int(left[node]), start + local, 'left'))
+        order = np.array(order, dtype=np.intp)
+        return FlatForest(
+            feature=np.asarray(self.feature)[order].astype(np.intp),
+            threshold=np.asarray(self.threshold)[order],
+            left=np.array(new_left, dtype=np.intp),
+            right=np.array(new_right, dtype=np.intp),
+            value=np.asarray(self.value)[order],
+            roots=np.array(roots, dtype=np.intp),
+            classes=self.classes,
+            max_depth=self.max_depth,
+            n_features=self.n_features,
+            feature_names=self.feature_names,
+            aggregation=self.aggregation,
+            baseline=self.baseline,
+        )
+
+    def save_compact(self, directory, model_checksum=None):
+        """pickle 없는 압축 형식(.npy 배열 + header.json)으로 저장
+
+        임시 디렉터리에 모두 쓴 뒤 교체하므로 읽는 쪽은 완성된 파일만 봅니다.
+        """
+        if self.pooled:
+            max_child = self.n_nodes
+        else:
+            max_child = np.diff(np.append(self.roots, self.n_nodes)).max()
+        child_dtype = np.uint16 if max_child <= np.iinfo(np.uint16).max else np.uint32
+        feature_dtype = np.int8 if self.n_features <= np.iinfo(np.int8).max else np.int16
+
+        arrays = {
+            'feature': self.feature.astype(feature_dtype),
+            'threshold': _threshold_array(self.threshold),
+            'left': self.left.astype(child_dtype),
+            'right': self.right.astype(child_dtype),
+            # 리프 값을 float32로 줄이면 트리 평균(logit 모델은 원점수 합)이 scikit-learn과 달라지므로 float64 유지
+            'value': self.value.astype(np.float64),
+            'roots': self.roots.astype(np.int32),
+        }
+        header = {
+            'format_version': COMPACT_FORMAT_VERSION,
+            'n_trees': self.n_trees,
+            'n_nodes': self.n_nodes,
+            'max_depth': int(self.max_depth),
+            'n_features': int(self.n_features),
+            'feature_names': self.feature_names,
+            'classes': self.classes.tolist(),
+            'dtypes': {name: array.dtype.str for name, array in arrays.items()},
+            'aggregation': self.aggregation,
+            'baseline': self.baseline,
+            'pooled': self.pooled,
+            'model_checksum': model_checksum,
+        }
+
+        tmp_dir = f'{directory.rstrip(os.sep)}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+            with open(os.path.join(tmp_dir, 'header.json'), 'w', encoding='utf-8') as f:
+                json.dump(header, f, ensure_ascii=False, indent=2)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.rename(tmp_dir, directory)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return header
+
+    @classmethod
+    def load_compact(cls, directory, mmap_mode='r'):
+        """압축 형식 디렉터리를 메모리 매핑으로 로드 (header.json의 내용도 함께 반환)"""
+        with open(os.path.join(directory, 'header.json'), encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+            raise ValueError(f"지원하지 않는 노드 테이블 형식입니다: {header.get('format_version')}")
+
+        def load(name):
+            return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+
+        forest = cls(
+            feature=load('feature'),
+            threshold=load('threshold'),
+            left=load('left'),
+            right=load('right'),
+            value=load('value'),
+            roots=np.load(os.path.join(directory, 'roots.npy')),
+            classes=np.array(header['classes']),
+            max_depth=header['max_depth'],
+            n_features=header['n_features'],
+            feature_names=header['feature_names'],
+            aggregation=header.get('aggregation', AGGREGATION_MEAN),
+            baseline=header.get('baseline', 0.0),
+            pooled=header.get('pooled', False),
+        )
+        return forest, header
+
+
+def _threshold_array(threshold):
+    """저장용 임계값 배열 - 정수 임계값(압축)은 가장 작은 정수형, 그 외는 _float32_at_most"""
+    threshold = np.asarray(threshold)
+    if threshold.dtype.kind not in 'iu':
+        return _float32_at_most(threshold)
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if len(threshold) == 0 or (threshold.min() >= info.min and threshold.max() <= info.max):
+            return threshold.astype(dtype)
+    return threshold.astype(np.int64)
+
+
+def _float32_at_most(values):
+    """각 값 이하의 가장 큰 float32
+
+    float32 입력 x에 대해 x <= t 와 x <= _float32_at_most(t) 의 결과가 항상 같으므로
+    임계값을 float32로 줄여도 분기 결과는 바뀌지 않습니다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    too_large = rounded.astype(np.float64) > values
+    rounded[too_large] = np.nextafter(rounded[too_large], np.float32(-np.inf))
+    return rounded
+
+
+def verify_compact_forest(model, forest, X=None, n_samples=20000, seed=0, atol=0.0):
+    """압축 노드 테이블의 예측을 model.predict_proba와 비교
+
+    X를 주지 않으면 특성별 임계값 범위에서 무작위 행(정수 값 절반 포함, 정수 임계값으로 압축된
+    테이블은 모두 정수)을 만듭니다.
+    라벨, 도달 리프, 확률이 모두 완전히 같아야 합니다 (노드 풀을 공유하는 압축 테이블은 도달 리프
+    번호가 다르므로 확률과 라벨만 비교). float32 리프 값으로 저장된 이전 테이블은 atol을 주어 검사합니다.
+    불일치가 있으면 ValueError를 발생시키고, 통과하면 확률의 최대 오차를 반환합니다.
+    """
+    import pandas as pd
+
+    if X is None:
+        rng = np.random.default_rng(seed)
+        own = np.arange(forest.n_nodes)
+        if not forest.pooled:
+            own = own - np.repeat(forest.roots, np.diff(np.append(forest.roots, forest.n_nodes)))
+        is_split = forest.left != own
+        X = np.zeros((n_samples, forest.n_features))
+        for i in range(forest.n_features):
+            used = np.asarray(forest.threshold)[is_split & (np.asarray(forest.feature) == i)]
+            if len(used):
+                X[:, i] = rng.uniform(used.min() - 1, used.max() + 1, n_samples)
+        integer_rows = n_samples if forest.threshold.dtype.kind in 'iu' else n_samples // 2
+        X[:integer_rows] = np.round(X[:integer_rows])
+    X = np.asarray(X, dtype=np.float32)
+    expected = model.predict_proba(pd.DataFrame(X, columns=forest.feature_names))
+    expected_labels = model.classes_.take(np.argmax(expected, axis=1), axis=0)
+    labels, proba = forest.predict(X)
+    max_error = float(np.abs(proba - expected).max()) if len(X) else 0.0
+    # 도달 리프는 트리별 apply가 있는 RandomForest만 비교 (gradient boosting은 확률과 라벨로 검증)
+    if hasattr(model, 'estimators_') and not forest.pooled:
+        expected_leaves = np.stack(
+            [estimator.tree_.apply(X) for estimator in model.estimators_], axis=1
+        ) + forest.roots.astype(np.intp)
+        if not np.array_equal(forest.apply(X), expected_leaves):
+            raise ValueError('압축 노드 테이블 검증 실패: 도달 리프 불일치')
+    if not np.array_equal(labels, expected_labels) or max_error > atol:
+        raise ValueError(f'압축 노드 테이블 검증 실패: 라벨 또는 확률 불일치 (최대 오차 {max_error:.3g})')
+    return max_error
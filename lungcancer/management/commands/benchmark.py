@@ -0,0 +1,28 @@
+import inspect
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer.benchmarks import BENCHMARKS
+from lungcancer.synthetic import NotLocalDatabase
+
+
+class Command(BaseCommand):
+    help = '성능 벤치마크 실행 (예: python manage.py benchmark inference)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(BENCHMARKS), help='벤치마크 대상')
+        parser.add_argument('--repeat', type=int, default=1000, help='반복 횟수')
+        parser.add_argument('--database',
+                            help='행을 추가하는 벤치마크의 데이터베이스 별칭 (기본: bench, 로컬 데이터베이스만 허용)')
+
+    def handle(self, *args, **options):
+        benchmark = BENCHMARKS[options['target']]
+        kwargs = {'repeat': options['repeat']}
+        if options['database']:
+            if 'database' not in inspect.signature(benchmark).parameters:
+                raise CommandError(f"{options['target']} 벤치마크는 --database를 지원하지 않습니다.")
+            kwargs['database'] = options['database']
+        try:
+            benchmark(**kwargs)
+        except NotLocalDatabase as e:
+            raise CommandError(str(e))
@@ -0,0 +1,45 @@
+import os
+
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import registry
+from lungcancer.risk_table import AGE_MAX, AGE_MIN, build_risk_table
+
+
+class Command(BaseCommand):
+    help = '활성 모델 버전(또는 지정한 버전)에 대한 위험도 조회 테이블 생성 및 검증'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-version', help='모델 저장소 버전 (기본: 활성 버전)')
+        parser.add_argument('--age-min', type=int, default=AGE_MIN)
+        parser.add_argument('--age-max', type=int, default=AGE_MAX)
+        parser.add_argument('--no-verify', action='store_true', help='model.predict_proba 대조 검증 생략')
+
+    def handle(self, *args, **options):
+        try:
+            if options['model_version']:
+                artifact = registry.get_artifact(options['model_version'])
+            else:
+                artifact = registry.active_artifact()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not os.path.exists(artifact.model_path):
+            raise CommandError(f'모델 파일을 찾을 수 없습니다: {artifact.model_path}')
+
+        model = joblib.load(artifact.model_path)
+        feature_names = joblib.load(artifact.feature_path)
+
+        try:
+            table = build_risk_table(
+                model, feature_names, artifact.model_path, artifact.risk_table_dir,
+                age_min=options['age_min'], age_max=options['age_max'],
+                verify=not options['no_verify'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"위험도 테이블 생성 완료 ({artifact.version}): 나이 구간 {table.meta['n_age_buckets']}개, 셀 {table.n_cells}개"
+        ))
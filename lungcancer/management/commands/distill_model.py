@@ -0,0 +1,57 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import distill, registry
+
+
+class Command(BaseCommand):
+    help = '모델 버전(기본: 활성 버전)을 교사로 작은 학생 모델을 증류하여 새 버전으로 게시'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-version', help='교사 모델 버전 (기본: 활성 버전)')
+        parser.add_argument('--min-agreement', type=float, default=distill.MIN_AGREEMENT,
+                            help=f'입력 공간 전체의 최소 라벨 일치율 (기본: {distill.MIN_AGREEMENT})')
+        parser.add_argument('--max-deviation', type=float, default=distill.MAX_DEVIATION,
+                            help=f'입력 공간 전체의 최대 양성 확률 차이 (기본: {distill.MAX_DEVIATION})')
+        parser.add_argument('--activate', action='store_true', help='기준을 만족하면 학생 모델을 활성화')
+
+    def handle(self, *args, **options):
+        try:
+            if options['model_version']:
+                teacher = registry.get_artifact(options['model_version'])
+            else:
+                teacher = registry.active_artifact()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not os.path.exists(teacher.model_path):
+            raise CommandError(f'모델 파일을 찾을 수 없습니다: {teacher.model_path}')
+        if 'distillation' in teacher.manifest:
+            raise CommandError(f'{teacher.version}은 이미 증류된 학생 모델입니다.')
+
+        self.stdout.write(f'교사 모델 {teacher.version} 증류 중...')
+        try:
+            artifact, report = distill.publish_student(
+                teacher, min_agreement=options['min_agreement'], max_deviation=options['max_deviation'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"노드 {report['teacher_nodes']}개 (트리 {report['teacher_trees']}개) → {report['student_nodes']}개 "
+            f"(깊이 {report['max_depth']}), 입력 {report['n_inputs']}가지 전체: "
+            f"최대 차이 {report['max_deviation']:.4f}, 평균 차이 {report['mean_deviation']:.4f}, "
+            f"라벨 일치 {report['label_agreement']:.4%}"
+        )
+        if not report['passed']:
+            raise CommandError(f'학생 모델 {artifact.version}이 기준을 만족하지 못해 활성화하지 않았습니다.')
+
+        if options['activate']:
+            registry.activate(artifact.version)
+            self.stdout.write(self.style.SUCCESS(f'학생 모델 게시 및 활성화: {artifact.version}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'학생 모델 게시: {artifact.version} '
+                f'(python manage.py model_registry activate {artifact.version} 로 활성화)'
+            ))
@@ -0,0 +1,53 @@
+import os
+
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import registry
+from lungcancer.risk_table import file_checksum
+
+
+class Command(BaseCommand):
+    help = '활성 모델 버전(또는 지정한 버전)을 pickle 없는 압축 노드 테이블(forest/)로 내보내기 및 검증'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-version', help='모델 저장소 버전 (기본: 활성 버전)')
+        parser.add_argument('--compress', action='store_true',
+                            help='임계값 정수화, 중복 서브트리 공유, 불필요한 분할 제거 적용')
+
+    def handle(self, *args, **options):
+        try:
+            if options['model_version']:
+                artifact = registry.get_artifact(options['model_version'])
+            else:
+                artifact = registry.active_artifact()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not os.path.exists(artifact.model_path):
+            raise CommandError(f'모델 파일을 찾을 수 없습니다: {artifact.model_path}')
+
+        model = joblib.load(artifact.model_path)
+        feature_names = joblib.load(artifact.feature_path)
+
+        before = _directory_size(artifact.forest_dir)
+        try:
+            forest = registry.export_forest(model, feature_names, artifact.forest_dir, file_checksum(artifact.model_path),
+                                            compress=options['compress'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        size = _directory_size(artifact.forest_dir)
+        message = (
+            f'노드 테이블 내보내기 완료 ({artifact.version}): 트리 {forest.n_trees}개, 노드 {forest.n_nodes}개, '
+            f'{size / 1024:.1f}KB (pickle {os.path.getsize(artifact.model_path) / 1024:.1f}KB)'
+        )
+        if before is not None:
+            message += f', 이전 노드 테이블 {before / 1024:.1f}KB'
+        self.stdout.write(self.style.SUCCESS(message))
+
+
+def _directory_size(directory):
+    if not os.path.isdir(directory):
+        return None
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
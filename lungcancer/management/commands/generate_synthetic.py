@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from lungcancer import synthetic
+
+
+class Command(BaseCommand):
+    help = '실제 설문 분포를 따르는 합성 데이터 생성 (CSV 파일 또는 로컬 테스트 데이터베이스)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=['csv', 'survey', 'records'],
+                            help='csv: 설문 CSV 파일, survey: lung_cancer_survey, '
+                                 'records: Patient/lung_record/lung_result')
+        parser.add_argument('--rows', type=int, default=100000, help='생성할 행 수 (기본: 100000)')
+        parser.add_argument('--seed', type=int, default=42, help='난수 seed (기본: 42)')
+        parser.add_argument('--output', default='synthetic_survey.csv', help='csv 대상의 출력 파일 경로')
+        parser.add_argument('--database', default=synthetic.BENCH_DATABASE,
+                            help=f'survey/records 대상의 데이터베이스 별칭 (기본: 로컬 SQLite {synthetic.BENCH_DATABASE}, '
+                                 f'Patient도 같은 데이터베이스에 저장하며 heart_db이면 default에 저장)')
+        parser.add_argument('--start-date', default='2024-01-01', help='records 등록일 시작 (YYYY-MM-DD)')
+        parser.add_argument('--days', type=int, default=synthetic.DEFAULT_DAYS, help='records 등록일 범위(일)')
+        parser.add_argument('--no-patients', action='store_true', help='records 대상에서 Patient 테이블은 제외')
+        parser.add_argument('--noinput', action='store_true',
+                            help='로컬이 아닌 데이터베이스에 저장하기 전 확인하지 않음')
+
+    def handle(self, *args, **options):
+        n_rows = options['rows']
+        try:
+            generator = synthetic.SurveyGenerator(seed=options['seed'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = synthetic.distribution_report(generator.rows, generator.block(0))
+        self.stdout.write(f"기준 데이터 {len(generator.rows)}행 대비 분포 차이: {report}")
+
+        target = options['target']
+        if target == 'csv':
+            synthetic.write_csv(options['output'], n_rows, generator)
+            self.stdout.write(self.style.SUCCESS(f"{options['output']}에 {n_rows}행 저장 완료"))
+            return
+
+        database = options['database']
+        try:
+            synthetic.require_local_database(database)
+        except synthetic.NotLocalDatabase:
+            # 로컬(SQLite 또는 BENCHMARK_DATABASES)이 아닌 데이터베이스는 확인 후 저장
+            if not options['noinput']:
+                answer = input(f"{database} 데이터베이스는 로컬 데이터베이스가 아닙니다. 합성 데이터 {n_rows}행을 "
+                               f"추가합니다. 운영 데이터베이스가 아닌지 확인하세요. 계속할까요? [y/N] ")
+                if answer.strip().lower() != 'y':
+                    self.stdout.write('취소했습니다.')
+                    return
+        else:
+            synthetic.prepare_database(database)
+
+        if target == 'survey':
+            synthetic.write_survey(n_rows, generator, using=database)
+        else:
+            try:
+                start_at = timezone.make_aware(datetime.strptime(options['start_date'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError(f"날짜 형식이 올바르지 않습니다: {options['start_date']}")
+            synthetic.write_records(n_rows, generator, using=database, start_at=start_at,
+                                    days=options['days'], with_patients=not options['no_patients'],
+                                    patient_using='default' if database == 'heart_db' else database)
+        self.stdout.write(self.style.SUCCESS(f"{target}: {n_rows}행 저장 완료"))
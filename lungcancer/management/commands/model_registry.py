@@ -0,0 +1,69 @@
+import os
+
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import registry
+
+
+class Command(BaseCommand):
+    help = '모델 저장소 관리 (버전 목록, 활성 버전 변경, 기존 모델 등록)'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        subparsers.add_parser('list', help='게시된 버전 목록')
+        activate = subparsers.add_parser('activate', help='활성 버전 변경')
+        activate.add_argument('model_version', help='활성화할 버전')
+        subparsers.add_parser('import-legacy', help='ml_model/의 기존 모델 파일을 새 버전으로 등록')
+        subparsers.add_parser(
+            'backfill-legacy', help='학습 데이터 정보 없이 등록된 기존 모델 버전의 manifest에 학습 CSV 인코딩 기록',
+        )
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'list':
+            self.list_versions()
+        elif action == 'activate':
+            try:
+                registry.activate(options['model_version'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"활성 버전 변경: {options['model_version']}"))
+        elif action == 'import-legacy':
+            self.import_legacy()
+        elif action == 'backfill-legacy':
+            self.backfill_legacy()
+
+    def list_versions(self):
+        active = registry.active_version()
+        versions = registry.list_versions()
+        if not versions:
+            self.stdout.write(f'게시된 버전이 없습니다. 기존 모델({registry.LEGACY_VERSION})을 사용합니다.')
+            return
+        for version in versions:
+            manifest = registry.read_manifest(version)
+            metrics = ', '.join(f'{key}={value}' for key, value in manifest.get('metrics', {}).items())
+            marker = '*' if version == active else ' '
+            self.stdout.write(f"{marker} {version}  {manifest.get('created_at', '')}  {manifest.get('model_class', '')}  {metrics}")
+
+    def import_legacy(self):
+        legacy = registry.get_artifact(registry.LEGACY_VERSION)
+        if not os.path.exists(legacy.model_path):
+            raise CommandError(f'모델 파일을 찾을 수 없습니다: {legacy.model_path}')
+
+        model = joblib.load(legacy.model_path)
+        feature_names = joblib.load(legacy.feature_path)
+        # 기존 모델은 학습 CSV(2=예, 1=아니오)로 학습됨
+        artifact = registry.publish(
+            model, feature_names, extra={'source': 'legacy', 'data': dict(registry.LEGACY_DATA)},
+        )
+        self.stdout.write(self.style.SUCCESS(f'기존 모델을 {artifact.version} 버전으로 등록하고 활성화했습니다.'))
+
+    def backfill_legacy(self):
+        updated = registry.backfill_legacy_data()
+        if not updated:
+            self.stdout.write('갱신할 버전이 없습니다.')
+            return
+        for version in updated:
+            self.stdout.write(f'{version}: data.symptom_encoding={registry.LEGACY_SYMPTOM_ENCODING}')
+        self.stdout.write(self.style.SUCCESS(f'{len(updated)}개 버전의 manifest를 갱신했습니다.'))
@@ -0,0 +1,115 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import chart_cache, chart_prerender, charts
+
+
+class Command(BaseCommand):
+    help = '시각화 차트를 요청과 별도로 미리 렌더링하여 차트 캐시에 게시 (run: 데이터 버전 감시, status: 워커 상태)'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        run = subparsers.add_parser('run', help='interval초마다 데이터 버전을 확인하여 새 버전의 차트를 렌더링/게시')
+        run.add_argument('--interval', type=float, default=chart_prerender.DEFAULT_INTERVAL,
+                         help=f'데이터 버전 확인 간격(초) (기본: {chart_prerender.DEFAULT_INTERVAL})')
+        run.add_argument('--jobs', type=int, default=2, help='동시에 렌더링하는 프로세스 수 (기본: 2)')
+        run.add_argument('--once', action='store_true', help='한 번만 확인하고 종료')
+        run.add_argument('--local', action='store_true',
+                         help='프로세스 풀 없이 현재 프로세스에서 렌더링하고 local 백엔드도 허용 (테스트용)')
+        run.add_argument('--formats', nargs='+', choices=list(charts.FORMATS),
+                         help='렌더링할 형식 (기본: CHART_CACHE의 PRERENDER_FORMATS)')
+        run.add_argument('--dpi', nargs='+', type=int, choices=charts.DPI_CHOICES,
+                         help='렌더링할 해상도 (기본: CHART_CACHE의 PRERENDER_DPI)')
+        subparsers.add_parser('status', help='게시된 데이터 버전과 워커 상태/렌더링 시간 출력')
+
+    def handle(self, *args, **options):
+        cache = chart_cache.get_cache()
+        if cache is None:
+            raise CommandError('차트 캐시가 비활성화되어 있습니다 (CHART_CACHE의 ENABLED).')
+        if options['action'] == 'run':
+            self.run(cache, options)
+        elif options['action'] == 'status':
+            self.show_status(cache)
+
+    def run(self, cache, options):
+        if cache.backend == 'local' and not options['local']:
+            raise CommandError(
+                'local 백엔드는 웹 서버와 공유되지 않습니다. CHART_CACHE의 BACKEND를 files 또는 django로 설정하거나 '
+                '--local로 실행하세요.'
+            )
+        if cache.backend == 'django':
+            from django.core.cache import caches
+
+            if type(caches[cache.alias]).__name__ == 'LocMemCache':
+                self.stdout.write(self.style.WARNING(
+                    f"CACHES['{cache.alias}']가 LocMemCache라서 웹 서버와 공유되지 않습니다."
+                ))
+
+        from lungcancer.views import _visualization_summary
+
+        config = getattr(settings, 'CHART_CACHE', {})
+        jobs = 1 if options['local'] else max(1, options['jobs'])
+        prerenderer = chart_prerender.Prerenderer(
+            cache,
+            formats=options['formats'] or config.get('PRERENDER_FORMATS', ('png',)),
+            dpis=options['dpi'] or config.get('PRERENDER_DPI', (charts.DEFAULT_DPI,)),
+            jobs=jobs,
+            mode='local' if options['local'] else 'daemon',
+        )
+
+        # SIGTERM/Ctrl+C를 받으면 현재 확인을 마치고 종료
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        self.stdout.write(
+            f"차트 미리 렌더링 시작 ({cache.backend} 백엔드, 프로세스 {jobs}개, "
+            f"{'한 번' if options['once'] else str(options['interval']) + '초마다'} 확인)"
+        )
+        try:
+            chart_prerender.run(
+                prerenderer, _visualization_summary, interval=options['interval'], stop=stop, once=options['once'],
+            )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            prerenderer.close()
+        metrics = prerenderer.metrics
+        self.stdout.write(self.style.SUCCESS(
+            f"종료: 확인 {metrics['checks']}회, 게시 {metrics['published']}회, 실패 {metrics['failures']}회"
+        ))
+
+    def show_status(self, cache):
+        published = cache.get_published()
+        if published is None:
+            self.stdout.write('게시된 데이터 버전이 없습니다.')
+        else:
+            self.stdout.write(
+                f"게시 버전 {published['version']} ({time.time() - published['published_at']:.0f}초 전)"
+            )
+
+        worker = cache.get_worker()
+        if worker is None:
+            self.stdout.write('워커 기록이 없습니다 (차트 요청에서 렌더링).')
+            return
+        stale_timeout = getattr(settings, 'CHART_CACHE', {}).get('STALE_TIMEOUT', 60)
+        age = time.time() - worker['heartbeat']
+        state = '동작 중' if age <= stale_timeout else '응답 없음'
+        self.stdout.write(
+            f"워커 {state}: pid {worker['pid']}, {worker['mode']}, 프로세스 {worker['jobs']}개, "
+            f"마지막 확인 {age:.0f}초 전"
+        )
+        metrics = worker['metrics']
+        self.stdout.write(
+            f"확인 {metrics['checks']}회, 게시 {metrics['published']}회, 실패 {metrics['failures']}회"
+            + (f", 마지막 게시 {metrics['last_duration']:.2f}s" if metrics['last_duration'] is not None else '')
+        )
+        if metrics['last_error']:
+            self.stdout.write(self.style.WARNING(f"마지막 오류: {metrics['last_error']}"))
+        for name, entry in sorted(metrics['renders'].items()):
+            self.stdout.write(
+                f"  {name:<16} {entry['count']:>5}회  평균 {entry['total'] / entry['count'] * 1000:7.1f}ms  "
+                f"최대 {entry['max'] * 1000:7.1f}ms  마지막 {entry['last'] * 1000:7.1f}ms"
+            )
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import rescore
+
+
+class Command(BaseCommand):
+    help = '저장된 예측 결과(lung_result, Patient)를 모델 버전(기본: 활성 버전)으로 다시 계산'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', default='all', choices=['all', *rescore.TARGETS],
+                            help='results: lung_record → lung_result, patients: Patient (기본: all)')
+        parser.add_argument('--model-version', help='사용할 모델 버전 (기본: 활성 버전)')
+        parser.add_argument('--jobs', type=int, default=1, help='예측 프로세스 수 (기본: 1)')
+        parser.add_argument('--chunk-size', type=int, default=rescore.CHUNK_SIZE,
+                            help=f'한 번에 읽고 저장하는 행 수 (기본: {rescore.CHUNK_SIZE})')
+        parser.add_argument('--max-write-rate', type=float, help='초당 최대 저장 행 수 (기본: 제한 없음)')
+        parser.add_argument('--dry-run', action='store_true', help='저장하지 않고 바뀔 행의 통계와 예시만 출력')
+        parser.add_argument('--samples', type=int, default=rescore.DEFAULT_SAMPLES,
+                            help=f'출력할 변경 예시 수 (기본: {rescore.DEFAULT_SAMPLES})')
+        parser.add_argument('--restart', action='store_true', help='체크포인트를 무시하고 처음부터 다시 계산')
+        parser.add_argument('--database', default='heart_db', help='lung_record/lung_result 데이터베이스 별칭')
+
+    def handle(self, *args, **options):
+        targets = rescore.TARGETS if options['target'] == 'all' else (options['target'],)
+        for target in targets:
+            self.stdout.write(f"{target} 재계산{' (dry-run)' if options['dry_run'] else ''}...")
+            try:
+                report = rescore.rescore(
+                    target,
+                    version=options['model_version'],
+                    jobs=max(1, options['jobs']),
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run'],
+                    max_write_rate=options['max_write_rate'],
+                    restart=options['restart'],
+                    using=options['database'],
+                    samples=options['samples'],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            self.stdout.write(self.style.SUCCESS(f'{target}: {rescore.summarize(report)}'))
+            for sample in report['samples'][:options['samples']]:
+                self.stdout.write(f'  {json.dumps(sample, ensure_ascii=False)}')
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from lungcancer import result_rollup
+
+
+class Command(BaseCommand):
+    help = 'lung_result 일별 집계 테이블 관리 (backfill, reconcile, 상태 확인)'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        backfill = subparsers.add_parser('backfill', help='watermark 이후의 lung_result 행을 집계에 반영 (처음이면 전체)')
+        backfill.add_argument('--rebuild', action='store_true', help='기존 집계를 지우고 처음부터 다시 집계')
+        reconcile = subparsers.add_parser('reconcile', help='원본을 다시 집계하여 저장된 집계와 비교')
+        reconcile.add_argument('--fix', action='store_true', help='차이가 있으면 집계를 원본에 맞게 수정')
+        subparsers.add_parser('status', help='집계 상태 출력')
+        for subparser in (backfill, reconcile):
+            subparser.add_argument('--chunk-size', type=int, default=result_rollup.BULK_CHUNK_SIZE * 10,
+                                   help='한 번에 집계하는 lung_result 행 수')
+            subparser.add_argument('--database', default='heart_db', help='lung_result 데이터베이스 별칭')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'backfill':
+            self.backfill(options)
+        elif action == 'reconcile':
+            self.reconcile(options)
+        elif action == 'status':
+            self.show_status()
+
+    def backfill(self, options):
+        if options['rebuild']:
+            result_rollup.reset()
+            self.stdout.write('기존 집계를 삭제했습니다.')
+        processed = result_rollup.catch_up(
+            using=options['database'], chunk_size=options['chunk_size'], create=True, verbose=True,
+        )
+        status = result_rollup.status()
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed}행 반영 (watermark {status['watermark']}, 집계 {status['rows']}행, {status['days']}일)"
+        ))
+
+    def reconcile(self, options):
+        report = result_rollup.reconcile(
+            using=options['database'], chunk_size=options['chunk_size'], fix=options['fix'],
+        )
+        if report is None:
+            raise CommandError('집계 테이블이 없습니다. 먼저 backfill을 실행하세요.')
+        summary = (f"watermark {report['watermark']}, 집계 키 {report['keys']}개 - "
+                   f"누락 {report['missing']}, 불필요 {report['extra']}, 불일치 {report['mismatched']}")
+        if not (report['missing'] or report['extra'] or report['mismatched']):
+            self.stdout.write(self.style.SUCCESS(f'일치: {summary}'))
+        elif report['fixed']:
+            self.stdout.write(self.style.SUCCESS(f'수정 완료: {summary}'))
+        else:
+            self.stdout.write(self.style.WARNING(f'차이 있음: {summary} (--fix로 수정)'))
+
+    def show_status(self):
+        status = result_rollup.status()
+        if not status['enabled']:
+            self.stdout.write('집계 테이블을 사용하지 않습니다. backfill을 실행하면 대시보드가 집계 테이블을 사용합니다.')
+            return
+        self.stdout.write(
+            f"watermark {status['watermark']}, 집계 {status['rows']}행, {status['days']}일, "
+            f"마지막 갱신 {status['updated_at']}"
+        )
@@ -1,5 +1,6 @@
 from django.utils.deprecation import MiddlewareMixin
 from .models import VisitorCounter
+from . import model_provider
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,7 @@ class VisitorCounterMiddleware(MiddlewareMixin):
                 '/static/',
                 '/media/',
                 '/admin/',
+                '/api/',
                 '/favicon.ico',
                 '/robots.txt',
             ]
@@ -33,3 +35,17 @@ class VisitorCounterMiddleware(MiddlewareMixin):
             logger.error(f"Visitor counter error: {e}")
         
         return None
+
+
+class ModelReloadMiddleware:
+    """요청 사이에 활성 모델 버전 변경을 확인하여 새 버전을 백그라운드로 로드"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        try:
+            model_provider.check_for_update()
+        except Exception as e:
+            logger.error(f"Model reload check error: {e}")
+        return self.get_response(request)
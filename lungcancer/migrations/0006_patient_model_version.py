@@ -0,0 +1,33 @@
+# Generated by Django 4.2.25 on 2026-10-17 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lungcancer', '0005_visitorcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LungResultModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_id', models.BigIntegerField(unique=True, verbose_name='결과 ID')),
+                ('model_version', models.CharField(max_length=50, verbose_name='모델 버전')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='기록일')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='수정일')),
+            ],
+            options={
+                'verbose_name': '검사 결과 모델 버전',
+                'verbose_name_plural': '검사 결과 모델 버전 목록',
+                'ordering': ['-result_id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='모델 버전'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.25 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lungcancer', '0006_patient_model_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LungResultRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='날짜')),
+                ('gender', models.CharField(max_length=10, verbose_name='성별')),
+                ('age_decade', models.IntegerField(verbose_name='연령대')),
+                ('prediction', models.CharField(max_length=10, verbose_name='예측 결과')),
+                ('risk_band', models.IntegerField(verbose_name='위험도 구간')),
+                ('count', models.BigIntegerField(default=0, verbose_name='건수')),
+                ('age_sum', models.BigIntegerField(default=0, verbose_name='나이 합계')),
+                ('risk_score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20, verbose_name='위험 점수 합계')),
+            ],
+            options={
+                'verbose_name': '검사 결과 일별 집계',
+                'verbose_name_plural': '검사 결과 일별 집계 목록',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LungResultRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('watermark', models.BigIntegerField(default=0, verbose_name='반영된 마지막 결과 ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='생성일')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='수정일')),
+            ],
+            options={
+                'verbose_name': '검사 결과 집계 상태',
+                'verbose_name_plural': '검사 결과 집계 상태',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='lungresultrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'gender', 'age_decade', 'prediction', 'risk_band'), name='unique_lung_result_rollup_key'),
+        ),
+    ]
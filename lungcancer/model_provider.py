@@ -0,0 +1,408 @@
+"""
+예측 모델 제공 모듈
+
+모델 저장소(registry)의 활성 버전을 처음 사용할 때 한 번만 로드합니다. 모듈 import
+시에는 아무것도 로드하지 않으므로 manage.py 명령이나 테스트는 모델 로드 비용을 치르지
+않습니다. 웹 워커는 wsgi.py에서 warm_up()으로 미리 로드할 수 있습니다.
+
+모델, 노드 테이블, 위험도 테이블은 버전 단위의 ModelBundle로 묶여 있으며,
+check_for_update()가 활성 버전 변경을 감지하면 백그라운드에서 새 번들을 로드한 뒤
+참조 하나만 교체합니다. 처리 중인 요청은 이전 번들로 끝까지 예측합니다.
+
+예측/설명 입력의 증상 값은 항상 서빙 인코딩(1=예, 0=아니오, get_symptoms_dict)이며, 번들이
+매니페스트에 기록된 학습 인코딩(registry.symptom_encoding)으로 변환하여 모델에 넣습니다.
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from . import parallelism, registry
+from .batching import BatcherUnavailable, MicroBatcher
+from .explain import TreeExplainer
+from .inference import FlatForest, features_to_array
+from .prediction_cache import PredictionCache, pack_features
+from .risk_table import file_checksum, load_risk_table
+
+logger = logging.getLogger(__name__)
+
+
+class ModelBundle:
+    """한 모델 버전으로 예측하는 데 필요한 객체 묶음 (로드 후 변경하지 않음)
+
+    예측에는 노드 테이블(forest)과 위험도 테이블만 사용합니다. scikit-learn 모델 객체는
+    압축 노드 테이블이 있으면 model 속성에 처음 접근할 때 로드합니다.
+    predict_* / explain_one 은 서빙 인코딩의 특성을 받아 모델의 학습 인코딩으로 변환합니다.
+    """
+
+    # 증상이 아닌 특성 (인코딩 변환 대상에서 제외)
+    NON_SYMPTOM_FEATURES = ('GENDER', 'AGE')
+
+    def __init__(self, artifact, feature_names, forest, risk_table, checksum, model=None):
+        self.artifact = artifact
+        self.version = artifact.version
+        # 같은 버전 이름으로 파일이 바뀌는 legacy 모델도 구분되도록 체크섬을 캐시 키에 포함
+        self.cache_version = f'{artifact.version}-{checksum[:12]}'
+        self.feature_names = feature_names
+        self.symptom_encoding = registry.symptom_encoding(artifact.manifest)
+        self._symptom_offset = registry.SYMPTOM_ENCODINGS[self.symptom_encoding]
+        self._symptom_names = [name for name in feature_names if name not in self.NON_SYMPTOM_FEATURES]
+        self._symptom_columns = np.array(
+            [i for i, name in enumerate(feature_names) if name not in self.NON_SYMPTOM_FEATURES], dtype=np.intp,
+        )
+        self.forest = forest
+        self.risk_table = risk_table
+        self._model = parallelism.pin_model(model) if model is not None else None
+        self._explainer = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # 요청 스레드마다 코어 수만큼 joblib 스레드를 만들지 않도록 n_jobs 고정
+                    self._model = parallelism.pin_model(_load_pickle(self.artifact.model_path))
+        return self._model
+
+    @property
+    def explainer(self):
+        """트리 경로 기여도 계산기 (처음 사용할 때 노드별 기여도를 한 번 계산)"""
+        if self._explainer is None:
+            with self._model_lock:
+                if self._explainer is None:
+                    self._explainer = TreeExplainer(self.forest)
+        return self._explainer
+
+    def model_features(self, features):
+        """서빙 인코딩의 특성 딕셔너리 → 모델 학습 인코딩의 특성 딕셔너리"""
+        if not self._symptom_offset:
+            return features
+        converted = dict(features)
+        for name in self._symptom_names:
+            converted[name] = features[name] + self._symptom_offset
+        return converted
+
+    def model_array(self, X):
+        """서빙 인코딩의 특성 행렬 → 모델 학습 인코딩의 특성 행렬 (변환이 필요하면 복사본)"""
+        if not self._symptom_offset:
+            return X
+        X = X.copy()
+        X[:, self._symptom_columns] += self._symptom_offset
+        return X
+
+    def explain_one(self, features, top=None):
+        """특성별 기여도 (explain.TreeExplainer.explain_one)"""
+        return self.explainer.explain_one(self.model_features(features), top=top)
+
+    def predict_one(self, features):
+        """(라벨, 양성 확률) - 위험도 테이블 조회, 범위 밖이면 포레스트 사용"""
+        features = self.model_features(features)
+        if self.risk_table is not None:
+            hit = self.risk_table.predict_one(features)
+            if hit is not None:
+                return hit
+        return self.forest.predict_one(features)
+
+    def predict_batch(self, rows):
+        """(라벨 배열, 양성 확률 배열)"""
+        return self.predict_array(features_to_array(rows, self.feature_names))
+
+    def predict_array(self, X):
+        """(라벨 배열, 양성 확률 배열) - X는 feature_names 순서의 float32 특성 행렬 (서빙 인코딩)"""
+        X = self.model_array(X)
+        if self.risk_table is None:
+            labels, proba = self.forest.predict(X)
+            return labels, proba[:, 1]
+
+        labels, probabilities, covered = self.risk_table.lookup(X)
+        if not covered.all():
+            # 테이블 범위 밖의 행만 포레스트로 한 번에 예측
+            missing = ~covered
+            forest_labels, forest_proba = self.forest.predict(X[missing])
+            labels[missing] = forest_labels
+            probabilities[missing] = forest_proba[:, 1]
+        return labels, probabilities
+
+
+def _mmap_mode():
+    # ML_MODEL_MMAP_MODE=None 이면 메모리 매핑을 사용하지 않고 전체 읽기
+    return getattr(settings, 'ML_MODEL_MMAP_MODE', 'r')
+
+
+def _load_pickle(path):
+    import joblib
+
+    # 압축되지 않은 joblib 파일의 배열은 메모리 매핑으로 읽음
+    return joblib.load(path, mmap_mode=_mmap_mode())
+
+
+def load_bundle(artifact):
+    """ModelArtifact의 파일로 ModelBundle 생성
+
+    압축 노드 테이블(forest/)이 현재 모델 파일과 일치하면 pickle을 읽지 않고 메모리 매핑으로
+    로드하고, 없으면 기존처럼 joblib 모델에서 노드 테이블을 만듭니다.
+    """
+    checksum = file_checksum(artifact.model_path)
+    if artifact.manifest.get('checksum', checksum) != checksum:
+        raise ValueError(f'모델 파일 체크섬이 매니페스트와 다릅니다: {artifact.version}')
+
+    risk_table = load_risk_table(artifact.risk_table_dir, artifact.model_path, model_checksum=checksum)
+
+    try:
+        forest, header = FlatForest.load_compact(artifact.forest_dir, mmap_mode=_mmap_mode())
+    except FileNotFoundError:
+        header = None
+    if header is not None and header.get('model_checksum') != checksum:
+        logger.warning(f"노드 테이블이 현재 모델과 일치하지 않아 사용하지 않습니다: {artifact.forest_dir}")
+        header = None
+    if header is not None:
+        return ModelBundle(
+            artifact=artifact,
+            feature_names=header['feature_names'],
+            forest=forest,
+            risk_table=risk_table,
+            checksum=checksum,
+        )
+
+    import joblib
+
+    model = _load_pickle(artifact.model_path)
+    feature_names = joblib.load(artifact.feature_path)
+    return ModelBundle(
+        artifact=artifact,
+        feature_names=feature_names,
+        forest=FlatForest.from_sklearn(model, feature_names),
+        risk_table=risk_table,
+        checksum=checksum,
+        model=model,
+    )
+
+
+_lock = threading.RLock()
+_bundle = None
+_batcher = None
+_cache = None
+_active_stamp = None
+_next_check = 0.0
+_reloading = None
+_failed_stamp = None
+
+# 마이크로 배치 실패 시 직접 예측으로 넘어간 횟수 (로그는 간격당 한 번만 남김)
+FALLBACK_LOG_INTERVAL = 60.0
+_fallbacks = 0
+_fallbacks_logged = 0
+_fallback_logged_at = None
+
+
+def get_bundle():
+    """현재 활성 모델 번들 (처음 호출 시 로드)"""
+    global _bundle, _active_stamp
+    bundle = _bundle
+    if bundle is not None:
+        return bundle
+    with _lock:
+        if _bundle is None:
+            _active_stamp = registry.active_stamp()
+            _bundle = load_bundle(registry.active_artifact())
+        return _bundle
+
+
+def check_for_update():
+    """활성 버전이 바뀌었으면 백그라운드에서 새 번들을 로드 (요청 사이에 호출)
+
+    ML_MODEL_RELOAD_INTERVAL 초에 한 번만 ACTIVE 파일을 stat 하므로 요청마다 호출해도 됩니다.
+    """
+    global _next_check, _reloading
+    interval = getattr(settings, 'ML_MODEL_RELOAD_INTERVAL', 5)
+    now = time.monotonic()
+    if interval is None or _bundle is None or now < _next_check:
+        return False
+    _next_check = now + interval
+
+    stamp = registry.active_stamp()
+    if stamp == _active_stamp or stamp == _failed_stamp:
+        return False
+
+    with _lock:
+        if _reloading is not None and _reloading.is_alive():
+            return False
+        _reloading = threading.Thread(target=_reload, args=(stamp,), name='model-reload', daemon=True)
+        _reloading.start()
+    return True
+
+
+def _reload(stamp):
+    global _bundle, _active_stamp, _failed_stamp
+    try:
+        bundle = load_bundle(registry.active_artifact())
+        bundle.predict_one({name: 0 for name in bundle.feature_names})
+    except Exception as e:
+        _failed_stamp = stamp
+        logger.exception(f"새 모델 버전 로드 실패, 기존 버전 유지: {e}")
+        return
+
+    with _lock:
+        # 참조 교체는 원자적이므로 진행 중인 요청은 이전 번들을 그대로 사용
+        _bundle = bundle
+        _active_stamp = stamp
+    logger.info(f"모델 버전 교체 완료: {bundle.version}")
+
+
+def get_model():
+    """학습된 모델"""
+    return get_bundle().model
+
+
+def get_feature_names():
+    """모델 학습 시 특성 순서"""
+    return get_bundle().feature_names
+
+
+def get_forest():
+    """평탄화된 노드 테이블 (sklearn과 동일한 결과, 단일 순회)"""
+    return get_bundle().forest
+
+
+def get_risk_table():
+    """사전 계산된 위험도 테이블 (없거나 모델과 맞지 않으면 None)"""
+    return get_bundle().risk_table
+
+
+def get_model_version():
+    return get_bundle().version
+
+
+def get_batcher():
+    """마이크로 배치 예측기 (비활성화 시 None)"""
+    global _batcher
+    config = getattr(settings, 'PREDICTION_BATCHING', {})
+    if not config.get('ENABLED', True):
+        return None
+    if _batcher is None:
+        with _lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    _predict_batch_rows,
+                    max_batch_size=config.get('MAX_BATCH_SIZE', 64),
+                    max_wait=config.get('MAX_WAIT_MS', 2) / 1000,
+                    max_queue=config.get('MAX_QUEUE', 1024),
+                    timeout=config.get('TIMEOUT_MS', 1000) / 1000,
+                )
+    return _batcher
+
+
+def get_prediction_cache():
+    """특성 벡터 기반 예측 캐시 (비활성화 시 None)"""
+    global _cache
+    config = getattr(settings, 'PREDICTION_CACHE', {})
+    if not config.get('ENABLED', True):
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = PredictionCache(
+                    backend=config.get('BACKEND', 'local'),
+                    max_size=config.get('MAX_SIZE', 4096),
+                    ttl=config.get('TTL', 3600),
+                    alias=config.get('ALIAS', 'default'),
+                )
+    return _cache
+
+
+def _predict_batch_rows(rows):
+    """마이크로 배치용 - 행별 (라벨, 양성 확률, 모델 버전) 목록"""
+    bundle = get_bundle()
+    labels, probabilities = bundle.predict_batch(rows)
+    return [(labels[i], float(probabilities[i]), bundle.version) for i in range(len(rows))]
+
+
+def predict_features_direct(features):
+    """특성 딕셔너리 한 건 예측 - (라벨, 양성 확률, 모델 버전)"""
+    bundle = get_bundle()
+    label, probability = bundle.predict_one(features)
+    return label, probability, bundle.version
+
+
+def predict_features_batch(rows):
+    """특성 딕셔너리 목록 일괄 예측 - (라벨 배열, 양성 확률 배열, 모델 버전)"""
+    bundle = get_bundle()
+    labels, probabilities = bundle.predict_batch(rows)
+    return labels, probabilities, bundle.version
+
+
+def predict_features(features):
+    """특성 딕셔너리 한 건 예측 - 예측 캐시 조회 후 마이크로 배치 경유
+    (과부하/시간 초과 시 직접 예측)
+
+    (라벨, 양성 확률, 모델 버전)을 반환합니다.
+    """
+    # 모델 로드 시간이 배치 대기 시간 제한에 포함되지 않도록 먼저 로드
+    bundle = get_bundle()
+
+    cache = get_prediction_cache()
+    if cache is not None:
+        packed = pack_features(features, bundle.feature_names)
+        hit = cache.get(bundle.cache_version, packed)
+        if hit is not None:
+            return hit[0], hit[1], bundle.version
+
+    result = None
+    batcher = get_batcher()
+    if batcher is not None:
+        try:
+            result = batcher.submit(features)
+        except BatcherUnavailable as e:
+            _log_batcher_fallback(e)
+    if result is None:
+        result = predict_features_direct(features)
+
+    label, probability, version = result
+    if cache is not None and version == bundle.version:
+        cache.set(bundle.cache_version, packed, (int(label), float(probability)))
+    return result
+
+
+def _log_batcher_fallback(error):
+    """배치 실패를 세고 FALLBACK_LOG_INTERVAL마다 한 번만 경고 (과부하 시 로그 폭주 방지)"""
+    global _fallbacks, _fallbacks_logged, _fallback_logged_at
+    now = time.monotonic()
+    with _lock:
+        _fallbacks += 1
+        if _fallback_logged_at is not None and now - _fallback_logged_at < FALLBACK_LOG_INTERVAL:
+            return
+        skipped = _fallbacks - _fallbacks_logged - 1
+        _fallbacks_logged = _fallbacks
+        _fallback_logged_at = now
+    suffix = f" (직전 경고 이후 {skipped}건 생략, 누적 {_fallbacks}건)" if skipped else ''
+    logger.warning(f"마이크로 배치 사용 불가, 직접 예측: {error}{suffix}")
+
+
+def fallback_count():
+    """마이크로 배치 대신 직접 예측한 누적 횟수"""
+    return _fallbacks
+
+
+def explain_features(features, top=None, version=None):
+    """특성 딕셔너리 한 건의 특성별 기여도 (explain.TreeExplainer.explain_one + 모델 버전)
+
+    version을 지정하면 그 버전의 번들로 설명합니다. 저장된 결과를 계산한 버전이 현재 로드된
+    버전이 아니면(교체되었거나 기록되지 않은 경우) 다른 모델의 설명이 되므로 None을 반환합니다.
+    """
+    bundle = get_bundle()
+    if version is not None and version != bundle.version:
+        return None
+    explanation = bundle.explain_one(features, top=top)
+    explanation['model_version'] = bundle.version
+    return explanation
+
+
+def warm_up():
+    """활성 모델을 미리 로드하고 예측 한 건을 수행 (웹 워커 시작 시)"""
+    bundle = get_bundle()
+    get_batcher()
+    bundle.predict_one({name: 0 for name in bundle.feature_names})
+    bundle.explainer
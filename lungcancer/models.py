@@ -42,6 +42,7 @@ class Patient(models.Model):
     # 예측 결과
     prediction = models.CharField('예측 결과', max_length=10, blank=True, null=True)
     prediction_probability = models.FloatField('예측 확률', blank=True, null=True)
+    model_version = models.CharField('모델 버전', max_length=50, blank=True, default='')
     
     # 메타 정보
     created_at = models.DateTimeField('등록일', auto_now_add=True)
@@ -308,6 +309,65 @@ class LungResult(models.Model):
         return f"{self.name} ({gender_str}, {self.age}세) - {self.prediction} ({self.risk_score}%)"
 
 
+class LungResultModelVersion(models.Model):
+    """lung_result 행을 계산한 모델 버전 (외부 테이블은 수정할 수 없어 별도 테이블에 기록)"""
+    
+    result_id = models.BigIntegerField('결과 ID', unique=True)
+    model_version = models.CharField('모델 버전', max_length=50)
+    created_at = models.DateTimeField('기록일', auto_now_add=True)
+    updated_at = models.DateTimeField('수정일', auto_now=True)
+    
+    class Meta:
+        verbose_name = '검사 결과 모델 버전'
+        verbose_name_plural = '검사 결과 모델 버전 목록'
+        ordering = ['-result_id']
+    
+    def __str__(self):
+        return f"결과 #{self.result_id} - {self.model_version}"
+
+
+class LungResultRollup(models.Model):
+    """lung_result 일별 집계 (대시보드용, result_rollup 모듈이 갱신)"""
+    
+    day = models.DateField('날짜')  # UTC 기준
+    gender = models.CharField('성별', max_length=10)  # '남성' / '여성'
+    age_decade = models.IntegerField('연령대')  # 10세 단위
+    prediction = models.CharField('예측 결과', max_length=10)  # 'YES' / 'NO'
+    risk_band = models.IntegerField('위험도 구간')  # 위험 점수 5% 단위 (0~19, result_stats.RISK_BIN_EDGES)
+    count = models.BigIntegerField('건수', default=0)
+    age_sum = models.BigIntegerField('나이 합계', default=0)
+    risk_score_sum = models.DecimalField('위험 점수 합계', max_digits=20, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = '검사 결과 일별 집계'
+        verbose_name_plural = '검사 결과 일별 집계 목록'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'gender', 'age_decade', 'prediction', 'risk_band'],
+                name='unique_lung_result_rollup_key',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.gender} {self.age_decade}대 {self.prediction} 구간 {self.risk_band} - {self.count}건"
+
+
+class LungResultRollupState(models.Model):
+    """lung_result 집계 진행 상태 (한 행, watermark 이하 result_id가 집계에 반영됨)"""
+    
+    watermark = models.BigIntegerField('반영된 마지막 결과 ID', default=0)
+    created_at = models.DateTimeField('생성일', auto_now_add=True)
+    updated_at = models.DateTimeField('수정일', auto_now=True)
+    
+    class Meta:
+        verbose_name = '검사 결과 집계 상태'
+        verbose_name_plural = '검사 결과 집계 상태'
+    
+    def __str__(self):
+        return f"집계 watermark: 결과 #{self.watermark}"
+
+
 class VisitorCounter(models.Model):
     """일일 방문자 카운터 모델"""
     
@@ -0,0 +1,155 @@
+"""
+웹 워커의 추론 병렬도 설정
+
+scikit-learn(joblib), OpenMP, BLAS(OpenBLAS/MKL)는 각자 CPU 수만큼 스레드를 만들기 때문에,
+gunicorn 워커 여러 개가 동시에 예측하면 코어 수보다 훨씬 많은 스레드가 경쟁하여
+꼬리 지연 시간(p99)이 늘어납니다. 이 모듈은 사용 가능한 코어 수(CPU affinity와 cgroup
+CPU 제한 반영)를 기준으로 워커 수, 워커당 웹 스레드 수, 워커당 추론 스레드 수를 정하고
+(plan), 스레드 라이브러리가 로드되기 전에 환경 변수로 고정합니다 (configure).
+
+- 워커 수: GUNICORN_WORKERS (기본 코어 수 * 2 + 1)
+- 워커당 웹 스레드 수: GUNICORN_THREADS (기본 1)
+- 워커당 추론 스레드 수 (OpenMP/BLAS 스레드, scikit-learn n_jobs): ML_INFERENCE_THREADS
+  (기본 코어 수 // (워커 수 * 웹 스레드 수), 최소 1)
+
+이 모듈은 Django나 NumPy를 import하지 않으므로 gunicorn.conf.py와 wsgi.py 맨 앞에서
+사용할 수 있습니다. 이미 설정된 OMP_NUM_THREADS 등의 환경 변수는 덮어쓰지 않습니다.
+"""
+
+import math
+import os
+
+
+# 추론 스레드 수로 고정하는 스레드 라이브러리 환경 변수 (라이브러리 로드 시 한 번 읽음)
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'BLIS_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+
+
+def _cgroup_cpu_limit():
+    """cgroup CPU 할당량(코어 수, 소수 가능) - 제한이 없으면 None"""
+    try:
+        # cgroup v2: "<quota> <period>" (제한 없음은 "max <period>")
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    """이 프로세스가 실제로 사용할 수 있는 코어 수 (affinity와 cgroup 제한 중 작은 값)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity가 없는 플랫폼 (macOS, Windows)
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def plan(cpus=None, workers=None, threads=None, inference_threads=None):
+    """워커/스레드 구성 {'cpus', 'workers', 'threads', 'inference_threads', 'oversubscription'}
+
+    지정하지 않은 값은 환경 변수, 없으면 코어 수 기준 기본값을 사용합니다.
+    oversubscription은 동시에 돌 수 있는 추론 스레드 수 / 코어 수입니다.
+    """
+    cpus = cpus or available_cpus()
+    workers = workers or _env_int('GUNICORN_WORKERS') or cpus * 2 + 1
+    threads = threads or _env_int('GUNICORN_THREADS') or 1
+    inference_threads = (
+        inference_threads or _env_int('ML_INFERENCE_THREADS') or max(1, cpus // (workers * threads))
+    )
+    return {
+        'cpus': cpus,
+        'workers': workers,
+        'threads': threads,
+        'inference_threads': inference_threads,
+        'oversubscription': round(workers * threads * inference_threads / cpus, 2),
+    }
+
+
+def configure(config=None):
+    """구성을 환경 변수로 고정 (NumPy/scikit-learn import 전에 호출해야 스레드 풀에 반영됨)
+
+    fork/exec된 워커와 자식 프로세스도 같은 값을 물려받습니다. 적용된 구성을 반환합니다.
+    """
+    config = config or plan()
+    os.environ['GUNICORN_WORKERS'] = str(config['workers'])
+    os.environ['GUNICORN_THREADS'] = str(config['threads'])
+    os.environ['ML_INFERENCE_THREADS'] = str(config['inference_threads'])
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(config['inference_threads']))
+    return config
+
+
+def inference_threads():
+    """워커당 추론 스레드 수 (scikit-learn 모델의 n_jobs)"""
+    return plan()['inference_threads']
+
+
+def limit_threadpools(n_threads=None):
+    """이미 로드된 OpenMP/BLAS 스레드 풀을 n_threads(기본: 추론 스레드 수)로 제한
+
+    환경 변수는 라이브러리 로드 시에만 읽히므로, 그 전에 로드된 라이브러리(preload된 마스터 등)에는
+    threadpoolctl로 직접 적용합니다.
+    """
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=n_threads or inference_threads())
+
+
+def pin_model(model, n_jobs=None):
+    """scikit-learn 모델의 n_jobs를 추론 스레드 수로 고정 (n_jobs가 없는 모델은 그대로)"""
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = n_jobs or inference_threads()
+    return model
+
+
+def diagnostics():
+    """현재 프로세스의 실제 병렬도 설정 (진단 API용)"""
+    try:
+        affinity = len(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = None
+
+    # threadpoolctl은 scikit-learn 의존성
+    from threadpoolctl import threadpool_info
+
+    return {
+        'pid': os.getpid(),
+        'cpu_count': os.cpu_count(),
+        'affinity_cpus': affinity,
+        'cgroup_cpu_limit': _cgroup_cpu_limit(),
+        'config': plan(),
+        'environment': {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        # 현재 로드된 OpenMP/BLAS 라이브러리별 스레드 수
+        'threadpools': [
+            {key: info.get(key) for key in ('user_api', 'internal_api', 'num_threads', 'version')}
+            for info in threadpool_info()
+        ],
+    }
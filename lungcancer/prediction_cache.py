@@ -0,0 +1,124 @@
+"""
+특성 벡터 기반 예측 결과 캐시
+
+설문 입력(성별, 나이, 이진 증상)은 가짓수가 적어 같은 특성 벡터가 반복해서 들어옵니다.
+특성 벡터를 모델 특성 순서대로 float32 바이트로 묶은 값과 모델 버전을 키로 하여
+(라벨, 양성 확률)을 보관합니다.
+
+- local: 프로세스 내부 LRU (최대 항목 수, TTL)
+- django: Django 캐시 프레임워크(settings.CACHES) - 여러 워커가 공유
+
+키에 모델 버전이 포함되므로 모델이 바뀌면 이전 항목은 더 이상 조회되지 않으며,
+local 백엔드는 버전 변경을 감지하면 즉시 비웁니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+KEY_PREFIX = 'lungpred'
+
+
+def pack_features(features, feature_names):
+    """특성 딕셔너리를 모델 입력과 같은 float32 바이트로 변환 (같은 입력 → 같은 키)"""
+    return np.array([features[name] for name in feature_names], dtype=np.float32).tobytes()
+
+
+class PredictionCache:
+    """(모델 버전, 특성 벡터) → (라벨, 양성 확률) 캐시"""
+
+    def __init__(self, backend='local', max_size=4096, ttl=3600, alias='default'):
+        if backend not in ('local', 'django'):
+            raise ValueError(f'지원하지 않는 예측 캐시 백엔드입니다: {backend}')
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self.alias = alias
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _django_cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def _key(self, version, packed):
+        return f'{KEY_PREFIX}:{version}:{packed.hex()}'
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, version, packed):
+        """캐시된 (라벨, 양성 확률) 또는 None"""
+        if self.backend == 'django':
+            value = self._django_cache().get(self._key(version, packed))
+            self._count('misses' if value is None else 'hits')
+            return value
+
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._invalidate(version)
+            entry = self._entries.get(packed)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[packed]
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(packed)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def set(self, version, packed, value):
+        if self.backend == 'django':
+            self._django_cache().set(self._key(version, packed), value, timeout=self.ttl)
+            self._count('sets')
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            if version != self._version:
+                # 조회 이후 모델이 교체되었으면 다른 버전의 결과는 저장하지 않음
+                if self._version is not None:
+                    return
+                self._version = version
+            self._entries[packed] = (value, expires)
+            self._entries.move_to_end(packed)
+            self._stats['sets'] += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _invalidate(self, version):
+        # self._lock 안에서 호출
+        if self._entries:
+            self._stats['invalidations'] += 1
+        self._entries.clear()
+        self._version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        """적중/미적중 횟수와 현재 크기 (django 백엔드의 횟수는 이 프로세스 기준)"""
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['backend'] = self.backend
+        stats['config'] = {'max_size': self.max_size, 'ttl': self.ttl}
+        if self.backend == 'local':
+            stats['size'] = size
+        else:
+            stats['config']['alias'] = self.alias
+        return stats
@@ -0,0 +1,265 @@
+"""
+버전별 모델 저장소
+
+ml_model/registry/ 아래에 학습된 모델을 버전별 디렉터리로 보관합니다.
+
+    registry/
+        ACTIVE                      # 현재 사용 중인 버전 이름
+        versions/<버전>/
+            manifest.json           # 버전, 특성 목록, 학습 지표, 체크섬
+            lung_cancer_model.pkl
+            feature_names.pkl
+            forest/                 # pickle 없는 노드 테이블 (.npy, 예측에 사용, 선택적으로 압축)
+            risk_table/             # 위험도 조회 테이블
+
+새 버전은 임시 디렉터리에 모두 쓴 뒤 이름을 바꿔 게시하고, ACTIVE 파일도 임시 파일을
+os.replace로 교체하므로 읽는 쪽은 항상 완성된 버전만 보게 됩니다.
+저장소가 비어 있으면 기존 위치(ml_model/lung_cancer_model.pkl)의 모델을 'legacy'
+버전으로 사용합니다.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+from .compression import compress_forest
+from .inference import FlatForest, verify_compact_forest
+from .risk_table import build_risk_table, file_checksum
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(current_dir, 'ml_model')
+REGISTRY_DIR = os.path.join(MODEL_DIR, 'registry')
+VERSIONS_DIR = os.path.join(REGISTRY_DIR, 'versions')
+ACTIVE_PATH = os.path.join(REGISTRY_DIR, 'ACTIVE')
+
+LEGACY_VERSION = 'legacy'
+
+# 서빙 경로에 들어오는 증상 값 인코딩 (LungRecord.get_symptoms_dict, training_data.encode_features)
+SERVING_SYMPTOM_ENCODING = '1=yes,0=no'
+
+# 학습 데이터의 증상 값 인코딩 (manifest의 data.symptom_encoding) → 서빙 값에 더하면 학습 값이 되는 차이
+SYMPTOM_ENCODINGS = {
+    '1=yes,0=no': 0,    # --source db (training_data)
+    '2=yes,1=no': 1,    # 학습 CSV
+}
+# 인코딩이 기록되지 않은 매니페스트(legacy 모델, 기록 이전에 게시한 버전)의 학습 인코딩 - 모두 학습 CSV로 학습됨
+LEGACY_SYMPTOM_ENCODING = '2=yes,1=no'
+# 기존 모델(ml_model/lung_cancer_model.pkl)의 학습 데이터 정보 (import-legacy로 등록한 버전의 manifest data)
+LEGACY_DATA = {'source': 'csv', 'symptom_encoding': LEGACY_SYMPTOM_ENCODING}
+MODEL_FILE = 'lung_cancer_model.pkl'
+FEATURE_FILE = 'feature_names.pkl'
+FOREST_DIRNAME = 'forest'
+RISK_TABLE_DIRNAME = 'risk_table'
+MANIFEST_FILE = 'manifest.json'
+
+
+class ModelArtifact:
+    """한 버전의 모델 파일 경로와 매니페스트"""
+
+    def __init__(self, version, directory, manifest=None):
+        self.version = version
+        self.directory = directory
+        self.manifest = manifest or {}
+
+    @property
+    def model_path(self):
+        return os.path.join(self.directory, MODEL_FILE)
+
+    @property
+    def feature_path(self):
+        return os.path.join(self.directory, FEATURE_FILE)
+
+    @property
+    def forest_dir(self):
+        return os.path.join(self.directory, FOREST_DIRNAME)
+
+    @property
+    def risk_table_dir(self):
+        return os.path.join(self.directory, RISK_TABLE_DIRNAME)
+
+    def __repr__(self):
+        return f'<ModelArtifact {self.version}>'
+
+
+def version_dir(version):
+    return os.path.join(VERSIONS_DIR, version)
+
+
+def read_manifest(version):
+    with open(os.path.join(version_dir(version), MANIFEST_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_manifest(version, manifest):
+    """게시된 버전의 manifest.json 교체 (임시 파일을 os.replace로 바꿔 읽는 쪽이 쓰는 중인 파일을 보지 않음)"""
+    path = os.path.join(version_dir(version), MANIFEST_FILE)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def backfill_legacy_data():
+    """학습 데이터 정보 없이 import-legacy로 등록된 버전의 manifest에 LEGACY_DATA 기록 - 갱신한 버전 목록"""
+    updated = []
+    for version in list_versions():
+        manifest = read_manifest(version)
+        if manifest.get('source') == LEGACY_VERSION and 'data' not in manifest:
+            manifest['data'] = dict(LEGACY_DATA)
+            write_manifest(version, manifest)
+            updated.append(version)
+    return updated
+
+
+def list_versions():
+    """게시된 버전 이름 목록 (오래된 순)"""
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(VERSIONS_DIR)
+        if not name.startswith('.') and os.path.exists(os.path.join(VERSIONS_DIR, name, MANIFEST_FILE))
+    )
+
+
+def active_version():
+    """ACTIVE 파일에 기록된 버전 (없으면 None)"""
+    try:
+        with open(ACTIVE_PATH, encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def active_stamp():
+    """활성 버전 변경 감지용 값 - ACTIVE 파일의 수정 시각과 크기 (stat 한 번)"""
+    try:
+        stat = os.stat(ACTIVE_PATH)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_artifact(version):
+    """버전 이름으로 ModelArtifact 조회 ('legacy'는 기존 위치의 모델)"""
+    if version == LEGACY_VERSION:
+        return ModelArtifact(LEGACY_VERSION, MODEL_DIR)
+    if version not in list_versions():
+        raise ValueError(f'등록되지 않은 모델 버전입니다: {version}')
+    return ModelArtifact(version, version_dir(version), read_manifest(version))
+
+
+def active_artifact():
+    """현재 활성 버전의 ModelArtifact (저장소가 비어 있으면 legacy 모델)"""
+    return get_artifact(active_version() or LEGACY_VERSION)
+
+
+def symptom_encoding(manifest):
+    """매니페스트에 기록된 학습 증상 값 인코딩 (기록이 없으면 학습 CSV 인코딩, LEGACY_SYMPTOM_ENCODING)
+
+    서빙 경로에서 변환할 수 없는 인코딩이면 ValueError.
+    """
+    encoding = (manifest.get('data') or {}).get('symptom_encoding', LEGACY_SYMPTOM_ENCODING)
+    if encoding not in SYMPTOM_ENCODINGS:
+        raise ValueError(
+            f'지원하지 않는 증상 값 인코딩입니다: {encoding} (선택: {", ".join(SYMPTOM_ENCODINGS)})'
+        )
+    return encoding
+
+
+def activate(version):
+    """버전을 활성화 (ACTIVE 파일을 원자적으로 교체)
+
+    학습 증상 값 인코딩을 서빙 경로에서 변환할 수 없는 버전은 활성화하지 않습니다 (symptom_encoding).
+    """
+    if version not in list_versions():
+        raise ValueError(f'등록되지 않은 모델 버전입니다: {version}')
+    symptom_encoding(read_manifest(version))
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp_path = f'{ACTIVE_PATH}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, ACTIVE_PATH)
+
+
+def _new_version_name():
+    # Django는 TZ 환경 변수를 TIME_ZONE으로 바꾸므로 실행 방식과 관계없이 정렬되도록 UTC 사용
+    name = datetime.now(timezone.utc).strftime('v%Y%m%d-%H%M%S')
+    existing = set(list_versions())
+    candidate, suffix = name, 1
+    while candidate in existing or os.path.exists(version_dir(candidate)):
+        suffix += 1
+        candidate = f'{name}-{suffix}'
+    return candidate
+
+
+def publish(model, feature_names, metrics=None, params=None, activate_version=True,
+            build_table=True, extra=None, compress=False):
+    """학습된 모델을 새 버전으로 게시하고 ModelArtifact 반환 (compress: 노드 테이블 압축, export_forest 참고)"""
+    import joblib
+    import sklearn
+
+    version = _new_version_name()
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    tmp_dir = os.path.join(VERSIONS_DIR, f'.tmp-{version}-{os.getpid()}')
+    os.makedirs(tmp_dir)
+
+    try:
+        model_path = os.path.join(tmp_dir, MODEL_FILE)
+        joblib.dump(model, model_path)
+        joblib.dump(list(feature_names), os.path.join(tmp_dir, FEATURE_FILE))
+        checksum = file_checksum(model_path)
+        export_forest(model, feature_names, os.path.join(tmp_dir, FOREST_DIRNAME), checksum, compress=compress)
+
+        if build_table:
+            build_risk_table(model, feature_names, model_path, os.path.join(tmp_dir, RISK_TABLE_DIRNAME))
+
+        manifest = {
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'model_class': type(model).__name__,
+            'feature_names': list(feature_names),
+            'metrics': metrics or {},
+            'params': params if params is not None else _json_params(model),
+            'checksum': checksum,
+            'sklearn_version': sklearn.__version__,
+        }
+        if extra:
+            manifest.update(extra)
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        os.rename(tmp_dir, version_dir(version))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if activate_version:
+        activate(version)
+    return ModelArtifact(version, version_dir(version), manifest)
+
+
+def export_forest(model, feature_names, directory, model_checksum, compress=False):
+    """모델을 압축 노드 테이블로 저장하고 원본 모델과 예측이 같은지 검증
+
+    compress=True 이면 임계값 정수화와 중복 서브트리 공유(compression.compress_forest)를 적용합니다.
+    """
+    forest = FlatForest.from_sklearn(model, feature_names)
+    if compress:
+        forest, _ = compress_forest(forest)
+    forest.save_compact(directory, model_checksum=model_checksum)
+    compact, _ = FlatForest.load_compact(directory)
+    verify_compact_forest(model, compact)
+    return compact
+
+
+def _json_params(model):
+    """모델 하이퍼파라미터 중 JSON으로 저장 가능한 값"""
+    params = {}
+    for key, value in model.get_params().items():
+        if value is None or isinstance(value, (bool, int, float, str)):
+            params[key] = value
+        else:
+            params[key] = repr(value)
+    return params
@@ -0,0 +1,436 @@
+"""
+과거 예측 결과 일괄 재계산 (python manage.py rescore)
+
+모델 버전이 바뀌면 이전에 저장한 Patient.prediction / prediction_probability 와
+lung_result.prediction / risk_score 는 이전 모델의 결과로 남습니다. 이 모듈은 저장된 입력을
+pk 기준 keyset 청크로 읽어 지정한 모델 버전으로 다시 예측하고, 바뀐 행만 청크 단위
+bulk_update로 저장합니다.
+
+- results: lung_record를 청크로 읽고(training_data.iter_chunks), 같은 record_id 범위의
+  lung_result 행과 결과 모델 버전(LungResultModelVersion)을 갱신합니다.
+- patients: Patient 테이블의 입력으로 다시 예측합니다.
+
+예측은 프로세스 풀(jobs)에서 청크 단위 벡터 연산(ModelBundle.predict_array)으로 하고,
+메인 프로세스는 청크 순서대로 결과를 받아 저장합니다. 각 청크를 저장한 뒤 마지막 pk를
+체크포인트 파일에 기록하므로, 중단 후 다시 실행하면 그 다음 청크부터 이어서 처리합니다
+(청크 저장은 같은 값을 다시 쓰는 것이므로 마지막 청크가 두 번 처리되어도 결과는 같음).
+dry_run이면 저장하지 않고 바뀔 행의 통계와 예시만 보고하며, max_write_rate로 초당 저장 행 수를
+제한하여 공유 데이터베이스(heart_db)의 부하를 조절할 수 있습니다.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent import futures
+from decimal import Decimal
+
+import numpy as np
+
+from .batch import BULK_CHUNK_SIZE, SYMPTOM_FIELDS
+from .training_data import CHUNK_SIZE, FEATURE_NAMES, encode_features, iter_chunks
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.path.join(current_dir, 'ml_model', 'rescore')
+
+TARGETS = ('results', 'patients')
+
+# 이 차이 이하의 확률 변화는 같은 값으로 봄 (위험도 테이블과 포레스트의 float32/float64 차이)
+PROBABILITY_TOLERANCE = 1e-6
+
+# 보고서에 남기는 변경 예시 수
+DEFAULT_SAMPLES = 10
+
+
+class Checkpoint:
+    """대상별 진행 상황 파일 (ml_model/rescore/<대상>.json)"""
+
+    def __init__(self, target, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f'{target}.json')
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, state):
+        # 임시 파일에 쓴 뒤 교체하여 중단 시에도 이전 체크포인트가 온전히 남도록 함
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Throttle:
+    """초당 저장 행 수 제한 (None이면 제한 없음)"""
+
+    def __init__(self, max_rate=None):
+        self.max_rate = max_rate
+        self.started = time.monotonic()
+        self.rows = 0
+
+    def wait(self, n_rows):
+        """n_rows행을 저장한 뒤 호출 - 평균 속도가 max_rate를 넘지 않을 때까지 대기"""
+        if not self.max_rate or not n_rows:
+            return 0.0
+        self.rows += n_rows
+        delay = self.started + self.rows / self.max_rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+
+# 워커 프로세스의 모델 번들과 특성 열 순서 (initializer에서 한 번 로드)
+_worker = {}
+
+
+def _init_worker(version):
+    from django.apps import apps
+
+    if not apps.ready:
+        # fork가 아닌 방식(spawn)으로 시작된 워커
+        import django
+        django.setup()
+
+    from . import model_provider, registry
+
+    bundle = model_provider.load_bundle(registry.get_artifact(version))
+    _worker['bundle'] = bundle
+    _worker['order'] = [FEATURE_NAMES.index(name) for name in bundle.feature_names]
+
+
+def _score(X):
+    """uint8 특성 청크 (FEATURE_NAMES 순서) → (라벨 배열, 양성 확률 배열)"""
+    bundle = _worker['bundle']
+    return bundle.predict_array(X[:, _worker['order']].astype(np.float32))
+
+
+class Scorer:
+    """청크 예측기 - jobs > 1이면 프로세스 풀, 1이면 현재 프로세스에서 예측"""
+
+    def __init__(self, version, jobs=1):
+        self.pool = None
+        if jobs > 1:
+            from django.db import connections
+
+            # fork된 워커가 부모의 데이터베이스 연결을 물려받아 닫지 않도록 먼저 닫음 (다음 쿼리에서 다시 연결)
+            connections.close_all()
+            self.pool = futures.ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_worker, initargs=(version,),
+            )
+        else:
+            _init_worker(version)
+
+    def submit(self, X):
+        if self.pool is not None:
+            return self.pool.submit(_score, X)
+        future = futures.Future()
+        future.set_result(_score(X))
+        return future
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def _scored_chunks(chunks, scorer, in_flight):
+    """(청크, (라벨, 확률)) 를 청크 순서대로 생성 - 최대 in_flight개 청크를 미리 예측"""
+    pending = deque()
+    for chunk in chunks:
+        pending.append((chunk, scorer.submit(chunk[1])))
+        if len(pending) >= in_flight:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+    while pending:
+        chunk, future = pending.popleft()
+        yield chunk, future.result()
+
+
+def _new_report():
+    return {
+        'chunks': 0,
+        'rows': 0,               # 읽은 입력 행 (lung_record 또는 Patient)
+        'scored': 0,             # 비교한 결과 행
+        'missing': 0,            # 결과 행이 없는 lung_record
+        'positive_to_negative': 0,
+        'negative_to_positive': 0,
+        'score_changed': 0,      # 라벨은 같고 확률/위험 점수만 바뀐 행
+        'unscored': 0,           # 이전 예측 값이 없던 행
+        'version_only': 0,       # 값은 같고 모델 버전만 바뀐 행
+        'written': 0,
+        'max_delta': 0.0,        # 위험 점수(%) 최대 변화
+        'delta_sum': 0.0,
+        'throttled_seconds': 0.0,
+        'samples': [],
+    }
+
+
+def _record_change(report, key, old_label, new_label, old_score, new_score, samples):
+    """값(라벨 또는 위험 점수 %)이 바뀐 행 하나를 보고서에 반영"""
+    if old_label is None or old_score is None:
+        report['unscored'] += 1
+    elif old_label != new_label:
+        report['negative_to_positive' if new_label else 'positive_to_negative'] += 1
+    else:
+        report['score_changed'] += 1
+
+    if old_score is not None:
+        delta = abs(new_score - old_score)
+        report['max_delta'] = max(report['max_delta'], delta)
+        report['delta_sum'] += delta
+    if len(report['samples']) < samples:
+        report['samples'].append({
+            'pk': key,
+            'old': [old_label, None if old_score is None else round(old_score, 4)],
+            'new': [new_label, round(new_score, 4)],
+        })
+
+
+def _apply_results(pk, labels, probabilities, version, using, dry_run, report, samples):
+    """lung_record 청크(pk 배열)에 해당하는 lung_result 행 비교 및 갱신 - 저장한 행 수 반환
+
+    record_id 범위로 조회하므로 청크가 커도 IN 절의 파라미터 수가 늘지 않습니다.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+
+    from . import result_rollup
+    from .models import LungResult, LungResultModelVersion
+
+    rows = list(
+        LungResult.objects.using(using)
+        .filter(record_id__gte=int(pk[0]), record_id__lte=int(pk[-1]))
+        .values_list('result_id', 'record_id', 'prediction', 'risk_score')
+    )
+    found = set()
+    if rows:
+        result_ids = [row[0] for row in rows]
+        versions = dict(
+            LungResultModelVersion.objects
+            .filter(result_id__gte=min(result_ids), result_id__lte=max(result_ids))
+            .values_list('result_id', 'model_version')
+        )
+    else:
+        versions = {}
+
+    changed, stamped, new_stamps = [], [], []
+    for result_id, record_id, prediction, risk_score in rows:
+        index = int(np.searchsorted(pk, record_id))
+        if index >= len(pk) or pk[index] != record_id:
+            continue  # 청크 범위 안에서 삭제된 lung_record의 결과
+        found.add(record_id)
+        report['scored'] += 1
+
+        old_label = int(prediction == '양성')
+        new_label = int(labels[index] == 1)
+        # risk_score는 소수 둘째 자리까지 저장되므로 0.01% 단위 정수로 비교
+        new_cents = int(round(float(probabilities[index]) * 10000))
+        old_cents = None if risk_score is None else int(round(float(risk_score) * 100))
+        values_changed = old_cents != new_cents or old_label != new_label
+        if values_changed:
+            _record_change(report, result_id, old_label, new_label,
+                           None if old_cents is None else old_cents / 100, new_cents / 100, samples)
+            changed.append(LungResult(
+                result_id=result_id,
+                prediction='양성' if new_label else '음성',
+                risk_score=Decimal(new_cents).scaleb(-2),
+            ))
+
+        if versions.get(result_id) != version:
+            if result_id in versions:
+                stamped.append(result_id)
+            else:
+                new_stamps.append(LungResultModelVersion(result_id=result_id, model_version=version))
+            if not values_changed:
+                report['version_only'] += 1
+
+    report['missing'] += len(pk) - len(found)
+    if dry_run:
+        return 0
+
+    if changed:
+        # 바뀐 예측 결과를 통계 집계에도 반영
+        with result_rollup.tracking(using=using, record_id__gte=int(pk[0]), record_id__lte=int(pk[-1])):
+            with transaction.atomic(using=using):
+                LungResult.objects.using(using).bulk_update(changed, ['prediction', 'risk_score'],
+                                                            batch_size=BULK_CHUNK_SIZE)
+    with transaction.atomic():
+        for start in range(0, len(stamped), BULK_CHUNK_SIZE):
+            LungResultModelVersion.objects.filter(result_id__in=stamped[start:start + BULK_CHUNK_SIZE]).update(
+                model_version=version, updated_at=timezone.now(),
+            )
+        LungResultModelVersion.objects.bulk_create(new_stamps, batch_size=BULK_CHUNK_SIZE)
+    return len(changed) + len(stamped) + len(new_stamps)
+
+
+def _patient_chunks(chunk_size, after_pk, until_pk):
+    """Patient를 pk 순서로 (pk 배열, X 청크, 기존 결과 목록) 청크로 읽음"""
+    from .models import Patient
+
+    rows = Patient.objects.filter(pk__lte=until_pk).values_list(
+        'pk', 'gender', 'age', *SYMPTOM_FIELDS, 'prediction', 'prediction_probability', 'model_version',
+    )
+    last_pk = after_pk
+    while True:
+        page = list(rows.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+        if not page:
+            return
+        block = np.array([row[:3 + len(SYMPTOM_FIELDS)] for row in page], dtype=np.int64)
+        last_pk = int(block[-1, 0])
+        yield block[:, 0].copy(), encode_features(block), [row[-3:] for row in page]
+        if len(page) < chunk_size:
+            return
+
+
+def _apply_patients(pk, labels, probabilities, previous, version, dry_run, report, samples):
+    """Patient 청크 비교 및 갱신 - 저장한 행 수 반환"""
+    from django.db import transaction
+    from django.utils import timezone
+
+    from .models import Patient
+
+    changed = []
+    now = timezone.now()
+    for i, (prediction, probability, model_version) in enumerate(previous):
+        report['scored'] += 1
+        new_label = int(labels[i] == 1)
+        new_probability = float(probabilities[i])
+        old_label = None if prediction is None else int(prediction == 'YES')
+        if old_label != new_label or probability is None \
+                or abs(probability - new_probability) > PROBABILITY_TOLERANCE:
+            _record_change(report, int(pk[i]), old_label, new_label,
+                           None if probability is None else probability * 100, new_probability * 100, samples)
+        elif model_version != version:
+            report['version_only'] += 1
+        else:
+            continue
+        changed.append(Patient(
+            pk=int(pk[i]), prediction='YES' if new_label else 'NO',
+            prediction_probability=new_probability, model_version=version, updated_at=now,
+        ))
+
+    if dry_run:
+        return 0
+    with transaction.atomic():
+        Patient.objects.bulk_update(
+            changed, ['prediction', 'prediction_probability', 'model_version', 'updated_at'],
+            batch_size=BULK_CHUNK_SIZE,
+        )
+    return len(changed)
+
+
+def _until_pk(target, using):
+    from django.db.models import Max
+
+    from .models import LungRecord, Patient
+
+    if target == 'results':
+        return LungRecord.objects.using(using).aggregate(last=Max('pk'))['last']
+    return Patient.objects.aggregate(last=Max('pk'))['last']
+
+
+def rescore(target, version=None, jobs=1, chunk_size=CHUNK_SIZE, dry_run=False, max_write_rate=None,
+            restart=False, using='heart_db', samples=DEFAULT_SAMPLES, checkpoint_dir=CHECKPOINT_DIR,
+            verbose=True):
+    """target('results' 또는 'patients')의 저장된 예측을 version(기본: 활성 버전)으로 다시 계산
+
+    체크포인트가 같은 모델 버전이면 이어서 처리하고(restart=True이면 처음부터), 완료된
+    체크포인트가 있으면 아무것도 하지 않습니다. dry_run은 체크포인트를 읽거나 쓰지 않습니다.
+    보고서 딕셔너리를 반환합니다.
+    """
+    from . import registry
+
+    if target not in TARGETS:
+        raise ValueError(f'알 수 없는 재계산 대상입니다: {target} (선택: {", ".join(TARGETS)})')
+    version = version or registry.active_artifact().version
+    registry.get_artifact(version)
+
+    checkpoint = Checkpoint(target, checkpoint_dir)
+    if restart and not dry_run:
+        checkpoint.clear()
+    state = None if dry_run else checkpoint.load()
+    if state is not None and state['model_version'] != version:
+        if verbose:
+            print(f"  체크포인트의 모델 버전({state['model_version']})이 달라 처음부터 다시 계산합니다.")
+        state = None
+    if state is not None and state.get('completed'):
+        if verbose:
+            print(f"  {target}: {version}으로 이미 재계산을 완료했습니다 (--restart로 다시 실행).")
+        return state['report']
+    if state is None:
+        state = {
+            'target': target,
+            'model_version': version,
+            'last_pk': 0,
+            'until_pk': _until_pk(target, using) or 0,
+            'completed': False,
+            'report': _new_report(),
+        }
+    elif verbose:
+        print(f"  체크포인트에서 이어서 처리: pk {state['last_pk']} 이후 (최대 pk {state['until_pk']})")
+
+    report = state['report']
+    if target == 'results':
+        chunks = (
+            (pk, X, None)
+            for pk, X, _ in iter_chunks('record', using, chunk_size, after_pk=state['last_pk'],
+                                        until_pk=state['until_pk'])
+        )
+    else:
+        chunks = _patient_chunks(chunk_size, state['last_pk'], state['until_pk'])
+
+    scorer = Scorer(version, jobs)
+    throttle = Throttle(max_write_rate)
+    started = time.perf_counter()
+    rows_before = report['rows']
+    try:
+        for (pk, X, previous), (labels, probabilities) in _scored_chunks(chunks, scorer, in_flight=2 * jobs):
+            if target == 'results':
+                written = _apply_results(pk, labels, probabilities, version, using, dry_run, report, samples)
+            else:
+                written = _apply_patients(pk, labels, probabilities, previous, version, dry_run, report, samples)
+            report['chunks'] += 1
+            report['rows'] += len(pk)
+            report['written'] += written
+            report['throttled_seconds'] = round(report['throttled_seconds'] + throttle.wait(written), 3)
+
+            state['last_pk'] = int(pk[-1])
+            if not dry_run:
+                checkpoint.save(state)
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"  {target}: pk {state['last_pk']:>10}/{state['until_pk']}  읽음 {report['rows']:>9}행  "
+                      f"저장 {report['written']:>9}행  "
+                      f"({(report['rows'] - rows_before) / max(elapsed, 1e-9):8.0f}행/s)")
+    finally:
+        scorer.close()
+
+    state['completed'] = True
+    report['elapsed'] = round(time.perf_counter() - started, 3)
+    if not dry_run:
+        checkpoint.save(state)
+    return report
+
+
+def summarize(report):
+    """보고서 요약 문자열"""
+    # 이전 값이 없던 행은 변화량 평균에서 제외
+    changed = report['positive_to_negative'] + report['negative_to_positive'] + report['score_changed']
+    mean_delta = report['delta_sum'] / changed if changed else 0.0
+    return (
+        f"입력 {report['rows']}행, 결과 {report['scored']}행 비교 (결과 없음 {report['missing']}행): "
+        f"양성→음성 {report['positive_to_negative']}, 음성→양성 {report['negative_to_positive']}, "
+        f"점수만 변경 {report['score_changed']}, 이전 값 없음 {report['unscored']}, "
+        f"모델 버전만 변경 {report['version_only']}, "
+        f"위험 점수 변화 평균 {mean_delta:.2f}%p / 최대 {report['max_delta']:.2f}%p, "
+        f"저장 {report['written']}행"
+    )
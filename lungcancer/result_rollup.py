@@ -0,0 +1,319 @@
+"""
+lung_result 일별 집계 테이블 (대시보드용)
+
+홈과 시각화 페이지는 lung_result 원본 행 대신 (날짜, 성별, 연령대, 예측 결과, 위험도 구간)별
+건수/나이 합계/위험 점수 합계를 저장한 LungResultRollup을 읽으므로, 조회 비용이 환자 수가 아니라
+날짜 수에 비례합니다.
+
+- watermark: LungResultRollupState에 저장된 result_id. watermark 이하의 행이 집계에 반영되어 있습니다.
+- catch_up: watermark 이후의 행을 result_id 순서로 청크 단위 GROUP BY 집계하여 더하고 watermark를
+  올립니다. 예측을 저장한 요청(predict, 일괄 예측 API)은 저장 직후 refresh로 최대 POST_WRITE_MAX_ROWS행만
+  반영하고, 그보다 밀린 행(generate_synthetic 등 요청 밖에서 추가된 행)은 rollup_results backfill 명령을
+  주기적으로 실행하여 반영합니다. 대시보드 요청(홈, 시각화)은 집계 테이블을 읽기만 합니다.
+- tracking: watermark 이하 행을 수정/삭제하는 동안 해당 행들의 집계를 변경 전후로 구해 차이를
+  반영합니다 (patient_update, patient_delete, rescore).
+- reconcile: 원본 전체를 다시 집계하여 저장된 집계와 비교하고, fix=True이면 차이를 고칩니다.
+
+집계 테이블을 바꾸는 작업은 모두 상태 행을 잠근(select_for_update) 트랜잭션 안에서 실행됩니다.
+backfill 명령으로 상태 행을 만들기 전에는 집계를 사용하지 않으며, 대시보드는 원본 집계
+(result_stats)를 사용합니다.
+
+날짜는 UTC 기준입니다 (MySQL 시간대 테이블 없이 DATE()로 계산하기 위함).
+동시에 실행 중인 트랜잭션이 watermark보다 작은 result_id로 늦게 커밋한 행은 catch_up에서 빠질 수
+있으므로, 배치 가져오기 후에는 reconcile로 확인하세요.
+"""
+
+import logging
+from contextlib import contextmanager
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Floor, TruncDate
+
+from .batch import BULK_CHUNK_SIZE
+from .models import LungResult, LungResultRollup, LungResultRollupState
+from .result_stats import PREDICTIONS, RISK_BIN_EDGES, RISK_BIN_WIDTH, gender_label, prediction_label
+
+logger = logging.getLogger(__name__)
+
+
+# 위험 점수(%) 저장 구간 - 원본 집계의 히스토그램 구간(result_stats.RISK_BIN_EDGES)과 같음 (100%는 마지막 구간)
+RISK_BAND_WIDTH = RISK_BIN_WIDTH
+RISK_BANDS = len(RISK_BIN_EDGES) - 1
+
+# 예측 저장 직후 refresh로 반영할 최대 행 수 (일괄 예측 API 한 번의 최대 행 수, 나머지는 backfill 명령에서 반영)
+POST_WRITE_MAX_ROWS = 1000
+
+CENTS = Decimal('0.01')
+
+
+def _aggregate(results):
+    """lung_result 쿼리셋의 집계 {(날짜, 성별, 연령대, 예측, 위험도 구간): [건수, 나이 합계, 위험 점수 합계]}"""
+    rows = (
+        results.order_by()
+        .annotate(
+            day=TruncDate('created_at', tzinfo=dt_timezone.utc),
+            band=Floor(F('risk_score') / RISK_BAND_WIDTH),
+        )
+        .values_list('day', 'gender', 'age', 'prediction', 'band')
+        .annotate(n=Count('pk'), risk=Sum('risk_score'))
+    )
+    totals = {}
+    for day, gender, age, prediction, band, n, risk in rows:
+        band = min(max(int(band or 0), 0), RISK_BANDS - 1)
+        key = (day, gender_label(gender), (age // 10) * 10, prediction_label(prediction), band)
+        total = totals.setdefault(key, [0, 0, Decimal(0)])
+        total[0] += n
+        total[1] += age * n
+        total[2] += Decimal(str(risk or 0)).quantize(CENTS)
+    return totals
+
+
+def _difference(after, before):
+    delta = {}
+    for key in after.keys() | before.keys():
+        new = after.get(key, (0, 0, Decimal(0)))
+        old = before.get(key, (0, 0, Decimal(0)))
+        change = [new[0] - old[0], new[1] - old[1], new[2] - old[2]]
+        if any(change):
+            delta[key] = change
+    return delta
+
+
+def _apply(delta):
+    """집계 차이를 LungResultRollup에 반영 (상태 행을 잠근 트랜잭션 안에서 호출)"""
+    if not delta:
+        return
+    days = [key[0] for key in delta]
+    existing = {
+        (row.day, row.gender, row.age_decade, row.prediction, row.risk_band): row
+        for row in LungResultRollup.objects.filter(day__gte=min(days), day__lte=max(days))
+    }
+    updated, created, emptied = [], [], []
+    for key, (n, age_sum, risk_sum) in delta.items():
+        row = existing.get(key)
+        if row is None:
+            if n <= 0:
+                logger.warning(f"집계 불일치: {key} 행이 없는데 {n}건을 빼려고 합니다. reconcile이 필요합니다.")
+                continue
+            day, gender, age_decade, prediction, risk_band = key
+            created.append(LungResultRollup(
+                day=day, gender=gender, age_decade=age_decade, prediction=prediction, risk_band=risk_band,
+                count=n, age_sum=age_sum, risk_score_sum=risk_sum,
+            ))
+            continue
+        row.count += n
+        row.age_sum += age_sum
+        row.risk_score_sum += risk_sum
+        if row.count <= 0:
+            emptied.append(row.pk)
+        else:
+            updated.append(row)
+
+    LungResultRollup.objects.bulk_update(updated, ['count', 'age_sum', 'risk_score_sum'], batch_size=BULK_CHUNK_SIZE)
+    LungResultRollup.objects.bulk_create(created, batch_size=BULK_CHUNK_SIZE)
+    for start in range(0, len(emptied), BULK_CHUNK_SIZE):
+        LungResultRollup.objects.filter(pk__in=emptied[start:start + BULK_CHUNK_SIZE]).delete()
+
+
+def _lock_state():
+    """상태 행을 잠가서 반환 (없으면 None)"""
+    return LungResultRollupState.objects.select_for_update().first()
+
+
+def is_enabled():
+    """backfill로 집계 테이블을 만들었는지 여부"""
+    return LungResultRollupState.objects.exists()
+
+
+def status():
+    """{'enabled', 'watermark', 'rows', 'days', 'updated_at'}"""
+    state = LungResultRollupState.objects.first()
+    return {
+        'enabled': state is not None,
+        'watermark': state.watermark if state else None,
+        'rows': LungResultRollup.objects.count(),
+        'days': LungResultRollup.objects.values('day').distinct().count(),
+        'updated_at': state.updated_at if state else None,
+    }
+
+
+def catch_up(using='heart_db', chunk_size=BULK_CHUNK_SIZE * 10, max_rows=None, create=False, verbose=False):
+    """watermark 이후의 lung_result 행을 집계에 반영 - 반영한 행 수 반환
+
+    create=True이면 상태 행이 없을 때 만들어(watermark 0) 처음부터 채웁니다 (backfill).
+    청크마다 별도 트랜잭션이므로 중간에 중단해도 반영된 청크까지 이어서 진행합니다.
+    """
+    if create:
+        with transaction.atomic():
+            if not LungResultRollupState.objects.select_for_update().exists():
+                LungResultRollupState.objects.create(watermark=0)
+
+    results = LungResult.objects.using(using).order_by()
+    processed = 0
+    while max_rows is None or processed < max_rows:
+        limit = chunk_size if max_rows is None else min(chunk_size, max_rows - processed)
+        with transaction.atomic():
+            state = _lock_state()
+            if state is None:
+                return processed
+            ids = list(
+                results.filter(result_id__gt=state.watermark)
+                .order_by('result_id').values_list('result_id', flat=True)[:limit]
+            )
+            if not ids:
+                return processed
+            _apply(_aggregate(results.filter(result_id__gt=state.watermark, result_id__lte=ids[-1])))
+            state.watermark = ids[-1]
+            state.save(update_fields=['watermark', 'updated_at'])
+        processed += len(ids)
+        if verbose:
+            print(f"  {processed}행 반영 (watermark {ids[-1]})")
+    return processed
+
+
+def refresh(using='heart_db', max_rows=POST_WRITE_MAX_ROWS):
+    """예측을 저장한 직후 호출: 집계를 사용 중이면 새 행을 최대 max_rows개 반영 - 사용 여부 반환
+
+    새 행이 없으면 상태 행을 잠그지 않습니다. 대시보드 요청에서는 호출하지 않습니다 (is_enabled).
+    """
+    state = LungResultRollupState.objects.first()
+    if state is None:
+        return False
+    if LungResult.objects.using(using).filter(result_id__gt=state.watermark).exists():
+        catch_up(using=using, max_rows=max_rows)
+    return True
+
+
+@contextmanager
+def tracking(using='heart_db', **filters):
+    """with 블록에서 lung_result 행(filters)을 수정/삭제하면 변경 전후 집계 차이를 반영
+
+    watermark 이하 행만 대상이며(이후 행은 catch_up에서 최종 값으로 반영), 블록 안에서 예외가
+    발생해도 이미 저장된 변경은 반영한 뒤 예외를 다시 발생시킵니다.
+    """
+    error = None
+    with transaction.atomic():
+        state = _lock_state()
+        # 집계 테이블을 사용하지 않으면 블록만 실행
+        results = None
+        if state is not None:
+            results = LungResult.objects.using(using).filter(result_id__lte=state.watermark, **filters)
+            before = _aggregate(results)
+        try:
+            yield
+        except Exception as e:
+            error = e
+        if results is not None:
+            _apply(_difference(_aggregate(results), before))
+    if error is not None:
+        raise error
+
+
+def reconcile(using='heart_db', chunk_size=BULK_CHUNK_SIZE * 10, fix=False):
+    """watermark 이하 원본 행을 다시 집계하여 저장된 집계와 비교
+
+    {'watermark', 'keys', 'missing', 'extra', 'mismatched', 'fixed'} 반환 (집계 테이블이 없으면 None).
+    비교하는 동안 상태 행을 잠그므로 다른 집계 갱신은 기다립니다.
+    """
+    with transaction.atomic():
+        state = _lock_state()
+        if state is None:
+            return None
+
+        results = LungResult.objects.using(using).order_by()
+        expected = {}
+        last_id = 0
+        while last_id < state.watermark:
+            ids = list(
+                results.filter(result_id__gt=last_id, result_id__lte=state.watermark)
+                .order_by('result_id').values_list('result_id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            chunk = _aggregate(results.filter(result_id__gt=last_id, result_id__lte=ids[-1]))
+            for key, (n, age_sum, risk_sum) in chunk.items():
+                total = expected.setdefault(key, [0, 0, Decimal(0)])
+                total[0] += n
+                total[1] += age_sum
+                total[2] += risk_sum
+            last_id = ids[-1]
+
+        stored = {
+            (row.day, row.gender, row.age_decade, row.prediction, row.risk_band):
+                [row.count, row.age_sum, row.risk_score_sum]
+            for row in LungResultRollup.objects.all()
+        }
+        delta = _difference(expected, stored)
+        report = {
+            'watermark': state.watermark,
+            'keys': len(expected),
+            'missing': sum(1 for key in delta if key not in stored),
+            'extra': sum(1 for key in delta if key not in expected),
+            'mismatched': sum(1 for key in delta if key in stored and key in expected),
+            'fixed': False,
+        }
+        if fix and delta:
+            _apply(delta)
+            report['fixed'] = True
+    return report
+
+
+def reset():
+    """집계 테이블과 상태 행 삭제 (다시 backfill 필요)"""
+    with transaction.atomic():
+        LungResultRollupState.objects.select_for_update().delete()
+        LungResultRollup.objects.all().delete()
+
+
+def prediction_totals():
+    """예측 결과별 건수 {'NO': n, 'YES': n} (집계 테이블을 사용하지 않으면 None)"""
+    if not is_enabled():
+        return None
+    totals = dict.fromkeys(PREDICTIONS, 0)
+    for prediction, n in LungResultRollup.objects.order_by().values_list('prediction').annotate(n=Sum('count')):
+        totals[prediction] = totals.get(prediction, 0) + n
+    return totals
+
+
+def statistics():
+    """집계 테이블로 계산한 result_stats.result_statistics와 같은 형식의 통계 (사용하지 않으면 None)
+
+    저장 구간이 위험도 히스토그램 구간(RISK_BIN_EDGES)과 같으므로 원본 행으로 계산한 히스토그램과 같습니다.
+    watermark 이후 아직 반영되지 않은 행은 포함하지 않습니다.
+    """
+    if not is_enabled():
+        return None
+
+    total = 0
+    age_sum = 0
+    predictions = dict.fromkeys(PREDICTIONS, 0)
+    by_gender = {}
+    by_age_decade = {}
+    bands = np.zeros(RISK_BANDS, dtype=np.int64)
+    groups = (
+        LungResultRollup.objects.order_by()
+        .values_list('gender', 'age_decade', 'prediction', 'risk_band')
+        .annotate(n=Sum('count'), ages=Sum('age_sum'))
+    )
+    for gender, age_decade, prediction, risk_band, n, ages in groups:
+        total += n
+        age_sum += ages
+        predictions[prediction] += n
+        by_gender.setdefault(gender, dict.fromkeys(PREDICTIONS, 0))[prediction] += n
+        by_age_decade.setdefault(age_decade, dict.fromkeys(PREDICTIONS, 0))[prediction] += n
+        bands[risk_band] += n
+
+    risk_histogram = (bands, RISK_BIN_EDGES.copy()) if total else None
+
+    return {
+        'total': total,
+        'predictions': predictions,
+        'by_gender': dict(sorted(by_gender.items())),
+        'by_age_decade': dict(sorted(by_age_decade.items())),
+        'avg_age': age_sum / total if total else 0,
+        'risk_histogram': risk_histogram,
+    }
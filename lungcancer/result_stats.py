@@ -0,0 +1,87 @@
+"""
+lung_result 통계 조회 (시각화 페이지용)
+
+모든 행을 읽어 파이썬 딕셔너리/DataFrame으로 세는 대신 데이터베이스의 GROUP BY 집계 두 번으로
+필요한 통계를 모두 계산합니다. 두 쿼리의 결과 행 수는 테이블 크기와 관계없이 제한됩니다.
+
+1. (성별, 나이, 예측 결과)별 행 수 - 나이는 정수이므로 많아야 수백 행이며, 예측 결과 분포,
+   성별 x 예측, 연령대(10세 단위) x 예측, 평균 나이를 여기서 계산합니다.
+2. 위험 점수별 행 수 - risk_score는 소수 둘째 자리까지의 0~100 값이므로 많아야 10001행이며,
+   값별 행 수를 가중치로 np.histogram을 계산하면 전체 행으로 계산한 히스토그램과 같습니다.
+   구간 경계는 고정값(RISK_BIN_EDGES)이라 일별 집계 테이블(result_rollup)의 히스토그램과 같습니다.
+
+성별과 예측 결과는 기존 화면과 같이 변환합니다 (성별 1/'1'=남성, 그 외=여성 / '양성'=YES, 그 외=NO).
+"""
+
+import numpy as np
+from django.db.models import Count
+
+from .models import LungResult
+
+
+PREDICTIONS = ('NO', 'YES')
+
+# 위험도 히스토그램 구간 (위험 점수 %, 0~100을 5% 폭 20개 구간으로 나눔, 100은 마지막 구간)
+# 위험도 수준 경계(40%, 70%)가 구간 경계와 겹치며, 일별 집계 테이블도 같은 구간으로 저장
+RISK_BIN_WIDTH = 5
+RISK_BIN_EDGES = np.arange(0, 100 + RISK_BIN_WIDTH, RISK_BIN_WIDTH, dtype=np.float64)
+
+
+def gender_label(value):
+    return '남성' if value == 1 or value == '1' else '여성'
+
+
+def prediction_label(value):
+    return 'YES' if value == '양성' else 'NO'
+
+
+def _empty_counts():
+    return dict.fromkeys(PREDICTIONS, 0)
+
+
+def result_statistics(using='heart_db'):
+    """lung_result 전체의 통계
+
+    {
+        'total': 행 수,
+        'predictions': {'NO': n, 'YES': n},
+        'by_gender': {'남성': {'NO': n, 'YES': n}, ...},        # 있는 성별만, 이름 순
+        'by_age_decade': {20: {'NO': n, 'YES': n}, ...},         # 있는 연령대만, 연령대 순
+        'avg_age': 평균 나이 (행이 없으면 0),
+        'risk_histogram': (구간별 행 수, 구간 경계) 또는 None,  # 위험 점수(%), RISK_BIN_EDGES 구간
+    }
+    """
+    # 기본 정렬(-created_at)이 GROUP BY에 섞이지 않도록 정렬 제거
+    results = LungResult.objects.using(using).order_by()
+
+    total = 0
+    age_sum = 0
+    predictions = _empty_counts()
+    by_gender = {}
+    by_age_decade = {}
+    groups = results.values_list('gender', 'age', 'prediction').annotate(n=Count('pk'))
+    for gender, age, prediction, n in groups:
+        label = prediction_label(prediction)
+        total += n
+        age_sum += age * n
+        predictions[label] += n
+        by_gender.setdefault(gender_label(gender), _empty_counts())[label] += n
+        by_age_decade.setdefault((age // 10) * 10, _empty_counts())[label] += n
+
+    risk_histogram = None
+    scores = list(results.values_list('risk_score').annotate(n=Count('pk')))
+    if scores:
+        values = np.array([float(score) for score, _ in scores])
+        counts = np.array([n for _, n in scores])
+        hist, edges = np.histogram(np.clip(values, 0, 100), bins=RISK_BIN_EDGES, weights=counts)
+        risk_histogram = (hist.astype(np.int64), edges)
+
+    return {
+        'total': total,
+        'predictions': predictions,
+        'by_gender': dict(sorted(by_gender.items())),
+        'by_age_decade': dict(sorted(by_age_decade.items())),
+        'avg_age': age_sum / total if total else 0,
+        'risk_histogram': risk_histogram,
+    }
+
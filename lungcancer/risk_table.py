@@ -0,0 +1,257 @@
+"""
+폐암 위험도 사전 계산 테이블
+
+AGE를 제외한 14개 특성(GENDER + 13개 증상)은 모두 이진값이고 AGE는 작은 범위의
+정수이므로, 학습된 RandomForest(또는 gradient boosting)가 실제로 사용하는 AGE 분할 임계값으로 나이를
+구간화하면 (나이 구간, 이진 특성 비트마스크) 조합 전체의 확률을 미리 계산해 둘 수
+있습니다. 예측은 한 번의 인덱스 조회가 되며 결과는 model.predict_proba와 동일합니다.
+
+테이블은 lung_cancer_model.pkl의 SHA-256 체크섬과 함께 저장되어, 모델이 바뀌면
+로드되지 않습니다(포레스트로 대체).
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .inference import iter_trees
+
+
+TABLE_VERSION = 1
+AGE_FEATURE = 'AGE'
+AGE_MIN = 1      # PatientForm 입력 범위와 동일
+AGE_MAX = 120
+BUILD_CHUNK = 65536
+
+
+def file_checksum(path):
+    """파일의 SHA-256 체크섬"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _forest_thresholds(model, n_features):
+    """특성별로 포레스트(또는 gradient boosting 트리)에서 실제 사용된 분할 임계값 (정렬된 고유값)"""
+    collected = [[] for _ in range(n_features)]
+    for features, thresholds, left, _, _, _ in iter_trees(model):
+        internal = left != -1
+        for feature, threshold in zip(features[internal], thresholds[internal]):
+            collected[feature].append(threshold)
+    return [np.unique(np.array(values, dtype=np.float64)) for values in collected]
+
+
+def _age_buckets(age_thresholds, age_min, age_max):
+    """정수 나이별 구간 번호와 구간별 대표 나이
+
+    같은 구간의 나이는 모든 분할 노드에서 같은 방향으로 이동하므로 예측이 동일합니다.
+    """
+    # 트리는 float32 입력을 float64 임계값과 비교하므로 동일하게 처리
+    ages = np.arange(age_min, age_max + 1).astype(np.float32).astype(np.float64)
+    crossed = np.searchsorted(age_thresholds, ages, side='left')
+    _, first_index, bucket_of_age = np.unique(crossed, return_index=True, return_inverse=True)
+    return bucket_of_age.astype(np.uint8), ages[first_index]
+
+
+class RiskTable:
+    """메모리 매핑된 위험도 조회 테이블"""
+
+    def __init__(self, positive_proba, label_index, age_bucket, thresholds, meta):
+        self.positive_proba = positive_proba    # 셀별 양성 확률 (float64)
+        self.label_index = label_index          # 셀별 예측 클래스 인덱스 (uint8)
+        self.age_bucket = age_bucket            # 나이(age_min 기준) → 구간 번호
+        self.thresholds = thresholds            # 이진 특성별 임계값 (비트 순서)
+        self.meta = meta
+
+        self.feature_names = meta['feature_names']
+        self.classes = np.array(meta['classes'])
+        self.age_min = meta['age_min']
+        self.age_max = meta['age_max']
+        self.age_index = self.feature_names.index(meta['age_feature'])
+        self.binary_index = np.array(
+            [i for i in range(len(self.feature_names)) if i != self.age_index]
+        )
+        self.bit_weights = (1 << np.arange(len(self.binary_index))).astype(np.int64)
+        self.n_masks = 1 << len(self.binary_index)
+
+    @property
+    def n_cells(self):
+        return len(self.positive_proba)
+
+    def cell_index(self, X):
+        """특성 행렬의 셀 인덱스와 테이블 범위 포함 여부"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        ages = X[:, self.age_index]
+        covered = (ages == np.floor(ages)) & (ages >= self.age_min) & (ages <= self.age_max)
+        offsets = np.where(covered, ages - self.age_min, 0).astype(np.intp)
+
+        bits = X[:, self.binary_index] > self.thresholds
+        masks = bits.astype(np.int64) @ self.bit_weights
+        cells = self.age_bucket[offsets].astype(np.int64) * self.n_masks + masks
+        return cells, covered
+
+    def lookup(self, X):
+        """(라벨, 양성 확률, 포함 여부) 반환 - 포함되지 않은 행의 값은 의미 없음"""
+        cells, covered = self.cell_index(X)
+        labels = self.classes.take(self.label_index[cells], axis=0)
+        return labels, np.asarray(self.positive_proba[cells]), covered
+
+    def predict_one(self, features):
+        """특성 딕셔너리 한 건 조회. 테이블 범위 밖이면 None 반환"""
+        row = np.array([[features[name] for name in self.feature_names]], dtype=np.float32)
+        labels, proba, covered = self.lookup(row)
+        if not covered[0]:
+            return None
+        return labels[0], float(proba[0])
+
+
+def _representative_rows(meta, thresholds, representative_ages, start, stop):
+    """셀 번호 [start, stop) 에 해당하는 대표 입력 행"""
+    n_bits = len(thresholds)
+    cells = np.arange(start, stop, dtype=np.int64)
+    buckets, masks = np.divmod(cells, 1 << n_bits)
+
+    bits = (masks[:, np.newaxis] >> np.arange(n_bits)) & 1
+    # 임계값 이하(비트 0)는 floor(t), 초과(비트 1)는 floor(t) + 1
+    low = np.floor(thresholds)
+    binary_values = low + bits
+
+    n_features = len(meta['feature_names'])
+    age_index = meta['feature_names'].index(meta['age_feature'])
+    rows = np.empty((len(cells), n_features), dtype=np.float64)
+    rows[:, age_index] = representative_ages[buckets]
+    rows[:, [i for i in range(n_features) if i != age_index]] = binary_values
+    return rows
+
+
+def build_risk_table(model, feature_names, model_path, output_dir,
+                     age_min=AGE_MIN, age_max=AGE_MAX, verify=True):
+    """모델 파일에 대한 위험도 테이블을 생성하여 output_dir에 저장"""
+    import pandas as pd
+
+    feature_names = list(feature_names)
+    age_index = feature_names.index(AGE_FEATURE)
+    thresholds_by_feature = _forest_thresholds(model, len(feature_names))
+
+    binary_thresholds = []
+    for i, name in enumerate(feature_names):
+        if i == age_index:
+            continue
+        values = thresholds_by_feature[i]
+        if len(values) > 1:
+            raise ValueError(f"'{name}' 특성에 임계값이 여러 개({len(values)}개)라 이진 특성으로 볼 수 없습니다.")
+        # 분할에 쓰이지 않은 특성은 비트가 항상 0이 되도록 무한대 임계값 사용
+        binary_thresholds.append(values[0] if len(values) else np.inf)
+    binary_thresholds = np.array(binary_thresholds, dtype=np.float64)
+
+    age_bucket, representative_ages = _age_buckets(thresholds_by_feature[age_index], age_min, age_max)
+
+    meta = {
+        'version': TABLE_VERSION,
+        'model_checksum': file_checksum(model_path),
+        'feature_names': feature_names,
+        'classes': np.asarray(model.classes_).tolist(),
+        'age_feature': AGE_FEATURE,
+        'age_min': age_min,
+        'age_max': age_max,
+        'n_age_buckets': len(representative_ages),
+    }
+
+    # 대표값의 floor(inf) 처리를 위해 사용되지 않은 특성은 0으로 대체하여 행 생성
+    fill_thresholds = np.where(np.isfinite(binary_thresholds), binary_thresholds, 0.0)
+    n_cells = len(representative_ages) << len(binary_thresholds)
+    positive_proba = np.empty(n_cells, dtype=np.float64)
+    label_index = np.empty(n_cells, dtype=np.uint8)
+
+    for start in range(0, n_cells, BUILD_CHUNK):
+        stop = min(start + BUILD_CHUNK, n_cells)
+        rows = _representative_rows(meta, fill_thresholds, representative_ages, start, stop)
+        proba = model.predict_proba(pd.DataFrame(rows, columns=feature_names))
+        positive_proba[start:stop] = proba[:, 1]
+        label_index[start:stop] = np.argmax(proba, axis=1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, 'positive_proba.npy'), positive_proba)
+    np.save(os.path.join(output_dir, 'label_index.npy'), label_index)
+    np.save(os.path.join(output_dir, 'age_bucket.npy'), age_bucket)
+    np.save(os.path.join(output_dir, 'thresholds.npy'), binary_thresholds)
+    with open(os.path.join(output_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    table = RiskTable(positive_proba, label_index, age_bucket, binary_thresholds, meta)
+    if verify:
+        verify_risk_table(table, model)
+    return table
+
+
+def _input_rows(table, start, stop):
+    """입력 공간 행 번호 [start, stop) 의 특성 행렬 - 정수 나이(age_min~age_max) x 이진 특성 비트마스크"""
+    n_bits = len(table.binary_index)
+    rows = np.arange(start, stop, dtype=np.int64)
+    age_offsets, masks = np.divmod(rows, table.n_masks)
+
+    bits = (masks[:, np.newaxis] >> np.arange(n_bits)) & 1
+    low = np.floor(np.where(np.isfinite(table.thresholds), table.thresholds, 0.0))
+
+    X = np.empty((len(rows), len(table.feature_names)), dtype=np.float64)
+    X[:, table.age_index] = table.age_min + age_offsets
+    X[:, table.binary_index] = low + bits
+    return X
+
+
+def verify_risk_table(table, model, chunk_size=BUILD_CHUNK):
+    """테이블이 포함하는 입력 전체(모든 정수 나이 x 모든 이진 특성 조합)의 조회 결과를
+    chunk_size 행씩 model.predict_proba와 비교
+
+    불일치가 있으면 ValueError를 발생시킵니다. 검사한 행 수를 반환합니다.
+    """
+    import pandas as pd
+
+    n_rows = (table.age_max - table.age_min + 1) * table.n_masks
+    n_mismatched = 0
+    for start in range(0, n_rows, chunk_size):
+        X = _input_rows(table, start, min(start + chunk_size, n_rows))
+        labels, positive_proba, covered = table.lookup(X)
+        expected = model.predict_proba(pd.DataFrame(X, columns=table.feature_names))
+        expected_labels = model.classes_.take(np.argmax(expected, axis=1), axis=0)
+
+        mismatched = ~((positive_proba == expected[:, 1]) & (labels == expected_labels) & covered)
+        n_mismatched += int(mismatched.sum())
+    if n_mismatched:
+        raise ValueError(f'위험도 테이블 검증 실패: {n_mismatched}/{n_rows}건 불일치')
+    return n_rows
+
+
+def load_risk_table(table_dir, model_path, model_checksum=None):
+    """위험도 테이블을 메모리 매핑으로 로드
+
+    테이블이 없거나 모델 파일 체크섬이 다르면 None을 반환합니다.
+    (model_checksum을 주면 모델 파일을 다시 읽지 않음)
+    """
+    meta_path = os.path.join(table_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+
+    if model_checksum is None:
+        model_checksum = file_checksum(model_path)
+    if meta.get('version') != TABLE_VERSION or meta.get('model_checksum') != model_checksum:
+        print(f"위험도 테이블이 현재 모델과 일치하지 않아 사용하지 않습니다: {table_dir}")
+        return None
+
+    return RiskTable(
+        positive_proba=np.load(os.path.join(table_dir, 'positive_proba.npy'), mmap_mode='r'),
+        label_index=np.load(os.path.join(table_dir, 'label_index.npy'), mmap_mode='r'),
+        age_bucket=np.load(os.path.join(table_dir, 'age_bucket.npy')),
+        thresholds=np.load(os.path.join(table_dir, 'thresholds.npy')),
+        meta=meta,
+    )
@@ -0,0 +1,251 @@
+"""
+부하/규모 테스트용 합성 설문 데이터 생성
+
+실제 설문 CSV(약 300행)를 기반으로 행을 무작위 복원 추출한 뒤, 증상 값을 낮은 확률로
+뒤집고(2 ↔ 1) 나이에 작은 잡음을 더합니다 (smoothed bootstrap).
+행 단위로 추출하므로 성별/나이/증상/진단 사이의 결합 분포(동시 발생, 상관관계)가
+실제 데이터와 같게 유지되고, 잡음은 같은 행이 그대로 반복되는 것을 막습니다.
+
+- 고정 크기 블록(BLOCK_SIZE행)마다 (seed, 블록 번호)로 난수 생성기를 만들므로
+  같은 seed와 행 수이면 쓰는 대상이나 청크 크기와 관계없이 항상 같은 데이터가 생성됩니다.
+- CSV 스트리밍(write_csv), lung_cancer_survey 일괄 INSERT(write_survey),
+  웹 입력 경로와 같은 Patient / lung_record / lung_result 일괄 INSERT(write_records) 를 지원합니다.
+
+행렬은 데이터베이스 저장 값과 같은 인코딩을 사용합니다:
+성별 1=남성/0=여성, 증상 2=예/1=아니오, 폐암 여부 2=예/1=아니오.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV = os.path.join(os.path.dirname(current_dir), 'survey lung cancer.csv')
+
+# 난수 생성 단위 (결과 재현성의 기준이므로 변경하면 같은 seed라도 다른 데이터가 생성됨)
+BLOCK_SIZE = 10000
+
+# 합성 lung_record / lung_result의 기본 등록일 범위
+DEFAULT_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DEFAULT_DAYS = 365
+
+# 진행 상황 출력 간격(행)
+PROGRESS_ROWS = 100000
+
+# 데이터베이스 대상과 벤치마크의 기본 데이터베이스 별칭 (settings의 로컬 SQLite)
+BENCH_DATABASE = 'bench'
+
+
+class SurveyGenerator:
+    """실제 설문 CSV의 분포를 따르는 합성 행 생성기"""
+
+    def __init__(self, csv_path=DEFAULT_CSV, seed=42, flip_prob=0.02, age_jitter=2):
+        import pandas as pd
+
+        if not os.path.exists(csv_path):
+            raise ValueError(f'기준 데이터 파일을 찾을 수 없습니다: {csv_path}')
+        df = pd.read_csv(csv_path)
+
+        self.columns = df.columns.tolist()        # CSV 헤더 (마지막 열이 LUNG_CANCER)
+        self.feature_names = self.columns[:-1]
+        self.seed = seed
+        self.flip_prob = flip_prob
+        self.age_jitter = age_jitter
+
+        rows = df.to_numpy()
+        self.rows = np.empty(rows.shape, dtype=np.int16)
+        self.rows[:, 0] = rows[:, 0] == 'M'
+        self.rows[:, 1:-1] = rows[:, 1:-1].astype(np.int16)
+        self.rows[:, -1] = np.where(rows[:, -1] == 'YES', 2, 1)
+        self.age_range = (int(self.rows[:, 1].min()), int(self.rows[:, 1].max()))
+
+    def block(self, index, n=BLOCK_SIZE):
+        """블록 index의 앞쪽 n행 (n, 16) int16 - [성별, 나이, 증상 13개, 폐암 여부]"""
+        rng = np.random.default_rng([self.seed, index])
+        block = self.rows[rng.integers(0, len(self.rows), size=BLOCK_SIZE)]
+
+        # 증상(성별/나이/진단 제외)을 flip_prob 확률로 뒤집기
+        symptoms = block[:, 2:-1]
+        flip = rng.random(symptoms.shape) < self.flip_prob
+        symptoms[flip] = 3 - symptoms[flip]
+
+        ages = block[:, 1] + rng.integers(-self.age_jitter, self.age_jitter + 1, size=BLOCK_SIZE)
+        block[:, 1] = np.clip(ages, *self.age_range)
+        return block[:n]
+
+    def blocks(self, n_rows):
+        """n_rows행을 (시작 행 번호, 블록) 으로 나누어 생성"""
+        for index, start in enumerate(range(0, n_rows, BLOCK_SIZE)):
+            yield start, self.block(index, min(BLOCK_SIZE, n_rows - start))
+
+
+def distribution_report(real, synthetic):
+    """증상/진단 유병률과 열 간 상관계수의 최대 차이 (실제 vs 합성)"""
+    binary = slice(2, None)
+    prevalence_diff = np.abs((real[:, binary] == 2).mean(axis=0) - (synthetic[:, binary] == 2).mean(axis=0))
+    corr_diff = np.abs(np.corrcoef(real, rowvar=False) - np.corrcoef(synthetic, rowvar=False))
+    return {
+        'max_prevalence_diff': round(float(prevalence_diff.max()), 4),
+        'max_correlation_diff': round(float(np.nanmax(corr_diff)), 4),
+        'age_mean': (round(float(real[:, 1].mean()), 2), round(float(synthetic[:, 1].mean()), 2)),
+    }
+
+
+def _progress(label, written, n_rows, started, verbose):
+    if verbose and (written % PROGRESS_ROWS == 0 or written == n_rows):
+        elapsed = time.perf_counter() - started
+        print(f"  {label}: {written:>10}/{n_rows}행 ({written / max(elapsed, 1e-9):10.0f}행/s)")
+
+
+class NotLocalDatabase(ValueError):
+    """로컬 데이터베이스가 아닌 별칭에 대량으로 행을 추가하려고 함 (require_local_database)"""
+
+
+def require_local_database(*aliases):
+    """대량으로 행을 추가하는 작업(벤치마크, 합성 데이터)의 데이터베이스가 로컬인지 확인
+
+    SQLite 또는 settings.BENCHMARK_DATABASES에 등록된 별칭만 허용하고, 그 외(공유 MySQL 등)는
+    트랜잭션을 롤백하더라도 대량 INSERT와 잠금이 운영 서버에 걸리므로 NotLocalDatabase.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    allowed = getattr(settings, 'BENCHMARK_DATABASES', ())
+    for alias in aliases:
+        if connections[alias].vendor != 'sqlite' and alias not in allowed:
+            raise NotLocalDatabase(
+                f"'{alias}' 데이터베이스({connections[alias].vendor})는 로컬 데이터베이스가 아닙니다. "
+                f"SQLite 별칭을 사용하거나 settings.BENCHMARK_DATABASES에 등록하세요."
+            )
+
+
+def prepare_database(using=BENCH_DATABASE):
+    """로컬 데이터베이스에 마이그레이션을 적용하고, 없는 외부 테이블(lung_cancer_survey, lung_record,
+    lung_result)을 모델 정의대로 만듦 (운영에서는 Django가 관리하지 않는 테이블)"""
+    from django.core.management import call_command
+    from django.db import connections
+
+    from .models import LungCancerSurvey, LungRecord, LungResult
+
+    require_local_database(using)
+    call_command('migrate', database=using, verbosity=0)
+    connection = connections[using]
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in (LungCancerSurvey, LungRecord, LungResult):
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+def write_csv(path, n_rows, generator=None, verbose=True):
+    """survey lung cancer.csv와 같은 스키마의 CSV를 블록 단위로 스트리밍 저장"""
+    import pandas as pd
+
+    generator = generator or SurveyGenerator()
+    started = time.perf_counter()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for start, block in generator.blocks(n_rows):
+            df = pd.DataFrame(block, columns=generator.columns)
+            df[generator.columns[0]] = np.where(block[:, 0] == 1, 'M', 'F')
+            df[generator.columns[-1]] = np.where(block[:, -1] == 2, 'YES', 'NO')
+            df.to_csv(f, header=start == 0, index=False)
+            _progress('CSV', start + len(block), n_rows, started, verbose)
+    return n_rows
+
+
+def write_survey(n_rows, generator=None, using='heart_db', verbose=True):
+    """lung_cancer_survey 테이블에 블록 단위 bulk_create"""
+    from .batch import BULK_CHUNK_SIZE, SYMPTOM_FIELDS
+    from .models import LungCancerSurvey
+
+    generator = generator or SurveyGenerator()
+    manager = LungCancerSurvey.objects.using(using)
+    started = time.perf_counter()
+    for start, block in generator.blocks(n_rows):
+        manager.bulk_create([
+            LungCancerSurvey(
+                gender=row[0], age=row[1], lung_cancer=row[-1],
+                **dict(zip(SYMPTOM_FIELDS, row[2:-1])),
+            )
+            for row in block.tolist()
+        ], batch_size=BULK_CHUNK_SIZE)
+        _progress('lung_cancer_survey', start + len(block), n_rows, started, verbose)
+    return n_rows
+
+
+def write_records(n_rows, generator=None, using='heart_db', start_at=DEFAULT_START, days=DEFAULT_DAYS,
+                  with_patients=True, patient_using='default', verbose=True):
+    """웹 입력과 같은 형태의 Patient / lung_record / lung_result 행을 블록 단위로 저장
+
+    예측 결과는 활성 모델로 계산하며(predict 뷰와 같은 1/0 증상 변환), lung_record의
+    폐암 여부는 웹 입력과 같이 기본값(1=아니오)으로 저장합니다.
+    등록일은 start_at부터 days일 동안 행 순서대로 고르게 분포합니다
+    (Patient.created_at은 auto_now_add이므로 저장 시각).
+    with_patients=False 이면 외부 데이터베이스 테이블만 저장합니다.
+    Patient / LungResultModelVersion은 patient_using 데이터베이스에 저장합니다.
+    """
+    from .batch import BULK_CHUNK_SIZE, SYMPTOM_FIELDS, bulk_create_with_ids
+    from .models import LungRecord, LungResult, LungResultModelVersion, Patient
+    from . import model_provider
+
+    generator = generator or SurveyGenerator()
+    bundle = model_provider.get_bundle()
+    order = [generator.feature_names.index(name) for name in bundle.feature_names]
+    seconds_per_row = days * 86400 / max(n_rows, 1)
+
+    started = time.perf_counter()
+    for start, block in generator.blocks(n_rows):
+        X = block[:, :-1].astype(np.float32)
+        X[:, 2:] = X[:, 2:] == 2
+        # 웹 예측과 같은 경로 (모델 학습 인코딩 변환, 위험도 테이블 조회)
+        labels, probabilities = bundle.predict_array(X[:, order])
+
+        rng = np.random.default_rng([generator.seed, start // BLOCK_SIZE, 1])
+        offsets = (np.arange(start, start + len(block)) + rng.random(len(block))) * seconds_per_row
+        created = [start_at + timedelta(seconds=float(s)) for s in offsets]
+        rows = block.tolist()
+
+        if with_patients:
+            patients = [
+                Patient(
+                    name=f'합성 환자 #{start + i + 1}', gender=row[0], age=row[1],
+                    prediction='YES' if label == 1 else 'NO',
+                    prediction_probability=float(probability),
+                    model_version=bundle.version,
+                    **dict(zip(SYMPTOM_FIELDS, row[2:-1])),
+                )
+                for i, (row, label, probability) in enumerate(zip(rows, labels, probabilities))
+            ]
+            Patient.objects.using(patient_using).bulk_create(patients, batch_size=BULK_CHUNK_SIZE)
+
+        records = [
+            LungRecord(
+                gender=str(row[0]), age=row[1], lung_cancer=1, created_at=created[i],
+                **dict(zip(SYMPTOM_FIELDS, row[2:-1])),
+            )
+            for i, row in enumerate(rows)
+        ]
+        bulk_create_with_ids(LungRecord, records, using=using)
+        results = [
+            LungResult(
+                record_id=record.id,
+                name=f'합성 환자 #{start + i + 1}',
+                gender=record.gender,
+                age=record.age,
+                prediction='양성' if label == 1 else '음성',
+                risk_score=round(float(probability) * 100, 2),
+                created_at=record.created_at,
+            )
+            for i, (record, label, probability) in enumerate(zip(records, labels, probabilities))
+        ]
+        bulk_create_with_ids(LungResult, results, using=using)
+        if with_patients:
+            LungResultModelVersion.objects.using(patient_using).bulk_create(
+                [LungResultModelVersion(result_id=result.result_id, model_version=bundle.version) for result in results],
+                batch_size=BULK_CHUNK_SIZE,
+            )
+        _progress('lung_record/lung_result', start + len(block), n_rows, started, verbose)
+    return n_rows
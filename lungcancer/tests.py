@@ -1,3 +1,700 @@
-from django.test import TestCase
+import functools
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+
+from . import (
+    batch, chart_cache, charts, distill, model_provider, registry, rescore, result_rollup, result_stats, synthetic, train_model,
+)
+from .batching import BatcherUnavailable, MicroBatcher
+from .compression import compress_forest
+from .inference import FlatForest
+from .model_provider import ModelBundle
+from .models import LungRecord, LungResult, LungResultModelVersion, LungResultRollup, Patient
+from .risk_table import build_risk_table, verify_risk_table
+
+
+@functools.lru_cache(maxsize=None)
+def _trained_forest():
+    """학습 CSV 전체로 학습한 기본 RandomForest와 (특성 이름, CSV 특성 행렬) - CSV가 없으면 테스트 건너뜀"""
+    data = train_model.load_csv_data()
+    if data is None:
+        raise unittest.SkipTest('survey lung cancer.csv가 없습니다.')
+    X, y = data
+    model = train_model.build_model('rf').fit(X, y)
+    return model, X.columns.tolist(), X.to_numpy(dtype=np.float32)
+
+
+def _enumerated_sample(model, feature_names, n_samples=20000, seed=0):
+    """입력 공간 전체(나이 구간 x 이진 특성 조합)에서 뽑은 행 (distill.enumerate_space)"""
+    binary_low, age_thresholds = distill._binary_values(model, feature_names)
+    X, _ = distill.enumerate_space(feature_names, binary_low, age_thresholds)
+    rng = np.random.default_rng(seed)
+    return X[rng.choice(len(X), min(n_samples, len(X)), replace=False)]
+
+
+def _boundary_rows(model, X):
+    """분할 임계값과 같은 특성 값(float32로 정확히 표현되는 경우)을 넣은 행 - 경계에서의 비교(<=) 확인용"""
+    rows = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        for node in np.flatnonzero(tree.children_left != -1):
+            value = np.float32(tree.threshold[node])
+            if value == tree.threshold[node]:
+                row = X[node % len(X)].copy()
+                row[tree.feature[node]] = value
+                rows.append(row)
+    return np.array(rows, dtype=np.float32).reshape(-1, X.shape[1])
+
+
+def _sklearn_leaves(model, forest, X):
+    """트리별 도달 리프를 노드 테이블의 전체 노드 번호로 변환"""
+    return np.stack([estimator.tree_.apply(X) for estimator in model.estimators_], axis=1) \
+        + np.asarray(forest.roots, dtype=np.intp)
+
+
+class CompactForestTests(TestCase):
+    """압축 형식(save_compact / load_compact)으로 저장한 노드 테이블과 scikit-learn 모델의 예측 비교"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model, cls.feature_names, csv_rows = _trained_forest()
+        cls.X = np.concatenate([csv_rows, _enumerated_sample(cls.model, cls.feature_names)])
+
+    def test_compact_forest_matches_sklearn(self):
+        forest = FlatForest.from_sklearn(self.model, self.feature_names)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = os.path.join(tmp_dir, 'forest')
+            forest.save_compact(directory)
+            compact, header = FlatForest.load_compact(directory)
+
+            expected = self.model.predict_proba(pd.DataFrame(self.X, columns=self.feature_names))
+            expected_labels = self.model.classes_.take(np.argmax(expected, axis=1), axis=0)
+            labels, proba = compact.predict(self.X)
+
+            self.assertEqual(header['n_trees'], len(self.model.estimators_))
+            self.assertTrue(np.array_equal(labels, expected_labels))
+            self.assertTrue(np.array_equal(proba, expected))
+            self.assertTrue(np.array_equal(compact.apply(self.X), _sklearn_leaves(self.model, compact, self.X)))
+
+
+class CompressedForestTests(TestCase):
+    """압축 노드 테이블(compress_forest)과 원래 노드 테이블의 예측 비교 - 입력 공간 전체에서 비트 단위 동일"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model, cls.feature_names, _ = _trained_forest()
+        cls.forest = FlatForest.from_sklearn(cls.model, cls.feature_names)
+        cls.compressed, cls.stats = compress_forest(cls.forest)
+
+    def test_matches_uncompressed_over_input_space(self):
+        binary_low, age_thresholds = distill._binary_values(self.model, self.feature_names)
+        X, _ = distill.enumerate_space(self.feature_names, binary_low, age_thresholds)
+        self.assertGreater(len(X), 1_000_000)
+        self.assertLess(self.stats['nodes_after'], self.stats['nodes_before'])
+
+        # 원래 노드 테이블은 scikit-learn과 비트 단위로 같으므로(FlatForestTests) 더 빠른 predict_proba와 비교
+        expected = self.model.predict_proba(pd.DataFrame(X, columns=self.feature_names))
+        expected_labels = self.model.classes_.take(np.argmax(expected, axis=1), axis=0)
+        for start in range(0, len(X), 4096):
+            labels, proba = self.compressed.predict(X[start:start + 4096])
+            self.assertTrue(np.array_equal(labels, expected_labels[start:start + 4096]))
+            self.assertTrue(np.array_equal(proba, expected[start:start + 4096]))
+
+    def test_rejects_non_integer_input(self):
+        row = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+        row[0, self.feature_names.index('AGE')] = 60.5
+        self.forest.predict(row)
+        with self.assertRaises(ValueError):
+            self.compressed.predict(row)
+        with self.assertRaises(ValueError):
+            compress_forest(self.compressed)
+
+
+class FlatForestTests(TestCase):
+    """FlatForest.from_sklearn 노드 테이블과 RandomForestClassifier의 예측 비교 (비트 단위 동일)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model, cls.feature_names, csv_rows = _trained_forest()
+        cls.X = np.concatenate([csv_rows, _enumerated_sample(cls.model, cls.feature_names)])
+
+    def test_predict_proba_matches_sklearn(self):
+        forest = FlatForest.from_sklearn(self.model, self.feature_names)
+        X = np.concatenate([self.X, _boundary_rows(self.model, self.X)])
+        expected = self.model.predict_proba(pd.DataFrame(X, columns=self.feature_names))
+        labels, proba = forest.predict(X)
+
+        self.assertTrue(np.array_equal(proba, expected))
+        self.assertTrue(np.array_equal(labels, self.model.classes_.take(np.argmax(expected, axis=1), axis=0)))
+        self.assertTrue(np.array_equal(forest.apply(X), _sklearn_leaves(self.model, forest, X)))
+
+    def test_predict_one_matches_sklearn(self):
+        forest = FlatForest.from_sklearn(self.model, self.feature_names)
+        expected = self.model.predict_proba(pd.DataFrame(self.X[:200], columns=self.feature_names))
+        for row, row_expected in zip(self.X[:200], expected):
+            label, probability = forest.predict_one(dict(zip(self.feature_names, row.tolist())))
+            self.assertEqual(probability, row_expected[1])
+            self.assertEqual(label, self.model.classes_[np.argmax(row_expected)])
+
+    def test_single_tree_apply_matches_sklearn(self):
+        # 증류된 학생 모델과 같은 트리 1개짜리 포레스트 - 한 행 예측은 스칼라 순회 경로를 사용
+        teacher_proba = self.model.predict_proba(pd.DataFrame(self.X, columns=self.feature_names))[:, 1]
+        student = distill.fit_student(self.X, teacher_proba, np.ones(len(self.X)), self.feature_names, max_depth=8)
+        forest = FlatForest.from_sklearn(student, self.feature_names)
+        self.assertEqual(forest.n_trees, 1)
+
+        rows = np.concatenate([self.X[:500], _boundary_rows(student, self.X)])
+        expected_leaves = _sklearn_leaves(student, forest, rows)
+        expected = student.predict_proba(pd.DataFrame(rows, columns=self.feature_names))
+        for i, row in enumerate(rows):
+            single = row[np.newaxis, :]
+            self.assertTrue(np.array_equal(forest.apply(single), expected_leaves[i:i + 1]))
+            self.assertTrue(np.array_equal(forest.predict_proba(single), expected[i:i + 1]))
+        # 여러 행은 배열 순회 경로
+        self.assertTrue(np.array_equal(forest.apply(rows), expected_leaves))
+        self.assertTrue(np.array_equal(forest.predict_proba(rows), expected))
+
+
+class RiskTableTests(TestCase):
+    """위험도 테이블 검증 - 입력 공간 전체를 model.predict_proba와 비교"""
+
+    def test_verify_covers_every_input(self):
+        model, feature_names, _ = _trained_forest()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, 'model.pkl')
+            open(model_path, 'wb').close()
+            # 나이 범위를 좁혀 테스트 시간을 줄임 (3개 나이 x 모든 이진 특성 조합)
+            table = build_risk_table(model, feature_names, model_path, os.path.join(tmp_dir, 'risk_table'),
+                                     age_min=60, age_max=62, verify=False)
+
+        self.assertEqual(verify_risk_table(table, model, chunk_size=10000), 3 * table.n_masks)
+        table.positive_proba = table.positive_proba.copy()
+        table.positive_proba[-1] += 0.01
+        with self.assertRaises(ValueError):
+            verify_risk_table(table, model, chunk_size=10000)
+
+
+class SymptomEncodingTests(TestCase):
+    """서빙 인코딩(1=예, 0=아니오) 입력을 매니페스트의 학습 인코딩으로 변환하여 예측"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # 학습 CSV는 2=예, 1=아니오
+        cls.model, cls.feature_names, csv_rows = _trained_forest()
+        cls.csv_rows = csv_rows[:200]
+        cls.symptoms = [i for i, name in enumerate(cls.feature_names) if name not in ('GENDER', 'AGE')]
+        cls.serving_rows = cls.csv_rows.copy()
+        cls.serving_rows[:, cls.symptoms] -= 1
+
+    def _bundle(self, encoding):
+        artifact = registry.ModelArtifact('test', tempfile.gettempdir(), {'data': {'symptom_encoding': encoding}})
+        forest = FlatForest.from_sklearn(self.model, self.feature_names)
+        return ModelBundle(artifact, self.feature_names, forest, None, '0' * 12, model=self.model)
+
+    def test_csv_model_converts_serving_input(self):
+        bundle = self._bundle('2=yes,1=no')
+        expected = self.model.predict_proba(pd.DataFrame(self.csv_rows, columns=self.feature_names))[:, 1]
+
+        labels, probabilities = bundle.predict_array(self.serving_rows)
+        self.assertTrue(np.array_equal(probabilities, expected))
+        for row, row_expected in zip(self.serving_rows[:20], expected):
+            features = dict(zip(self.feature_names, row.tolist()))
+            self.assertEqual(bundle.predict_one(features)[1], row_expected)
+            self.assertAlmostEqual(bundle.explain_one(features)['probability'], row_expected)
+        # 입력 행렬은 변경하지 않음
+        self.assertEqual(self.serving_rows[:, self.symptoms].max(), 1)
+
+    def test_serving_encoding_is_unchanged(self):
+        bundle = self._bundle('1=yes,0=no')
+        expected = self.model.predict_proba(pd.DataFrame(self.serving_rows, columns=self.feature_names))[:, 1]
+        self.assertTrue(np.array_equal(bundle.predict_array(self.serving_rows)[1], expected))
+
+    def test_explanation_requires_recorded_version(self):
+        # 저장된 결과를 계산한 버전이 로드된 버전이 아니면 설명하지 않음
+        features = dict(zip(self.feature_names, self.serving_rows[0].tolist()))
+        with mock.patch.object(model_provider, '_bundle', self._bundle('2=yes,1=no')):
+            self.assertEqual(model_provider.explain_features(features, version='test')['model_version'], 'test')
+            self.assertIsNone(model_provider.explain_features(features, version='old'))
+            self.assertIsNone(model_provider.explain_features(features, version=''))
+
+    def test_unrecorded_encoding_is_csv(self):
+        # 인코딩이 기록되지 않은 매니페스트(legacy 모델 등)는 학습 CSV 인코딩으로 변환
+        artifact = registry.ModelArtifact('legacy', tempfile.gettempdir(), {})
+        forest = FlatForest.from_sklearn(self.model, self.feature_names)
+        bundle = ModelBundle(artifact, self.feature_names, forest, None, '0' * 12, model=self.model)
+        self.assertEqual(bundle.symptom_encoding, '2=yes,1=no')
+
+        expected = self.model.predict_proba(pd.DataFrame(self.csv_rows, columns=self.feature_names))[:, 1]
+        self.assertTrue(np.array_equal(bundle.predict_array(self.serving_rows)[1], expected))
+        # 증상이 모두 '예'인 환자와 모두 '아니오'인 환자의 위험도가 달라야 함
+        patient = dict.fromkeys(self.feature_names, 0)
+        patient.update({'GENDER': 1, 'AGE': 65})
+        all_no = bundle.predict_one(patient)[1]
+        all_yes = bundle.predict_one({**patient, **{self.feature_names[i]: 1 for i in self.symptoms}})[1]
+        self.assertGreater(all_yes, all_no)
+
+    def test_backfill_legacy_data(self):
+        # import-legacy로 학습 데이터 정보 없이 등록된 버전만 학습 CSV 인코딩을 기록
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(registry, 'VERSIONS_DIR', tmp_dir):
+            for version, manifest in [('v1', {'source': 'legacy'}), ('v2', {'data': {'source': 'db'}})]:
+                os.makedirs(registry.version_dir(version))
+                registry.write_manifest(version, manifest)
+            self.assertEqual(registry.backfill_legacy_data(), ['v1'])
+            self.assertEqual(registry.read_manifest('v1')['data'], registry.LEGACY_DATA)
+            self.assertEqual(registry.read_manifest('v2'), {'data': {'source': 'db'}})
+            self.assertEqual(registry.backfill_legacy_data(), [])
+
+    def test_unknown_encoding_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._bundle('Y/N')
+
+
+class MicroBatcherTests(TestCase):
+    """마이크로 배치 대기와 배치 예측 실패 처리"""
+
+    def test_single_caller_does_not_wait(self):
+        # 결과를 기다리는 다른 호출자가 없으면 max_wait 동안 기다리지 않음 (단일 스레드 워커)
+        batcher = MicroBatcher(lambda rows: [row['x'] for row in rows], max_wait=1.0, timeout=5.0)
+        start = time.perf_counter()
+        self.assertEqual([batcher.submit({'x': i}) for i in range(3)], [0, 1, 2])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_batch_failure_raises_batcher_unavailable(self):
+        def predict_batch(rows):
+            raise ValueError('예측 실패')
+
+        batcher = MicroBatcher(predict_batch, timeout=5.0)
+        with self.assertRaises(BatcherUnavailable) as raised:
+            batcher.submit({'x': 0})
+        self.assertIsInstance(raised.exception.__cause__, ValueError)
+
+    def test_fallback_warning_is_rate_limited(self):
+        # 과부하로 배치가 계속 실패해도 경고는 간격당 한 번, 실패 횟수는 모두 집계
+        with mock.patch.multiple(model_provider, _fallbacks=0, _fallbacks_logged=0, _fallback_logged_at=None), \
+                self.assertLogs('lungcancer.model_provider', level='WARNING') as logs:
+            for _ in range(100):
+                model_provider._log_batcher_fallback(BatcherUnavailable('대기열이 가득 찼습니다'))
+            self.assertEqual(model_provider.fallback_count(), 100)
+            self.assertEqual(len(logs.records), 1)
+
+            model_provider._fallback_logged_at -= model_provider.FALLBACK_LOG_INTERVAL
+            model_provider._log_batcher_fallback(BatcherUnavailable('대기열이 가득 찼습니다'))
+            self.assertEqual(len(logs.records), 2)
+            self.assertIn('99건 생략', logs.output[-1])
+
+
+def _csv_bundle():
+    """학습 CSV로 학습한 모델의 번들 (매니페스트에 학습 CSV 인코딩 기록)"""
+    model, feature_names, _ = _trained_forest()
+    artifact = registry.ModelArtifact('test', tempfile.gettempdir(), {'data': dict(registry.LEGACY_DATA)})
+    return ModelBundle(artifact, feature_names, FlatForest.from_sklearn(model, feature_names), None, '0' * 12,
+                       model=model)
+
+
+def _survey_row(index, yes=2):
+    row = {'name': f'환자 {index}', 'gender': 1, 'age': 60 + index}
+    row.update(dict.fromkeys(batch.SYMPTOM_FIELDS, yes))
+    return row
+
+
+@override_settings(ML_MODEL_RELOAD_INTERVAL=None, PREDICTION_CACHE={'ENABLED': False})
+class BatchPredictAPITests(TestCase):
+    """일괄 예측 API - JSON/CSV 본문, 행 수 제한, 행별 검증 오류, 저장 실패 시 롤백"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bundle = _csv_bundle()
+
+    def setUp(self):
+        patcher = mock.patch.object(model_provider, '_bundle', self.bundle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(User.objects.create_user('api-user', password='password'))
+        self.url = reverse('lungcancer:api_predict_batch')
+
+    def _post(self, body, content_type='application/json', save=False):
+        return self.client.post(f'{self.url}?save={str(save).lower()}', body, content_type=content_type)
+
+    def test_json_rows_are_predicted_in_order(self):
+        rows = [_survey_row(0, yes=2), _survey_row(1, yes=1)]
+        for body in (rows, {'rows': rows}):
+            response = self._post(body)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual((data['count'], data['valid_count'], data['error_count']), (2, 2, 0))
+            self.assertFalse(data['saved'])
+            self.assertEqual([item['index'] for item in data['results']], [0, 1])
+
+            expected = self.bundle.predict_batch([Patient(**row).get_symptoms_dict() for row in rows])[1]
+            self.assertEqual([item['probability'] for item in data['results']], expected.tolist())
+        self.assertFalse(Patient.objects.exists())
+
+    def test_csv_body(self):
+        rows = [_survey_row(i) for i in range(3)]
+        header = list(rows[0])
+        body = '\n'.join([','.join(header)] + [','.join(str(row[key]) for key in header) for row in rows])
+        response = self._post(body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['valid_count'], 3)
+
+    def test_invalid_rows_are_reported_per_row(self):
+        rows = [_survey_row(0), {**_survey_row(1), 'smoking': 5}, 'not a row']
+        data = self._post(rows).json()
+        self.assertEqual((data['valid_count'], data['error_count']), (1, 2))
+        self.assertIn('smoking', data['results'][1]['errors'])
+        self.assertIn('__all__', data['results'][2]['errors'])
+        self.assertEqual(data['results'][0]['name'], '환자 0')
+
+    def test_row_limit_and_empty_body(self):
+        with self.settings(BATCH_PREDICT_MAX_ROWS=2):
+            self.assertEqual(self._post([_survey_row(i) for i in range(3)]).status_code, 400)
+        self.assertEqual(self._post([]).status_code, 400)
+        self.assertEqual(self._post({'rows': 'x'}).status_code, 400)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertIn(self._post([_survey_row(0)]).status_code, (401, 403))
+
+    def test_failed_patient_chunk_rolls_back_batch(self):
+        # 두 번째 청크에서 실패하면 첫 번째 청크도 저장하지 않음
+        bulk_create = QuerySet.bulk_create
+        calls = []
+
+        def failing_bulk_create(queryset, objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise DatabaseError('id 확인 실패')
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(batch, 'BULK_CHUNK_SIZE', 2), \
+                mock.patch.object(QuerySet, 'bulk_create', autospec=True, side_effect=failing_bulk_create):
+            response = self._post([_survey_row(i) for i in range(3)], save=True)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(calls, [2, 1])
+        self.assertFalse(Patient.objects.exists())
+
+
+def _insert_results(n, seed, using=synthetic.BENCH_DATABASE):
+    """무작위 lung_result 행 n개 저장 (위험 점수 0, 100과 구간 경계 포함)"""
+    rng = np.random.default_rng(seed)
+    scores = np.concatenate([[0, 100, 40, 39.99, 70], rng.integers(0, 10001, n)[5:] / 100])[:n]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    LungResult.objects.using(using).bulk_create([
+        LungResult(
+            record_id=i + 1, name=f'환자 {i}', gender=str(int(rng.integers(0, 2))), age=int(rng.integers(1, 121)),
+            prediction='양성' if score >= 50 else '음성', risk_score=Decimal(f'{score:.2f}'),
+            created_at=start + timedelta(hours=int(rng.integers(0, 24 * 30))),
+        )
+        for i, score in enumerate(scores)
+    ])
+
+
+class ResultRollupTests(TestCase):
+    """일별 집계 테이블의 통계(result_rollup.statistics)가 원본 집계(result_stats.result_statistics)와 같은지 확인
+
+    lung_result는 로컬 SQLite bench 데이터베이스, 집계 테이블은 기본 데이터베이스에 있습니다.
+    """
+
+    databases = {'default', synthetic.BENCH_DATABASE}
+    using = synthetic.BENCH_DATABASE
+
+    @classmethod
+    def setUpClass(cls):
+        # SQLite 스키마 변경은 테스트 트랜잭션 밖에서 실행
+        synthetic.prepare_database(cls.using)
+        super().setUpClass()
+
+    def assertStatisticsMatch(self):
+        expected = result_stats.result_statistics(using=self.using)
+        actual = result_rollup.statistics()
+        for key in ('total', 'predictions', 'by_gender', 'by_age_decade'):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertAlmostEqual(actual['avg_age'], expected['avg_age'])
+        if expected['risk_histogram'] is None:
+            self.assertIsNone(actual['risk_histogram'])
+        else:
+            for actual_part, expected_part in zip(actual['risk_histogram'], expected['risk_histogram']):
+                self.assertTrue(np.array_equal(actual_part, expected_part))
+
+    def test_rollup_matches_source_statistics(self):
+        _insert_results(500, seed=1)
+        self.assertEqual(result_rollup.catch_up(using=self.using, chunk_size=64, create=True), 500)
+        self.assertStatisticsMatch()
+
+        # watermark 이하 행 수정
+        results = LungResult.objects.using(self.using)
+        updated = results.order_by('result_id')[10]
+        with result_rollup.tracking(using=self.using, result_id=updated.result_id):
+            updated.age, updated.gender, updated.prediction = 35, '1', '양성'
+            updated.risk_score = Decimal('99.99')
+            updated.save(using=self.using)
+        self.assertStatisticsMatch()
+
+        # watermark 이하 행 삭제
+        deleted = list(results.order_by('result_id').values_list('result_id', flat=True)[20:40])
+        with result_rollup.tracking(using=self.using, result_id__in=deleted):
+            results.filter(result_id__in=deleted).delete()
+        self.assertStatisticsMatch()
+
+        # watermark 이후 새 행
+        _insert_results(100, seed=2)
+        self.assertEqual(result_rollup.catch_up(using=self.using), 100)
+        self.assertStatisticsMatch()
+
+        # 집계가 어긋나면 reconcile(fix=True)로 복구
+        row = LungResultRollup.objects.order_by('pk').first()
+        row.count += 3
+        row.save()
+        report = result_rollup.reconcile(using=self.using, chunk_size=64, fix=True)
+        self.assertEqual((report['mismatched'], report['fixed']), (1, True))
+        self.assertStatisticsMatch()
+        self.assertFalse(result_rollup.reconcile(using=self.using)['mismatched'])
+
+        # 모든 행을 삭제하면 히스토그램 없음
+        with result_rollup.tracking(using=self.using):
+            results.all().delete()
+        self.assertStatisticsMatch()
+
+
+class RescoreTests(TestCase):
+    """저장된 lung_result 재계산 - 로컬 SQLite bench 데이터베이스, 현재 프로세스에서 예측(jobs=1)"""
+
+    databases = {'default', synthetic.BENCH_DATABASE}
+    using = synthetic.BENCH_DATABASE
+    n_records = 120
+    chunk_size = 25
+
+    @classmethod
+    def setUpClass(cls):
+        synthetic.prepare_database(cls.using)
+        super().setUpClass()
+        # 같은 모델을 두 버전 이름으로 등록 (v2로 재계산하면 값은 그대로이고 모델 버전만 바뀜)
+        bundle = _csv_bundle()
+        cls.bundles = {
+            version: ModelBundle(registry.ModelArtifact(version, tempfile.gettempdir(), bundle.artifact.manifest),
+                                 bundle.feature_names, bundle.forest, None, '0' * 12, model=bundle.model)
+            for version in ('v1', 'v2')
+        }
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(registry, 'get_artifact', lambda version: self.bundles[version].artifact),
+            mock.patch.object(model_provider, 'load_bundle', lambda artifact: self.bundles[artifact.version]),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.checkpoint_dir = tmp_dir.name
+
+        rng = np.random.default_rng(0)
+        created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        records = LungRecord.objects.using(self.using).bulk_create([
+            LungRecord(gender=str(int(rng.integers(0, 2))), age=int(rng.integers(20, 90)), lung_cancer=1,
+                       created_at=created, **{field: int(rng.integers(1, 3)) for field in batch.SYMPTOM_FIELDS})
+            for _ in range(self.n_records)
+        ])
+        # 모든 결과는 이전 모델의 값(음성, 0%)으로 저장되어 있고, 마지막 기록에는 결과가 없음
+        LungResult.objects.using(self.using).bulk_create([
+            LungResult(record_id=record.pk, name=f'환자 {record.pk}', gender=record.gender, age=record.age,
+                       prediction='음성', risk_score=Decimal('0.00'), created_at=created)
+            for record in records[:-1]
+        ])
+        # 결과는 남아 있고 lung_record는 삭제된 기록 (청크 범위 안)
+        self.orphan = LungResult.objects.using(self.using).get(record_id=records[10].pk)
+        records[10].delete(using=self.using)
+        self.records = [record for i, record in enumerate(records) if i != 10]
+
+    def _rescore(self, version='v1', **options):
+        return rescore.rescore('results', version=version, jobs=1, chunk_size=self.chunk_size, using=self.using,
+                               checkpoint_dir=self.checkpoint_dir, verbose=False, **options)
+
+    def _expected(self):
+        """기록별 (예측, 위험 점수) - 웹 예측과 같은 특성(서빙 인코딩)으로 계산"""
+        bundle = self.bundles['v1']
+        rows = []
+        for record in self.records[:-1]:
+            features = record.get_symptoms_dict()
+            features['GENDER'] = int(record.gender)
+            rows.append(features)
+        labels, probabilities = bundle.predict_batch(rows)
+        return {
+            record.pk: ('양성' if label == 1 else '음성', Decimal(int(round(float(p) * 10000))).scaleb(-2))
+            for record, label, p in zip(self.records, labels, probabilities)
+        }
+
+    def _stored(self):
+        return {
+            record_id: (prediction, risk_score)
+            for record_id, prediction, risk_score in LungResult.objects.using(self.using)
+            .exclude(result_id=self.orphan.result_id).values_list('record_id', 'prediction', 'risk_score')
+        }
+
+    def _versions(self):
+        return set(LungResultModelVersion.objects.values_list('model_version', flat=True))
+
+    def test_rescore_updates_results_and_stamps_version(self):
+        report = self._rescore()
+        self.assertEqual(self._stored(), self._expected())
+        self.assertEqual(report['rows'], len(self.records))
+        self.assertEqual(report['scored'], len(self.records) - 1)
+        self.assertEqual(report['missing'], 1)
+
+        # 삭제된 lung_record의 결과는 비교하지도, 갱신하지도 않음
+        orphan = LungResult.objects.using(self.using).get(result_id=self.orphan.result_id)
+        self.assertEqual((orphan.prediction, orphan.risk_score), ('음성', Decimal('0.00')))
+        stamped = LungResultModelVersion.objects.values_list('result_id', 'model_version')
+        self.assertEqual(len(stamped), len(self.records) - 1)
+        self.assertEqual(self._versions(), {'v1'})
+        self.assertNotIn(self.orphan.result_id, dict(stamped))
+
+        # 완료된 체크포인트가 있으면 다시 실행하지 않음
+        with mock.patch.object(rescore, '_apply_results') as apply_results:
+            self.assertEqual(self._rescore()['rows'], report['rows'])
+        apply_results.assert_not_called()
+
+    def test_version_only_change_is_stamped(self):
+        self._rescore()
+        report = self._rescore(version='v2')
+        self.assertEqual(report['version_only'], len(self.records) - 1)
+        self.assertEqual(report['written'], len(self.records) - 1)
+        self.assertEqual(report['positive_to_negative'] + report['negative_to_positive'] + report['score_changed'], 0)
+        self.assertEqual(self._versions(), {'v2'})
+        self.assertEqual(self._stored(), self._expected())
+
+    def test_dry_run_does_not_write(self):
+        before = self._stored()
+        report = self._rescore(dry_run=True)
+        self.assertEqual(report['written'], 0)
+        self.assertGreater(report['negative_to_positive'] + report['score_changed'], 0)
+        self.assertEqual(self._stored(), before)
+        self.assertFalse(LungResultModelVersion.objects.exists())
+        self.assertIsNone(rescore.Checkpoint('results', self.checkpoint_dir).load())
+
+    def _interrupt_after(self, n_chunks, version='v1'):
+        """n_chunks개 청크를 저장한 뒤 중단된 실행 - 체크포인트 상태 반환"""
+        apply_results = rescore._apply_results
+        calls = []
+
+        def interrupted(*args, **kwargs):
+            if len(calls) == n_chunks:
+                raise KeyboardInterrupt
+            calls.append(args[0][0])
+            return apply_results(*args, **kwargs)
+
+        with mock.patch.object(rescore, '_apply_results', side_effect=interrupted), \
+                self.assertRaises(KeyboardInterrupt):
+            self._rescore(version=version)
+        return rescore.Checkpoint('results', self.checkpoint_dir).load()
+
+    def _first_chunk_pk(self, version):
+        """다시 실행한 재계산이 처음 처리한 청크의 첫 pk"""
+        apply_results = rescore._apply_results
+        first = []
+
+        def spy(pk, *args, **kwargs):
+            first.append(int(pk[0]))
+            return apply_results(pk, *args, **kwargs)
+
+        with mock.patch.object(rescore, '_apply_results', side_effect=spy):
+            report = self._rescore(version=version)
+        return first[0], report
+
+    def test_resume_from_checkpoint(self):
+        state = self._interrupt_after(2)
+        self.assertEqual(state['report']['chunks'], 2)
+        self.assertEqual(state['last_pk'], self.records[2 * self.chunk_size - 1].pk)
+
+        first_pk, report = self._first_chunk_pk('v1')
+        self.assertEqual(first_pk, self.records[2 * self.chunk_size].pk)
+        self.assertEqual(report['rows'], len(self.records))
+        self.assertEqual(self._stored(), self._expected())
+
+    def test_model_version_mismatch_restarts(self):
+        self._interrupt_after(2, version='v1')
+        first_pk, report = self._first_chunk_pk('v2')
+        self.assertEqual(first_pk, self.records[0].pk)
+        self.assertEqual(report['rows'], len(self.records))
+        self.assertEqual(self._versions(), {'v2'})
+
+
+def _summary(n_positive, n_negative):
+    """result_stats.result_statistics 형식의 통계 (행이 없으면 히스토그램 없음)"""
+    total = n_positive + n_negative
+    histogram = None
+    if total:
+        counts = np.zeros(len(result_stats.RISK_BIN_EDGES) - 1, dtype=np.int64)
+        counts[[2, 15]] = n_negative, n_positive
+        histogram = (counts, result_stats.RISK_BIN_EDGES.copy())
+    return {
+        'total': total,
+        'predictions': {'NO': n_negative, 'YES': n_positive},
+        'by_gender': {'남성': {'NO': n_negative, 'YES': n_positive}} if total else {},
+        'by_age_decade': {60: {'NO': n_negative, 'YES': n_positive}} if total else {},
+        'avg_age': 60.0 if total else 0,
+        'risk_histogram': histogram,
+    }
+
+
+@override_settings(CHART_CACHE={'ENABLED': True, 'BACKEND': 'local', 'MAX_SIZE': 4, 'TTL': 60})
+class VisualizationChartTests(TestCase):
+    """차트 URL - 데이터 버전 형식 제한, 알 수 없는 버전은 통계를 다시 계산하지 않고 현재 버전으로 이동"""
+
+    def setUp(self):
+        patcher = mock.patch.object(chart_cache, '_cache', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, version, load_summary):
+        url = reverse('lungcancer:visualization_chart', args=[version, 'risk', 'png'])
+        with mock.patch('lungcancer.views._visualization_summary', side_effect=load_summary) as summary:
+            return self.client.get(url), summary
+
+    def test_version_must_be_hex(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse('lungcancer:visualization_chart', args=['not-a-version', 'risk', 'png'])
+        response = self.client.get('/visualization/charts/%27%20or%201/risk.png')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_version_redirects_without_recomputing(self):
+        current = chart_cache.publish_summary(_summary(3, 5))
+        response, load_summary = self._get('0123456789abcdef', lambda: self.fail('통계를 다시 계산함'))
+        self.assertRedirects(
+            response, reverse('lungcancer:visualization_chart', args=[current, 'risk', 'png']),
+            fetch_redirect_response=False,
+        )
+        load_summary.assert_not_called()
+
+        # 캐시의 통계로 렌더링 (항목 수 제한으로 현재 버전 기록이 지워지지 않음)
+        response, load_summary = self._get(current, lambda: self.fail('통계를 다시 계산함'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(chart_cache.current_version(), current)
+
+    def test_cold_cache_computes_once(self):
+        response, load_summary = self._get('0123456789abcdef', lambda: _summary(0, 0))
+        self.assertEqual(response.status_code, 302)
+        load_summary.assert_called_once()
+
+        # 결과가 모두 삭제된 통계(히스토그램 없음)도 빈 차트로 렌더링
+        current = chart_cache.data_version(_summary(0, 0))
+        response, load_summary = self._get(current, lambda: self.fail('통계를 다시 계산함'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], charts.FORMATS['png'])
@@ -1,16 +1,22 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_curve, auc
 import joblib
 import os
+import sys
+import time
 
-def train_lung_cancer_model():
-    """폐암 예측 머신러닝 모델 학습 및 저장"""
-    
-    # 데이터 로드
+# 스크립트로 실행해도 lungcancer 패키지 모듈을 불러올 수 있도록 프로젝트 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lungcancer import registry
+from lungcancer.tuning import BASE_PARAMS, halving_search
+
+def load_csv_data():
+    """학습 CSV를 읽어 (X DataFrame, y Series) 반환, 파일이 없으면 None"""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = os.path.dirname(current_dir)
     data_path = os.path.join(project_dir, 'survey lung cancer.csv')
@@ -18,13 +24,10 @@ def train_lung_cancer_model():
     # 파일이 존재하는지 확인
     if not os.path.exists(data_path):
         print(f"데이터 파일을 찾을 수 없습니다: {data_path}")
-        return
+        return None
     
     df = pd.read_csv(data_path)
     
-    print("="*50)
-    print("폐암 예측 모델 학습 시작")
-    print("="*50)
     print(f"데이터 크기: {df.shape}")
     print(f"클래스 분포:\n{df['LUNG_CANCER'].value_counts()}")
     
@@ -35,19 +38,55 @@ def train_lung_cancer_model():
     df['LUNG_CANCER'] = df['LUNG_CANCER'].map({'YES': 1, 'NO': 0})
     
     # 특성과 타겟 분리
-    X = df.drop('LUNG_CANCER', axis=1)
-    y = df['LUNG_CANCER']
-    
-    # 특성 이름 저장
-    feature_names = X.columns.tolist()
+    return df.drop('LUNG_CANCER', axis=1), df['LUNG_CANCER']
+
+def _setup_django():
+    """스크립트로 실행할 때 heart_db 모델을 사용할 수 있도록 Django 초기화"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lungcancer_project.settings')
+    import django
+    django.setup()
+
+def load_db_data(tables=('survey',)):
+    """heart_db 테이블을 스트리밍으로 읽어 (X DataFrame, y Series, {테이블: 마지막 pk}) 반환
+
+    증상 값은 1=예, 0=아니오 로 변환됩니다 (CSV는 2=예, 1=아니오).
+    X는 uint8 행렬 하나를 감싼 DataFrame이라 열별 복사나 object 열이 생기지 않습니다.
+    폐암 여부가 한 종류뿐인 테이블이 있으면 ValueError (training_data.check_label_classes).
+    """
+    _setup_django()
     
-    # 학습/테스트 데이터 분리
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    from lungcancer.training_data import FEATURE_NAMES, check_label_classes, load_training_data
     
+    check_label_classes(tables)
+    X, y, watermarks = load_training_data(sources=tables)
+    print(f"데이터 크기: {X.shape} (테이블: {', '.join(tables)}, {X.nbytes / 1024:.1f}KB)")
+    print(f"클래스 분포: YES {int(y.sum())}, NO {int(len(y) - y.sum())}")
+    return pd.DataFrame(X, columns=FEATURE_NAMES, copy=False), pd.Series(y, name='LUNG_CANCER'), watermarks
+
+# 학습 백엔드 (--backend 또는 ML_MODEL_BACKEND 환경 변수)
+# rf: RandomForestClassifier, hgb: HistGradientBoostingClassifier
+BACKENDS = ('rf', 'hgb')
+
+# HistGradientBoosting 파라미터 - 설문 데이터는 행 수가 적어 얕은 트리와 작은 학습률이 교차 검증 정확도가 높음
+HGB_PARAMS = {
+    'max_iter': 200,
+    'learning_rate': 0.05,
+    'max_depth': 3,
+    'min_samples_leaf': 10,
+    'l2_regularization': 1.0,
+    'early_stopping': False,   # 검증 분할 없이 max_iter까지 학습 (결과 재현성)
+    'class_weight': 'balanced',
+    'random_state': 42,
+}
+
+def build_model(backend='rf'):
+    """백엔드별 기본 파라미터의 분류기"""
+    if backend == 'hgb':
+        return HistGradientBoostingClassifier(**HGB_PARAMS)
+    if backend != 'rf':
+        raise ValueError(f'알 수 없는 학습 백엔드입니다: {backend} (선택: {", ".join(BACKENDS)})')
     # RandomForest 모델 생성 (노트북과 동일한 파라미터)
-    model = RandomForestClassifier(
+    return RandomForestClassifier(
         n_estimators=100,        # 트리 개수
         max_depth=10,            # 트리 최대 깊이
         min_samples_split=5,     # 노드 분할에 필요한 최소 샘플 수
@@ -55,13 +94,81 @@ def train_lung_cancer_model():
         random_state=42,         # 재현 가능한 결과
         class_weight='balanced'  # 클래스 불균형 처리
     )
+
+def to_uint8(X):
+    """특성 DataFrame을 uint8로 변환 (HistGradientBoosting 입력용)
+
+    모든 특성이 256개 미만의 정수 값이므로 각 값이 그대로 하나의 bin이 되어 구간화로 잃는 정보가 없습니다.
+    """
+    values = X.to_numpy()
+    if values.min() < 0 or values.max() > 255 or not np.array_equal(values, np.round(values)):
+        raise ValueError('uint8로 변환할 수 없는 특성 값이 있습니다 (0~255 정수만 가능).')
+    return X.astype(np.uint8)
+
+def train_lung_cancer_model(tune=False, n_jobs=None, source='csv', tables=('survey',), distill=False,
+                            backend='rf', compress=False):
+    """폐암 예측 머신러닝 모델 학습 및 저장
+
+    tune=True 이면 학습 데이터에서 successive halving으로 RandomForest 파라미터를 탐색하여
+    최적 파라미터로 학습합니다 (n_jobs: 탐색 및 교차 검증 프로세스 수).
+    source='db' 이면 CSV 대신 heart_db의 tables(survey, record)에서 학습 데이터를 읽습니다.
+    distill=True 이면 게시한 모델을 교사로 작은 학생 모델을 증류하여 별도 버전으로 게시합니다 (활성화하지 않음).
+    backend='hgb' 이면 uint8 특성으로 HistGradientBoostingClassifier를 학습합니다 (같은 저장소 형식과 서빙 경로 사용).
+    compress=True 이면 노드 테이블을 압축하여 게시합니다 (lungcancer/compression.py).
+    """
+    
+    print("="*50)
+    print("폐암 예측 모델 학습 시작")
+    print("="*50)
+    
+    data_info = {'source': source}
+    if source == 'db':
+        X, y, watermarks = load_db_data(tables)
+        data_info.update({'tables': list(tables), 'watermarks': watermarks, 'symptom_encoding': '1=yes,0=no'})
+    else:
+        data = load_csv_data()
+        if data is None:
+            return
+        X, y = data
+        data_info['symptom_encoding'] = '2=yes,1=no'
+    
+    if backend == 'hgb':
+        X = to_uint8(X)
+    
+    # 특성 이름 저장
+    feature_names = X.columns.tolist()
+    
+    # 학습/테스트 데이터 분리
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    if source == 'db':
+        # 증분 학습에서 class_weight='balanced'를 누적 분포로 계산하기 위한 클래스별 학습 행 수
+        data_info['class_counts'] = np.bincount(y_train, minlength=2).tolist()
+    
+    model = build_model(backend)
+    
+    tuning = None
+    if tune and backend != 'rf':
+        print("하이퍼파라미터 탐색은 RandomForest 백엔드만 지원합니다. 기본 파라미터로 학습합니다.")
+    elif tune:
+        print("="*60)
+        print("하이퍼파라미터 탐색 (successive halving)")
+        print("="*60)
+        tuning = halving_search(X_train.to_numpy(), y_train.to_numpy(), n_jobs=n_jobs)
+        print(f"최적 파라미터: {tuning['best_params']} (교차 검증 정확도 {tuning['best_score']:.4f})")
+        print(f"학습 {tuning['evaluated']}회, 캐시 재사용 {tuning['reused']}회, 소요 시간 {tuning['elapsed']:.1f}초")
+        model = RandomForestClassifier(**BASE_PARAMS, **tuning['best_params'])
     
     print("="*60)
-    print("RandomForest 모델 학습 시작")
+    print(f"{type(model).__name__} 모델 학습 시작")
     print("="*60)
     
     # 모델 학습
+    start = time.perf_counter()
     model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    print(f"학습 시간: {fit_seconds:.3f}초")
     
     # 예측
     y_train_pred = model.predict(X_train)
@@ -75,7 +182,7 @@ def train_lung_cancer_model():
     print(f"테스트 데이터 정확도: {test_accuracy:.4f} ({test_accuracy*100:.2f}%)")
     
     # 교차 검증 (노트북과 동일)
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
+    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy', n_jobs=n_jobs)
     print(f"\n교차 검증 정확도: {cv_scores.mean():.4f} (+/- {cv_scores.std() * 2:.4f})")
     print(f"각 Fold 점수: {cv_scores}")
     
@@ -85,31 +192,253 @@ def train_lung_cancer_model():
     print("\n혼동 행렬:")
     print(confusion_matrix(y_test, y_test_pred))
     
-    # 특성 중요도
+    # 특성 중요도 (HistGradientBoosting은 feature_importances_가 없으므로 테스트 데이터의 순열 중요도)
+    if hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+    else:
+        from sklearn.inspection import permutation_importance
+        importances = permutation_importance(
+            model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=n_jobs
+        ).importances_mean
     feature_importance = pd.DataFrame({
         'feature': feature_names,
-        'importance': model.feature_importances_
+        'importance': importances
     }).sort_values('importance', ascending=False)
     
     print("\n특성 중요도 (상위 10개):")
     print(feature_importance.head(10))
     
-    # 모델 저장
-    model_dir = os.path.join(current_dir, 'ml_model')
-    os.makedirs(model_dir, exist_ok=True)
-    
-    model_path = os.path.join(model_dir, 'lung_cancer_model.pkl')
-    feature_path = os.path.join(model_dir, 'feature_names.pkl')
-    
-    joblib.dump(model, model_path)
-    joblib.dump(feature_names, feature_path)
+    # 모델 저장소에 새 버전으로 게시 (위험도 테이블 생성/검증 포함)
+    # 실행 중인 웹 워커는 활성 버전 변경을 감지해 재시작 없이 새 모델로 교체
+    metrics = {
+        'train_accuracy': round(float(train_accuracy), 4),
+        'test_accuracy': round(float(test_accuracy), 4),
+        'cv_accuracy_mean': round(float(cv_scores.mean()), 4),
+        'cv_accuracy_std': round(float(cv_scores.std()), 4),
+        'n_samples': int(len(X)),
+        'fit_seconds': round(fit_seconds, 4),
+    }
+    extra = {'data': data_info}
+    if tuning is not None:
+        metrics['tuning_best_cv_accuracy'] = round(tuning['best_score'], 4)
+        extra['tuning'] = {key: tuning[key] for key in ('best_params', 'rounds', 'evaluated', 'reused')}
+    artifact = registry.publish(model, feature_names, metrics=metrics, extra=extra, compress=compress)
     
-    print(f"\n모델 저장 완료: {model_path}")
-    print(f"특성 이름 저장 완료: {feature_path}")
+    print(f"\n모델 버전 게시 완료: {artifact.version}")
+    print(f"모델 저장 위치: {artifact.directory}")
     print("="*50)
     
+    if distill:
+        distill_student(artifact, model, feature_names, X_train)
+    
     return model, feature_names, test_accuracy
 
+def distill_student(artifact, model, feature_names, X_train=None):
+    """입력 공간 전체에서 교사(model)의 확률을 학습한 작은 학생 모델을 게시 (lungcancer/distill.py)"""
+    from lungcancer.distill import publish_student
+    
+    print("="*60)
+    print(f"학생 모델 증류 (교사 {artifact.version}, {type(model).__name__})")
+    print("="*60)
+    student_artifact, report = publish_student(
+        artifact, model, feature_names, X_data=None if X_train is None else X_train.to_numpy(),
+    )
+    print(f"노드 수: 교사 {report['teacher_nodes']}개 → 학생 {report['student_nodes']}개 "
+          f"(깊이 {report['max_depth']}, {report['elapsed']:.1f}초)")
+    print(f"입력 {report['n_inputs']}가지 전체: 최대 확률 차이 {report['max_deviation']:.4f}, "
+          f"평균 {report['mean_deviation']:.4f}, 라벨 일치 {report['label_agreement']:.4%}")
+    if report['passed']:
+        print(f"학생 모델 게시: {student_artifact.version} "
+              f"(python manage.py model_registry activate {student_artifact.version} 로 서빙 모델 교체 가능)")
+    else:
+        print(f"학생 모델 게시: {student_artifact.version} (기준 미달 - 일치율 {report['min_agreement']:.0%} 이상, "
+              f"최대 차이 {report['max_deviation_bound']} 이하 - 활성화하지 마세요)")
+    return student_artifact
+
+# 증분 학습 검증 행: 새로 들어온 행 중 pk % HOLDOUT_MOD == 0 인 행은 어떤 모델도 학습하지 않음
+HOLDOUT_MOD = 5
+
+def _holdout_scores(model, X, y):
+    """검증 행에 대한 정확도와 ROC AUC (검증 행이 없으면 None)"""
+    from sklearn.metrics import roc_auc_score
+    
+    if len(y) == 0:
+        return None
+    scores = {'accuracy': round(float(accuracy_score(y, model.predict(X))), 4)}
+    if len(np.unique(y)) == 2:
+        scores['auc'] = round(float(roc_auc_score(y, model.predict_proba(X)[:, 1])), 4)
+    return scores
+
+def _load_increment(tables, after):
+    """테이블별 after 이후 행을 읽어 (X_train, y_train, X_holdout, y_holdout, 새 watermark) 반환"""
+    from lungcancer.training_data import FEATURE_NAMES, load_training_data
+    
+    parts = {'train': ([], []), 'holdout': ([], [])}
+    watermarks = {}
+    for table in tables:
+        X, y, pk, marks = load_training_data(sources=(table,), after={table: after.get(table, 0)}, return_pk=True)
+        watermarks.update(marks)
+        holdout = pk % HOLDOUT_MOD == 0
+        for name, mask in (('train', ~holdout), ('holdout', holdout)):
+            parts[name][0].append(X[mask])
+            parts[name][1].append(y[mask])
+    
+    def frame(name):
+        X = np.concatenate(parts[name][0]) if parts[name][0] else np.empty((0, len(FEATURE_NAMES)), np.uint8)
+        y = np.concatenate(parts[name][1]) if parts[name][1] else np.empty(0, np.uint8)
+        return pd.DataFrame(X, columns=FEATURE_NAMES, copy=False), y
+    
+    X_train, y_train = frame('train')
+    X_holdout, y_holdout = frame('holdout')
+    return X_train, y_train, X_holdout, y_holdout, watermarks
+
+def _full_refit(model, tables, base_watermarks):
+    """비교용: 증분 검증 행을 제외한 전체 데이터로 같은 파라미터, 같은 트리 수의 모델을 새로 학습"""
+    from lungcancer.training_data import FEATURE_NAMES, load_training_data
+    
+    Xs, ys = [], []
+    for table in tables:
+        X, y, pk, _ = load_training_data(sources=(table,), return_pk=True)
+        keep = ~((pk > base_watermarks.get(table, 0)) & (pk % HOLDOUT_MOD == 0))
+        Xs.append(X[keep])
+        ys.append(y[keep])
+    X = pd.DataFrame(np.concatenate(Xs), columns=FEATURE_NAMES, copy=False)
+    
+    params = {**model.get_params(), **BASE_PARAMS, 'warm_start': False, 'n_estimators': len(model.estimators_)}
+    refit = RandomForestClassifier(**params)
+    start = time.perf_counter()
+    refit.fit(X, np.concatenate(ys))
+    return refit, time.perf_counter() - start
+
+def train_incremental(add_trees=20, retire=0, compare_full=False, n_jobs=None):
+    """활성 버전에 새 데이터로 학습한 트리를 추가하여 새 버전으로 게시 (warm_start)
+
+    활성 버전 manifest의 watermark(테이블별 마지막 pk) 이후 heart_db에 추가된 행으로
+    트리 add_trees개를 학습해 기존 트리에 더하고, retire > 0 이면 가장 오래된 트리를 그만큼 제거합니다.
+    새 행 중 pk % HOLDOUT_MOD == 0 인 행은 학습하지 않고 이전 버전과 새 버전을 비교하는 데 사용하며,
+    검증 정확도가 이전 버전보다 낮지 않을 때만 새 버전을 활성화합니다.
+    compare_full=True 이면 같은 트리 수로 전체 데이터를 다시 학습하는 시간과 비교합니다.
+    """
+    _setup_django()
+    
+    base = registry.active_artifact()
+    data = base.manifest.get('data') or {}
+    if data.get('source') != 'db':
+        print(f"활성 버전({base.version})은 heart_db로 학습한 모델이 아닙니다. "
+              f"먼저 --source db 로 전체 학습을 실행하세요.")
+        return None
+    if base.manifest.get('model_class', 'RandomForestClassifier') != 'RandomForestClassifier':
+        print(f"증분 학습은 RandomForest 버전만 지원합니다 (활성 버전: {base.manifest['model_class']}).")
+        return None
+    tables = tuple(data['tables'])
+    base_watermarks = data.get('watermarks', {})
+    
+    print("="*60)
+    print(f"증분 학습 (기준 버전 {base.version}, watermark {base_watermarks})")
+    print("="*60)
+    
+    X_train, y_train, X_holdout, y_holdout, watermarks = _load_increment(tables, base_watermarks)
+    print(f"새 데이터: 학습 {len(y_train)}행, 검증 {len(y_holdout)}행, 새 watermark {watermarks}")
+    if len(y_train) == 0:
+        print("마지막 학습 이후 추가된 데이터가 없습니다.")
+        return None
+    if len(np.unique(y_train)) < 2:
+        # 한 클래스만 있는 데이터로 트리를 추가하면 클래스 수가 달라져 기존 트리와 합칠 수 없음
+        print("새 학습 데이터에 양성/음성이 모두 있어야 합니다. 데이터가 더 쌓인 뒤 다시 실행하세요.")
+        return None
+    
+    model = joblib.load(base.model_path)
+    base_scores = _holdout_scores(model, X_holdout, y_holdout)
+    
+    # class_weight='balanced'는 지금까지 학습한 전체 행의 클래스 분포로 계산하여 고정
+    class_counts = np.bincount(y_train, minlength=2)
+    if data.get('class_counts'):
+        class_counts = class_counts + np.asarray(data['class_counts'])
+    params = {'warm_start': True, 'n_estimators': len(model.estimators_) + add_trees, 'n_jobs': n_jobs}
+    if model.class_weight is not None:
+        params['class_weight'] = {c: float(class_counts.sum() / (2 * class_counts[c])) for c in (0, 1)}
+    model.set_params(**params)
+    
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    
+    if retire:
+        retire = min(retire, len(model.estimators_) - 1)
+        model.estimators_ = model.estimators_[retire:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_), n_jobs=None)
+    
+    scores = _holdout_scores(model, X_holdout, y_holdout)
+    print(f"트리 {add_trees}개 추가, {retire}개 제거 → 총 {len(model.estimators_)}개 (학습 {fit_seconds:.3f}초)")
+    print(f"검증 점수: 이전 버전 {base_scores} → 새 버전 {scores}")
+    
+    incremental = {
+        'base_version': base.version,
+        'added_trees': add_trees,
+        'retired_trees': retire,
+        'n_trees': len(model.estimators_),
+        'train_rows': int(len(y_train)),
+        'holdout_rows': int(len(y_holdout)),
+        'fit_seconds': round(fit_seconds, 4),
+    }
+    if compare_full:
+        refit, refit_seconds = _full_refit(model, tables, base_watermarks)
+        incremental['full_refit_seconds'] = round(refit_seconds, 4)
+        incremental['full_refit_holdout'] = _holdout_scores(refit, X_holdout, y_holdout)
+        print(f"전체 재학습 (트리 {len(refit.estimators_)}개): {refit_seconds:.3f}초, "
+              f"검증 점수 {incremental['full_refit_holdout']} → 증분 학습이 {refit_seconds / fit_seconds:.1f}배 빠름")
+    
+    metrics = {
+        'n_samples': int(base.manifest.get('metrics', {}).get('n_samples', 0) + len(y_train)),
+        'increment_rows': int(len(y_train)),
+    }
+    if scores is not None:
+        metrics.update({f'holdout_{key}': value for key, value in scores.items()})
+        metrics.update({f'base_holdout_{key}': value for key, value in base_scores.items()})
+    improved = scores is None or scores['accuracy'] >= base_scores['accuracy']
+    
+    extra = {
+        'data': {**data, 'watermarks': watermarks, 'class_counts': class_counts.tolist()},
+        'incremental': incremental,
+    }
+    artifact = registry.publish(model, X_train.columns.tolist(), metrics=metrics, activate_version=improved,
+                                extra=extra)
+    
+    if improved:
+        print(f"\n모델 버전 게시 및 활성화: {artifact.version}")
+    else:
+        print(f"\n모델 버전 게시: {artifact.version} (검증 정확도가 낮아 활성화하지 않음, "
+              f"python manage.py model_registry activate {artifact.version} 로 직접 활성화 가능)")
+    return artifact
+
 if __name__ == '__main__':
-    train_lung_cancer_model()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='폐암 예측 모델 학습 및 모델 저장소 게시')
+    parser.add_argument('--backend', choices=BACKENDS, default=os.environ.get('ML_MODEL_BACKEND', 'rf'),
+                        help='학습 모델 (rf: RandomForest, hgb: HistGradientBoosting, '
+                             '기본: ML_MODEL_BACKEND 환경 변수 또는 rf)')
+    parser.add_argument('--tune', action='store_true', help='하이퍼파라미터 탐색 후 최적 파라미터로 학습 (rf)')
+    parser.add_argument('--jobs', type=int, default=None, help='탐색 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--source', choices=['csv', 'db'], default='csv', help='학습 데이터 위치 (기본: csv)')
+    parser.add_argument('--tables', default='survey',
+                        help='--source db 일 때 읽을 테이블 (쉼표 구분: survey,record, 기본: survey)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='활성 버전의 watermark 이후 추가된 heart_db 행으로 트리를 추가 학습')
+    parser.add_argument('--add-trees', type=int, default=20, help='증분 학습에서 추가할 트리 수 (기본: 20)')
+    parser.add_argument('--retire', type=int, default=0, help='증분 학습 후 제거할 가장 오래된 트리 수 (기본: 0)')
+    parser.add_argument('--compare-full', action='store_true', help='증분 학습 시간을 전체 재학습과 비교')
+    parser.add_argument('--compress', action='store_true',
+                        help='노드 테이블 압축 (임계값 정수화, 중복 서브트리 공유, 불필요한 분할 제거)')
+    parser.add_argument('--distill', action='store_true',
+                        help='학습 후 입력 공간 전체로 작은 학생 모델을 증류하여 별도 버전으로 게시')
+    args = parser.parse_args()
+    
+    if args.incremental:
+        train_incremental(add_trees=args.add_trees, retire=args.retire, compare_full=args.compare_full,
+                          n_jobs=args.jobs)
+    else:
+        train_lung_cancer_model(tune=args.tune, n_jobs=args.jobs, source=args.source,
+                                tables=tuple(args.tables.split(',')), distill=args.distill,
+                                backend=args.backend, compress=args.compress)
 
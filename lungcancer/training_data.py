@@ -0,0 +1,175 @@
+"""
+heart_db 학습 데이터 스트리밍 로더
+
+lung_cancer_survey / lung_record 테이블을 pk 기준 keyset 페이지(pk > 마지막 pk ORDER BY pk LIMIT n)로
+읽어 values_list 튜플을 바로 정수 배열로 만들고, 증상 값 변환(2=예 → 1, 1=아니오 → 0)을
+배열 연산으로 처리하여 uint8 특성 행렬에 채웁니다.
+
+- 모델 인스턴스나 object dtype DataFrame을 만들지 않습니다.
+- 시작 시점의 최대 pk와 행 수로 결과 행렬(행당 15바이트)을 미리 할당하므로,
+  테이블이 커져도 결과 행렬 외의 추가 메모리는 페이지 한 개 분량으로 일정합니다.
+- OFFSET을 사용하지 않으므로 뒤쪽 페이지도 인덱스 탐색 한 번으로 읽습니다.
+
+특성 순서와 이름은 학습 CSV와 같고, 증상 값은 웹 예측 경로(get_symptoms_dict)와 같은
+1=예, 0=아니오 로 변환됩니다.
+"""
+
+import itertools
+
+import numpy as np
+
+from .batch import SYMPTOM_FIELDS
+
+
+# 한 번에 읽는 행 수
+CHUNK_SIZE = 5000
+
+# 학습 CSV와 같은 특성 이름/순서
+FEATURE_NAMES = [
+    'GENDER', 'AGE', 'SMOKING', 'YELLOW_FINGERS', 'ANXIETY', 'PEER_PRESSURE',
+    'CHRONIC DISEASE', 'FATIGUE ', 'ALLERGY ', 'WHEEZING', 'ALCOHOL CONSUMING',
+    'COUGHING', 'SHORTNESS OF BREATH', 'SWALLOWING DIFFICULTY', 'CHEST PAIN',
+]
+
+# 학습 데이터로 사용할 수 있는 테이블
+SOURCES = ('survey', 'record')
+
+# values_list 열 순서: pk, 성별, 나이, 증상 13개, 폐암 여부
+_N_COLUMNS = 3 + len(SYMPTOM_FIELDS) + 1
+
+
+def _source_model(source):
+    from .models import LungCancerSurvey, LungRecord
+
+    if source == 'survey':
+        return LungCancerSurvey
+    if source == 'record':
+        return LungRecord
+    raise ValueError(f'알 수 없는 학습 데이터 테이블입니다: {source} (선택: {", ".join(SOURCES)})')
+
+
+def _source_rows(source, using):
+    """(pk, 성별, 나이, 증상..., 폐암 여부) 정수 튜플 queryset"""
+    from django.db.models import IntegerField
+    from django.db.models.functions import Cast
+
+    model = _source_model(source)
+    # lung_record의 성별은 문자열('1'/'0')로 저장되므로 데이터베이스에서 정수로 변환
+    gender = 'gender' if source == 'survey' else Cast('gender', IntegerField())
+    return model.objects.using(using).values_list('pk', gender, 'age', *SYMPTOM_FIELDS, 'lung_cancer')
+
+
+def encode_features(block):
+    """(n, 16) 정수 배열 (pk, 성별, 나이, 증상 13개) → X uint8 (n, 15)
+
+    성별 1=남성, 증상은 2=예 → 1, 그 외 → 0 (LungRecord.get_symptoms_dict와 동일)
+    """
+    ages = block[:, 2]
+    if len(ages) and (ages.min() < 0 or ages.max() > 255):
+        raise ValueError(f'uint8 범위를 벗어난 나이가 있습니다: {ages.min()}~{ages.max()}')
+
+    X = np.empty((len(block), len(FEATURE_NAMES)), dtype=np.uint8)
+    X[:, 0] = block[:, 1] == 1
+    X[:, 1] = ages
+    X[:, 2:] = block[:, 3:3 + len(SYMPTOM_FIELDS)] == 2
+    return X
+
+
+def encode_rows(block):
+    """(n, 17) 정수 배열 (pk 열 포함) → (X uint8 (n, 15), y uint8 (n,))
+
+    폐암 여부는 2=예 → 1, 그 외 → 0 (특성은 encode_features)
+    """
+    y = (block[:, -1] == 2).astype(np.uint8)
+    return encode_features(block), y
+
+
+def iter_chunks(source, using='heart_db', chunk_size=CHUNK_SIZE, after_pk=0, until_pk=None):
+    """pk 순서로 (pk 배열, X 청크, y 청크) 를 생성
+
+    after_pk보다 크고 until_pk 이하(None이면 제한 없음)인 행만 읽습니다.
+    """
+    rows = _source_rows(source, using)
+    if until_pk is not None:
+        rows = rows.filter(pk__lte=until_pk)
+
+    last_pk = after_pk
+    while True:
+        page = rows.filter(pk__gt=last_pk).order_by('pk')[:chunk_size]
+        # 행 튜플 목록을 만들지 않고 커서 결과를 바로 평탄화하여 배열로 변환
+        values = itertools.chain.from_iterable(page.iterator(chunk_size=chunk_size))
+        block = np.fromiter(values, dtype=np.int64).reshape(-1, _N_COLUMNS)
+        if len(block) == 0:
+            return
+        last_pk = int(block[-1, 0])
+        X, y = encode_rows(block)
+        yield block[:, 0].copy(), X, y
+        if len(block) < chunk_size:
+            return
+
+
+def check_label_classes(sources, using='heart_db'):
+    """테이블마다 폐암 여부가 양성/음성 두 종류 모두 있는지 확인 (한 종류뿐이면 ValueError)
+
+    lung_record의 폐암 여부는 예측 시 기본값(1=아니오)으로 저장되므로, 진단 결과가 갱신되지 않은
+    테이블을 학습에 넣으면 음성 라벨만 추가됩니다.
+    """
+    from django.db.models import Count, Q
+
+    for source in sources:
+        counts = _source_model(source).objects.using(using).aggregate(
+            positive=Count('pk', filter=Q(lung_cancer=2)), total=Count('pk'),
+        )
+        if counts['total'] and counts['positive'] in (0, counts['total']):
+            label = '양성' if counts['positive'] else '음성'
+            raise ValueError(
+                f'{source} 테이블의 폐암 여부가 모두 {label}입니다 ({counts["total"]}행). '
+                f'진단 결과가 기록된 테이블만 학습 데이터로 사용하세요.'
+            )
+
+
+def load_training_data(sources=('survey',), using='heart_db', chunk_size=CHUNK_SIZE, after=None,
+                       return_pk=False):
+    """테이블들을 스트리밍으로 읽어 하나의 uint8 특성 행렬로 반환
+
+    after: {테이블: pk} - 해당 pk 이후의 행만 읽음 (증분 학습용)
+    (X uint8 (n, 15), y uint8 (n,), {테이블: 읽은 마지막 pk}) 를 반환합니다.
+    return_pk=True 이면 (X, y, 행별 pk int64 (n,), {테이블: 마지막 pk}) 를 반환합니다
+    (pk는 테이블마다 따로 매겨지므로 여러 테이블을 읽으면 값이 겹칠 수 있습니다).
+    읽는 도중 추가된 행은 포함하지 않습니다 (시작 시점의 최대 pk까지만 읽음).
+    """
+    from django.db.models import Count, Max
+
+    after = after or {}
+    plans = []
+    total = 0
+    for source in sources:
+        start = after.get(source, 0)
+        stats = _source_model(source).objects.using(using).filter(pk__gt=start).aggregate(
+            last=Max('pk'), count=Count('pk'),
+        )
+        plans.append((source, start, stats['last']))
+        total += stats['count']
+
+    X = np.empty((total, len(FEATURE_NAMES)), dtype=np.uint8)
+    y = np.empty(total, dtype=np.uint8)
+    pk = np.empty(total, dtype=np.int64) if return_pk else None
+    watermarks = {}
+    filled = 0
+    for source, start, until in plans:
+        watermarks[source] = start if until is None else until
+        if until is None:
+            continue
+        for pk_chunk, X_chunk, y_chunk in iter_chunks(source, using, chunk_size, after_pk=start, until_pk=until):
+            # 집계 이후 행이 추가/삭제되었더라도 until 이하 범위만 읽으므로 total을 넘지 않음
+            n = min(len(X_chunk), total - filled)
+            X[filled:filled + n] = X_chunk[:n]
+            y[filled:filled + n] = y_chunk[:n]
+            if return_pk:
+                pk[filled:filled + n] = pk_chunk[:n]
+            filled += n
+
+    # 집계 이후 삭제된 행이 있으면 남는 부분 제외
+    if return_pk:
+        return X[:filled], y[:filled], pk[:filled], watermarks
+    return X[:filled], y[:filled], watermarks
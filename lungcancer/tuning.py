@@ -0,0 +1,247 @@
+"""
+RandomForest 하이퍼파라미터 탐색 (successive halving + 프로세스 풀)
+
+1. 학습 데이터(float32)와 층화 K-fold 분할 인덱스를 캐시 디렉터리에 .npy로 한 번 저장하고,
+   워커 프로세스는 이를 메모리 매핑으로 열어 DataFrame을 복사해 받지 않습니다.
+2. 모든 후보를 적은 트리 수(n_estimators)로 평가한 뒤 상위 1/factor만 남기고 트리 수를
+   factor배로 늘리는 과정을 반복합니다 (마지막 단계는 max_estimators).
+   설문 데이터는 행 수가 적어 학습 시간이 샘플 수보다 트리 수에 비례하므로 트리 수를 자원으로 사용합니다.
+3. (후보, 트리 수, fold)별 점수를 results.jsonl에 바로 기록하므로, 중단 후 다시 실행하면
+   이미 계산한 조합은 건너뜁니다.
+
+Django를 import하지 않으므로 train_model.py 스크립트에서도 사용할 수 있습니다.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_ROOT = os.path.join(current_dir, 'ml_model', 'tuning_cache')
+
+# 탐색할 RandomForest 파라미터 (3 x 3 x 3 x 3 = 81개 후보)
+PARAM_GRID = {
+    'max_depth': [5, 10, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 0.5, None],
+}
+
+# 마지막 단계(및 전체 그리드 비교)의 트리 수
+MAX_ESTIMATORS = 200
+
+# 모든 후보에 공통으로 적용하는 파라미터 (train_model.py의 기본 모델과 동일)
+BASE_PARAMS = {
+    'random_state': 42,
+    'class_weight': 'balanced',
+}
+
+
+def param_candidates(grid):
+    """파라미터 그리드의 모든 조합 (키 정렬 순서로 고정)"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def _candidate_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+class FoldCache:
+    """메모리 매핑용 학습 데이터와 fold 분할 인덱스가 저장된 디렉터리"""
+
+    def __init__(self, directory, n_splits):
+        self.directory = directory
+        self.n_splits = n_splits
+        self.results_path = os.path.join(directory, 'results.jsonl')
+
+    @classmethod
+    def prepare(cls, X, y, n_splits=5, seed=42, cache_root=CACHE_ROOT):
+        """데이터와 분할 설정의 해시로 디렉터리를 정하고, 없으면 생성"""
+        from sklearn.model_selection import StratifiedKFold
+
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.ascontiguousarray(y)
+        digest = hashlib.sha256()
+        digest.update(X.tobytes())
+        digest.update(y.tobytes())
+        digest.update(f'{X.shape}|{n_splits}|{seed}'.encode())
+        directory = os.path.join(cache_root, digest.hexdigest()[:16])
+        cache = cls(directory, n_splits)
+        if os.path.exists(os.path.join(directory, 'ready')):
+            return cache
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'X.npy'), X)
+        np.save(os.path.join(directory, 'y.npy'), y)
+
+        folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        for k, (train_index, test_index) in enumerate(folds.split(X, y)):
+            np.save(os.path.join(directory, f'train_{k}.npy'), train_index)
+            np.save(os.path.join(directory, f'test_{k}.npy'), test_index)
+        open(os.path.join(directory, 'ready'), 'w').close()
+        return cache
+
+    def load_results(self):
+        """이전 실행에서 기록한 {(후보 키, 트리 수, fold): 점수}"""
+        results = {}
+        if not os.path.exists(self.results_path):
+            return results
+        with open(self.results_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    results[(entry['params'], entry['n_estimators'], entry['fold'])] = entry['score']
+                except (json.JSONDecodeError, KeyError):
+                    continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+        return results
+
+    def append_result(self, key, score, elapsed):
+        params, n_estimators, fold = key
+        with open(self.results_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'params': params, 'n_estimators': n_estimators, 'fold': fold,
+                'score': score, 'elapsed': round(elapsed, 4),
+            }) + '\n')
+
+
+# 워커 프로세스별 메모리 매핑 배열 (initializer에서 한 번 열어 둠)
+_worker_data = {}
+
+
+def _init_worker(directory, n_splits):
+    _worker_data['X'] = np.load(os.path.join(directory, 'X.npy'), mmap_mode='r')
+    _worker_data['y'] = np.load(os.path.join(directory, 'y.npy'), mmap_mode='r')
+    _worker_data['folds'] = [
+        (
+            np.load(os.path.join(directory, f'train_{k}.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, f'test_{k}.npy'), mmap_mode='r'),
+        )
+        for k in range(n_splits)
+    ]
+
+
+def _evaluate(params_key, n_estimators, fold):
+    """후보 하나를 트리 n_estimators개로 fold 하나에서 학습하여 (정확도, 소요 시간) 반환"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = _worker_data['X'], _worker_data['y']
+    train_index, test_index = _worker_data['folds'][fold]
+
+    started = time.perf_counter()
+    model = RandomForestClassifier(
+        **BASE_PARAMS, **json.loads(params_key), n_estimators=n_estimators, n_jobs=1,
+    )
+    model.fit(X[train_index], y[train_index])
+    score = float(np.mean(model.predict(X[test_index]) == y[test_index]))
+    return score, time.perf_counter() - started
+
+
+def halving_search(X, y, grid=None, n_splits=5, factor=3, max_estimators=MAX_ESTIMATORS,
+                   n_jobs=None, cache_root=CACHE_ROOT, verbose=True):
+    """successive halving으로 최적 파라미터 탐색
+
+    n_jobs: 프로세스 수 (None 또는 -1이면 CPU 수, 1이면 현재 프로세스에서 순서대로 실행)
+    {'best_params', 'best_score', 'rounds', 'evaluated', 'reused', 'elapsed'} 를 반환합니다.
+    """
+    started = time.perf_counter()
+    cache = FoldCache.prepare(X, y, n_splits=n_splits, cache_root=cache_root)
+    previous = cache.load_results()
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    candidates = [_candidate_key(params) for params in param_candidates(grid or PARAM_GRID)]
+
+    # 후보가 1개 남을 때까지의 단계 수 - 마지막 단계가 max_estimators가 되도록 역산
+    n_rounds = max(1, math.ceil(math.log(len(candidates), factor)))
+
+    executor = None
+    if n_jobs > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(cache.directory, n_splits),
+        )
+    else:
+        _init_worker(cache.directory, n_splits)
+
+    rounds = []
+    evaluated = reused = 0
+    step = 0
+    try:
+        while True:
+            n_estimators = max(max_estimators // factor ** (n_rounds - 1 - step), 1)
+            tasks = [(key, n_estimators, fold) for key in candidates for fold in range(n_splits)]
+            scores = {task: previous[task] for task in tasks if task in previous}
+            reused += len(scores)
+            pending = [task for task in tasks if task not in scores]
+
+            if executor is not None:
+                futures = {executor.submit(_evaluate, *task): task for task in pending}
+                for future in as_completed(futures):
+                    task = futures[future]
+                    score, elapsed = future.result()
+                    scores[task] = score
+                    cache.append_result(task, score, elapsed)
+            else:
+                for task in pending:
+                    score, elapsed = _evaluate(*task)
+                    scores[task] = score
+                    cache.append_result(task, score, elapsed)
+            evaluated += len(pending)
+
+            means = {
+                key: float(np.mean([scores[(key, n_estimators, fold)] for fold in range(n_splits)]))
+                for key in candidates
+            }
+            # 점수가 같으면 그리드 순서가 앞선 후보를 우선 (결과 재현성)
+            ranked = sorted(candidates, key=lambda key: -means[key])
+            rounds.append({
+                'n_estimators': n_estimators,
+                'n_candidates': len(candidates),
+                'best_score': means[ranked[0]],
+            })
+            if verbose:
+                print(f"  트리 {n_estimators:>4}개, 후보 {len(candidates):>3}개 → 최고 정확도 {means[ranked[0]]:.4f}")
+
+            if step == n_rounds - 1:
+                best = ranked[0]
+                break
+            candidates = ranked[:max(1, math.ceil(len(candidates) / factor))]
+            # 후보가 하나만 남으면 중간 단계를 건너뛰고 마지막 단계에서 평가
+            step = n_rounds - 1 if len(candidates) == 1 else step + 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        'best_params': {**json.loads(best), 'n_estimators': max_estimators},
+        'best_score': means[best],
+        'rounds': rounds,
+        'evaluated': evaluated,
+        'reused': reused,
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def grid_search(X, y, grid=None, n_splits=5, n_estimators=MAX_ESTIMATORS, cache_root=CACHE_ROOT):
+    """비교용 전체 그리드 탐색 (모든 후보를 트리 n_estimators개로, 한 프로세스에서 순서대로)
+
+    같은 fold 분할을 사용하지만 결과 캐시는 사용하지 않습니다.
+    """
+    started = time.perf_counter()
+    cache = FoldCache.prepare(X, y, n_splits=n_splits, cache_root=cache_root)
+    _init_worker(cache.directory, n_splits)
+
+    best, best_score = None, -1.0
+    for params in param_candidates(grid or PARAM_GRID):
+        key = _candidate_key(params)
+        score = float(np.mean([_evaluate(key, n_estimators, fold)[0] for fold in range(n_splits)]))
+        if score > best_score:
+            best, best_score = {**params, 'n_estimators': n_estimators}, score
+    return {'best_params': best, 'best_score': best_score, 'elapsed': time.perf_counter() - started}
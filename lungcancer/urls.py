@@ -1,5 +1,5 @@
-from django.urls import path
-from . import views
+from django.urls import path, re_path
+from . import api, chart_cache, views
 
 app_name = 'lungcancer'
 
@@ -19,10 +19,14 @@ urlpatterns = [
     path('patients/<int:pk>/delete/', views.patient_delete, name='patient_delete'),
     path('patients/', views.patient_list, name='patient_list'),
     path('visualization/', views.visualization, name='visualization'),
+    re_path(rf'^visualization/charts/(?P<version>{chart_cache.VERSION_PATTERN})/(?P<chart>[a-z]+)\.(?P<fmt>[a-z]+)$',
+            views.visualization_chart, name='visualization_chart'),
     path('add-notice/', views.add_notice, name='add_notice'),
     path('delete-notice/<int:notice_id>/', views.delete_notice, name='delete_notice'),
     path('qna/', views.qna_list, name='qna_list'),
     path('qna/ask/', views.qna_ask, name='qna_ask'),
     path('qna/<int:pk>/answer/', views.qna_answer, name='qna_answer'),
+    path('api/predict/batch/', api.BatchPredictView.as_view(), name='api_predict_batch'),
+    path('api/inference/stats/', api.InferenceStatsView.as_view(), name='api_inference_stats'),
 ]
 
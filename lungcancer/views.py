@@ -1,3 +1,5 @@
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
@@ -5,27 +7,16 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm, UserCreationForm
 from .forms import CustomUserCreationForm
-from django.http import JsonResponse
-from .models import Patient, Notice, QnA, LungRecord, LungResult
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from .models import Patient, Notice, QnA, LungRecord, LungResult, LungResultModelVersion
 from .forms import PatientForm
-import joblib
-import os
-import pandas as pd
-import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import BytesIO
-import base64
-
-# 모델 로드
-current_dir = os.path.dirname(os.path.abspath(__file__))
-model_path = os.path.join(current_dir, 'ml_model', 'lung_cancer_model.pkl')
-feature_path = os.path.join(current_dir, 'ml_model', 'feature_names.pkl')
+from . import chart_cache, chart_prerender, charts, model_provider, result_rollup, result_stats
+from .training_data import FEATURE_NAMES
 
-model = joblib.load(model_path)
-feature_names = joblib.load(feature_path)
+logger = logging.getLogger(__name__)
 
 def home(request):
     """홈 페이지"""
@@ -40,10 +31,16 @@ def home(request):
         recent_records = LungRecord.objects.using('heart_db').order_by('-created_at')[:10]
         total_records = LungRecord.objects.using('heart_db').count()
         
-        # lung_result에서 결과 통계 가져오기
-        total_results = LungResult.objects.using('heart_db').count()
-        positive_results = LungResult.objects.using('heart_db').filter(prediction='양성').count()
-        negative_results = LungResult.objects.using('heart_db').filter(prediction='음성').count()
+        # lung_result 결과 통계 (집계 테이블이 있으면 집계 테이블에서, 요청에서는 읽기만 함)
+        if result_rollup.is_enabled():
+            totals = result_rollup.prediction_totals()
+            positive_results = totals['YES']
+            negative_results = totals['NO']
+            total_results = positive_results + negative_results
+        else:
+            total_results = LungResult.objects.using('heart_db').count()
+            positive_results = LungResult.objects.using('heart_db').filter(prediction='양성').count()
+            negative_results = LungResult.objects.using('heart_db').filter(prediction='음성').count()
         
     except Exception as e:
         # 외부 데이터베이스 연결 실패 시 로컬 데이터만 사용
@@ -167,14 +164,11 @@ def predict(request):
                 
                 # 예측 수행
                 symptoms_dict = patient.get_symptoms_dict()
-                features = pd.DataFrame([symptoms_dict])
-                features = features[feature_names]  # 특성 순서 맞추기
-                
-                prediction_proba = model.predict_proba(features)[0]
-                prediction = model.predict(features)[0]
+                prediction, probability, model_version = model_provider.predict_features(symptoms_dict)
                 
                 patient.prediction = 'YES' if prediction == 1 else 'NO'
-                patient.prediction_probability = float(prediction_proba[1])
+                patient.prediction_probability = probability
+                patient.model_version = model_version
                 patient.save()
                 
                 # 외부 데이터베이스에도 저장
@@ -220,7 +214,7 @@ def predict(request):
                         risk_level = 'low'
                         risk_message = '폐암 위험도가 낮습니다. 건강한 생활 습관을 유지하세요.'
                     
-                    LungResult.objects.using('heart_db').create(
+                    lung_result = LungResult.objects.using('heart_db').create(
                         record_id=lung_record.id,
                         name=patient.name if patient.name else f'환자 #{patient.id}',
                         gender=lung_record.gender,
@@ -229,6 +223,15 @@ def predict(request):
                         risk_score=patient.prediction_probability * 100,
                         created_at=patient.created_at,
                     )
+                    LungResultModelVersion.objects.create(
+                        result_id=lung_result.result_id,
+                        model_version=model_version,
+                    )
+                    try:
+                        result_rollup.refresh()
+                    except Exception as e:
+                        # watermark 이후 행이므로 다음 갱신(예측 저장 또는 backfill 명령)에서 반영됨
+                        print(f"통계 집계 갱신 실패: {e}")
                     
                     messages.success(request, f'예측이 완료되었습니다! (ID: {patient.id}) - 외부 데이터베이스에도 저장되었습니다.')
                     
@@ -249,6 +252,35 @@ def predict(request):
     
     return render(request, 'lungcancer/predict.html', {'form': form})                                                                                                                                                                                                               
 
+def _result_features(result, record):
+    """lung_result 행의 위험도를 계산한 특성 딕셔너리 (서빙 인코딩, patient_update 재예측과 동일)"""
+    # 검사 기록이 없으면 증상은 모두 '아니오'
+    features = record.get_symptoms_dict() if record else dict.fromkeys(FEATURE_NAMES, 0)
+    features['GENDER'] = int(record.gender) if record else int(result.gender)
+    features['AGE'] = int(result.age)
+    return features
+
+def _explanation_context(features, model_version, top=8):
+    """예측 설명(특성별 기여도) 템플릿 컨텍스트 - 저장된 결과를 계산한 모델 버전으로 설명
+
+    그 버전이 로드되어 있지 않거나 계산에 실패하면 None (설명을 표시하지 않음)
+    """
+    try:
+        explanation = model_provider.explain_features(features, top=top, version=model_version or '')
+    except Exception as e:
+        logger.warning(f"예측 설명 계산 중 오류 발생: {e}")
+        return None
+    if explanation is None:
+        return None
+    
+    largest = max((abs(item['contribution']) for item in explanation['contributions']), default=0) or 1
+    for item in explanation['contributions']:
+        item['percent'] = round(item['contribution'] * 100, 2)
+        item['width'] = round(abs(item['contribution']) / largest * 100, 1)
+    explanation['bias_percent'] = round(explanation['bias'] * 100, 2)
+    explanation['probability_percent'] = round(explanation['probability'] * 100, 2)
+    return explanation
+
 def result(request, pk):
     """예측 결과 페이지"""
     patient = get_object_or_404(Patient, pk=pk)
@@ -275,6 +307,7 @@ def result(request, pk):
         'risk_level': risk_level,
         'risk_color': risk_color,
         'risk_message': risk_message,
+        'explanation': _explanation_context(patient.get_symptoms_dict(), patient.model_version),
     }
     return render(request, 'lungcancer/result.html', context)
 
@@ -323,8 +356,9 @@ def patient_delete(request, result_id=None, pk=None):
         result = LungResult.objects.using('heart_db').get(result_id=target_id)
         record_id = result.record_id  # 연결된 record_id 저장
         
-        # 1. LungResult 삭제
-        result.delete()
+        # 1. LungResult 삭제 (통계 집계에서도 제외)
+        with result_rollup.tracking(result_id=target_id):
+            result.delete()
         
         # 2. 연결된 LungRecord도 삭제 (검사 데이터와 예측 결과 모두 삭제)
         try:
@@ -363,79 +397,64 @@ def patient_update(request, result_id=None, pk=None):
     
     if request.method == 'POST':
         try:
-            # LungResult 수정 (예측 결과는 수정하지 않음 - 재예측으로 자동 업데이트됨)
-            result.name = request.POST.get('name', result.name)
-            result.age = int(request.POST.get('age', result.age))
-            result.gender = request.POST.get('gender', result.gender)  # 성별도 업데이트
-            # prediction과 risk_score는 재예측으로 자동 업데이트되므로 수정하지 않음
-            result.save(using='heart_db')
+            # 수정과 재예측으로 바뀐 값을 통계 집계에도 반영
+            with result_rollup.tracking(result_id=result.result_id):
+                # LungResult 수정 (예측 결과는 수정하지 않음 - 재예측으로 자동 업데이트됨)
+                result.name = request.POST.get('name', result.name)
+                result.age = int(request.POST.get('age', result.age))
+                result.gender = request.POST.get('gender', result.gender)  # 성별도 업데이트
+                # prediction과 risk_score는 재예측으로 자동 업데이트되므로 수정하지 않음
+                result.save(using='heart_db')
             
-            # LungRecord가 있으면 함께 수정
-            if record:
-                record.age = int(request.POST.get('age', record.age))
-                record.gender = request.POST.get('gender', record.gender)
+                # LungRecord가 있으면 함께 수정
+                if record:
+                    record.age = int(request.POST.get('age', record.age))
+                    record.gender = request.POST.get('gender', record.gender)
                 
-                # Integer 필드들 수정 (드롭다운 값 처리: 1=아니오, 2=예)
-                record.smoking = int(request.POST.get('smoking', 1))
-                record.yellow_fingers = int(request.POST.get('yellow_fingers', 1))
-                record.anxiety = int(request.POST.get('anxiety', 1))
-                record.peer_pressure = int(request.POST.get('peer_pressure', 1))
-                record.chronic_disease = int(request.POST.get('chronic_disease', 1))
-                record.fatigue = int(request.POST.get('fatigue', 1))
-                record.allergy = int(request.POST.get('allergy', 1))
-                record.wheezing = int(request.POST.get('wheezing', 1))
-                record.alcohol_consuming = int(request.POST.get('alcohol_consuming', 1))
-                record.coughing = int(request.POST.get('coughing', 1))
-                record.shortness_of_breath = int(request.POST.get('shortness_of_breath', 1))
-                record.swallowing_difficulty = int(request.POST.get('swallowing_difficulty', 1))
-                record.chest_pain = int(request.POST.get('chest_pain', 1))
-                # lung_cancer는 예측 결과이므로 수정하지 않음
+                    # Integer 필드들 수정 (드롭다운 값 처리: 1=아니오, 2=예)
+                    record.smoking = int(request.POST.get('smoking', 1))
+                    record.yellow_fingers = int(request.POST.get('yellow_fingers', 1))
+                    record.anxiety = int(request.POST.get('anxiety', 1))
+                    record.peer_pressure = int(request.POST.get('peer_pressure', 1))
+                    record.chronic_disease = int(request.POST.get('chronic_disease', 1))
+                    record.fatigue = int(request.POST.get('fatigue', 1))
+                    record.allergy = int(request.POST.get('allergy', 1))
+                    record.wheezing = int(request.POST.get('wheezing', 1))
+                    record.alcohol_consuming = int(request.POST.get('alcohol_consuming', 1))
+                    record.coughing = int(request.POST.get('coughing', 1))
+                    record.shortness_of_breath = int(request.POST.get('shortness_of_breath', 1))
+                    record.swallowing_difficulty = int(request.POST.get('swallowing_difficulty', 1))
+                    record.chest_pain = int(request.POST.get('chest_pain', 1))
+                    # lung_cancer는 예측 결과이므로 수정하지 않음
                 
-                record.save(using='heart_db')
+                    record.save(using='heart_db')
             
-            # 재예측 수행
-            try:
-                print(f"DEBUG - 재예측 시작: Result ID {target_id}")
-                print(f"DEBUG - record 존재: {record is not None}")
-                if record:
-                    print(f"DEBUG - 가슴통증: {record.chest_pain}, 또래압박: {record.peer_pressure}")
-                
-                # 수정된 데이터로 재예측 (feature_names와 정확히 일치하도록)
-                symptoms_dict = {
-                    'GENDER': int(record.gender) if record else int(result.gender),
-                    'AGE': int(request.POST.get('age', result.age)),
-                    'SMOKING': record.smoking if record else 1,  # 그대로 사용 (2=예, 1=아니오)
-                    'YELLOW_FINGERS': record.yellow_fingers if record else 1,
-                    'ANXIETY': record.anxiety if record else 1,
-                    'PEER_PRESSURE': record.peer_pressure if record else 1,
-                    'CHRONIC DISEASE': record.chronic_disease if record else 1,  # 공백 포함
-                    'FATIGUE ': record.fatigue if record else 1,  # 뒤에 공백
-                    'ALLERGY ': record.allergy if record else 1,  # 뒤에 공백
-                    'WHEEZING': record.wheezing if record else 1,
-                    'ALCOHOL CONSUMING': record.alcohol_consuming if record else 1,  # 공백 포함
-                    'COUGHING': record.coughing if record else 1,
-                    'SHORTNESS OF BREATH': record.shortness_of_breath if record else 1,  # 공백 포함
-                    'SWALLOWING DIFFICULTY': record.swallowing_difficulty if record else 1,  # 공백 포함
-                    'CHEST PAIN': record.chest_pain if record else 1,  # 공백 포함
-                    # 'LUNG_CANCER'는 예측 결과이므로 제외
-                }
+                # 재예측 수행
+                try:
+                    print(f"DEBUG - 재예측 시작: Result ID {target_id}")
+                    print(f"DEBUG - record 존재: {record is not None}")
+                    if record:
+                        print(f"DEBUG - 가슴통증: {record.chest_pain}, 또래압박: {record.peer_pressure}")
                 
-                # 예측 수행 (predict 함수와 동일한 로직)
-                features = pd.DataFrame([symptoms_dict])
-                features = features[feature_names]  # 특성 순서 맞추기
+                    # 수정된 데이터로 재예측 - 다른 예측 경로와 같은 서빙 인코딩(1=예, 0=아니오)
+                    symptoms_dict = _result_features(result, record)
                 
-                prediction_proba = model.predict_proba(features)[0]
-                prediction = model.predict(features)[0]
+                    # 예측 수행 (predict 함수와 동일한 로직)
+                    prediction, probability, model_version = model_provider.predict_features(symptoms_dict)
                 
-                # 예측 결과 업데이트
-                result.prediction = '양성' if prediction == 1 else '음성'
-                result.risk_score = round(prediction_proba[1] * 100, 2)
-                result.save(using='heart_db')
+                    # 예측 결과 업데이트
+                    result.prediction = '양성' if prediction == 1 else '음성'
+                    result.risk_score = round(probability * 100, 2)
+                    result.save(using='heart_db')
+                    LungResultModelVersion.objects.update_or_create(
+                        result_id=result.result_id,
+                        defaults={'model_version': model_version},
+                    )
                 
-                messages.success(request, f'환자 정보 #{target_id}가 수정되었습니다. 재예측이 완료되었습니다.')
-            except Exception as e:
-                print(f"재예측 중 오류 발생: {e}")
-                messages.warning(request, f'환자 정보는 수정되었지만 재예측 중 오류가 발생했습니다: {str(e)}')
+                    messages.success(request, f'환자 정보 #{target_id}가 수정되었습니다. 재예측이 완료되었습니다.')
+                except Exception as e:
+                    print(f"재예측 중 오류 발생: {e}")
+                    messages.warning(request, f'환자 정보는 수정되었지만 재예측 중 오류가 발생했습니다: {str(e)}')
             
             return redirect('lungcancer:patient_list')
         except Exception as e:
@@ -479,10 +498,17 @@ def patient_detail(request, pk=None, result_id=None):
         risk_percent = float(result.risk_score) if result.risk_score else 0
         print(f"DEBUG - 위험도 계산: {risk_percent}")
         
+        # 위험도를 계산한 모델 버전 (기록이 없으면 설명을 표시하지 않음)
+        model_version = (
+            LungResultModelVersion.objects.filter(result_id=result.result_id)
+            .values_list('model_version', flat=True).first()
+        )
+        
         context = {
             'result': result,
             'record': record,
             'risk_percent': round(risk_percent, 2),
+            'explanation': _explanation_context(_result_features(result, record), model_version),
         }
         print(f"DEBUG - 템플릿 렌더링 시작")
         return render(request, 'lungcancer/patient_detail.html', context)
@@ -496,291 +522,113 @@ def patient_detail(request, pk=None, result_id=None):
 
 
 
+def _visualization_summary():
+    """시각화 통계 (일별 집계 테이블 또는 데이터베이스 집계 쿼리, 요청에서 집계를 갱신하지 않음)"""
+    if result_rollup.is_enabled():
+        return result_rollup.statistics()
+    return result_stats.result_statistics(using='heart_db')
+
+
 def visualization(request):
-    """데이터 시각화 페이지 - 외부 데이터베이스만 사용"""
-    # 외부 데이터베이스에서 데이터 가져오기
-    external_records = []
-    external_results = []
-    db_status = {'external_connected': False, 'external_count': 0}
-    
+    """데이터 시각화 페이지 - 외부 데이터베이스만 사용 (통계는 일별 집계 테이블 또는 데이터베이스 집계 쿼리로 계산)"""
     try:
-        external_records = LungRecord.objects.using('heart_db').all()
-        external_results = LungResult.objects.using('heart_db').all()
-        db_status['external_connected'] = True
-        db_status['external_count'] = external_results.count()
+        summary = _visualization_summary()
+        external_records_count = LungRecord.objects.using('heart_db').count()
     except Exception as e:
         print(f"외부 데이터베이스 연결 실패: {e}")
+        summary = None
     
-    # 외부 데이터만 사용
-    all_data = []
-    
-    # 외부 데이터 추가 (LungResult에서)
-    for result in external_results:
-        all_data.append({
-            'name': result.name,
-            'gender': result.gender,
-            'age': result.age,
-            'prediction': 'YES' if result.prediction == '양성' else 'NO',
-            'probability': float(result.risk_score) / 100,
-            'risk_level': 'unknown',
-            'created_at': result.created_at,
-            'source': 'external'
-        })
-    
-    if not all_data:
+    if summary is None or summary['total'] == 0:
         return render(request, 'lungcancer/visualization.html', {
             'no_data': True
         })
     
-    # 데이터프레임 생성
-    df = pd.DataFrame(all_data)
-    
-    # 한글 폰트 설정 - macOS에서 한글 깨짐 방지
-    import matplotlib.font_manager as fm
-    import platform
-    
-    # matplotlib 폰트 캐시 초기화
-    try:
-        fm._rebuild()
-    except:
-        pass
-    
-    # macOS에서 한글 지원 폰트 직접 설정
-    if platform.system() == 'Darwin':  # macOS
-        # macOS에서 한글을 지원하는 폰트들 (우선순위 순)
-        korean_fonts = [
-            'Arial Unicode MS',
-            'Helvetica Neue',
-            'Helvetica',
-            'NanumGothic',
-            'Malgun Gothic',
-            'Apple SD Gothic Neo'
-        ]
-        
-        # 사용 가능한 폰트 목록 가져오기
-        available_fonts = [f.name for f in fm.fontManager.ttflist]
-        
-        # 한글 폰트 찾기
-        selected_font = None
-        for font in korean_fonts:
-            if font in available_fonts:
-                selected_font = font
-                break
-        
-        if selected_font:
-            plt.rcParams['font.family'] = selected_font
-            print(f"한글 폰트 설정: {selected_font}")
-        else:
-            # 폰트를 찾지 못한 경우 기본 설정
-            plt.rcParams['font.family'] = 'DejaVu Sans'
-            print("한글 폰트를 찾지 못해 DejaVu Sans 사용")
-    else:
-        # Windows/Linux
-        plt.rcParams['font.family'] = 'DejaVu Sans'
-    
-    # 유니코드 마이너스 기호 설정
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    # 추가 설정: 한글 렌더링 개선
-    plt.rcParams['font.size'] = 10
-    plt.rcParams['figure.autolayout'] = True
-    
-    # 1. 예측 결과 분포 (파이 차트)
-    fig1, ax1 = plt.subplots(figsize=(8, 6))
-    prediction_counts = df['prediction'].value_counts()
-    
-    if len(prediction_counts) > 0:
-        colors = ['#ff6b6b' if idx == 'YES' else '#51cf66' for idx in prediction_counts.index]
-        labels = ['폐암 양성' if idx == 'YES' else '폐암 음성' for idx in prediction_counts.index]
-        ax1.pie(prediction_counts.values, labels=labels, 
-                autopct='%1.1f%%', startangle=90, colors=colors)
-    else:
-        # 데이터가 없을 때 빈 차트 표시
-        ax1.text(0.5, 0.5, '데이터가 없습니다', ha='center', va='center', 
-                transform=ax1.transAxes, fontsize=14)
-    
-    ax1.set_title('폐암 예측 결과 분포', fontsize=16, fontweight='bold')
-    
-    # 이미지를 base64로 인코딩
-    buffer1 = BytesIO()
-    plt.savefig(buffer1, format='png', dpi=100, bbox_inches='tight')
-    buffer1.seek(0)
-    image1_png = buffer1.getvalue()
-    buffer1.close()
-    image1_base64 = base64.b64encode(image1_png).decode()
-    plt.close()
-    
-    # 2. 성별 폐암 예측 분포 (바 차트)
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
-    
-    # 성별 데이터 정리 (1=남성, 0=여성 또는 '1'='남성', '0'='여성')
-    df['gender_label'] = df['gender'].apply(lambda x: '남성' if x == 1 or x == '1' else '여성')
-    gender_prediction = pd.crosstab(df['gender_label'], df['prediction'])
-    
-    # 컬럼 순서를 명시적으로 NO, YES로 고정
-    gender_prediction = gender_prediction.reindex(columns=['NO', 'YES'], fill_value=0)
-    
-    # 막대 차트 그리기
-    x_pos = range(len(gender_prediction.index))
-    width = 0.35
-    
-    # 음성과 양성 막대를 나란히 그리기
-    bars1 = ax2.bar([x - width/2 for x in x_pos], gender_prediction['NO'], width, 
-            label='음성', color='#51cf66', alpha=0.8)
-    bars2 = ax2.bar([x + width/2 for x in x_pos], gender_prediction['YES'], width, 
-            label='양성', color='#ff6b6b', alpha=0.8)
-    
-    # 막대 위에 값 표시
-    for i, (bar1, bar2) in enumerate(zip(bars1, bars2)):
-        height1 = bar1.get_height()
-        height2 = bar2.get_height()
-        
-        if height1 > 0:
-            ax2.text(bar1.get_x() + bar1.get_width()/2., height1 + 0.05,
-                    f'{int(height1)}', ha='center', va='bottom', fontweight='bold')
-        if height2 > 0:
-            ax2.text(bar2.get_x() + bar2.get_width()/2., height2 + 0.05,
-                    f'{int(height2)}', ha='center', va='bottom', fontweight='bold')
-    
-    ax2.set_title('성별 폐암 예측 분포', fontsize=16, fontweight='bold')
-    ax2.set_xlabel('성별', fontsize=12)
-    ax2.set_ylabel('환자 수', fontsize=12)
-    ax2.set_xticks(x_pos)
-    ax2.set_xticklabels(gender_prediction.index)
-    ax2.legend(loc='upper right')
-    plt.tight_layout()
-    
-    buffer2 = BytesIO()
-    plt.savefig(buffer2, format='png', dpi=100, bbox_inches='tight')
-    buffer2.seek(0)
-    image2_png = buffer2.getvalue()
-    buffer2.close()
-    image2_base64 = base64.b64encode(image2_png).decode()
-    plt.close()
-    
-    # 3. 연령대별 폐암 예측 분포 (바 차트)
-    fig3, ax3 = plt.subplots(figsize=(10, 6))
-    
-    # 연령을 10단위(20대, 30대, ...)로 그룹화
-    df['age_decade'] = (df['age'] // 10) * 10
-    age_prediction = pd.crosstab(df['age_decade'], df['prediction'])
-    age_prediction = age_prediction.reindex(columns=['NO', 'YES'], fill_value=0)
-    
-    # 막대 차트 그리기
-    x_pos = range(len(age_prediction.index))
-    width = 0.35
-    
-    bars3 = ax3.bar([x - width/2 for x in x_pos], age_prediction['NO'], width, 
-            label='음성', color='#51cf66', alpha=0.8)
-    bars4 = ax3.bar([x + width/2 for x in x_pos], age_prediction['YES'], width, 
-            label='양성', color='#ff6b6b', alpha=0.8)
-    
-    ax3.set_title('연령대별 폐암 예측 분포', fontsize=16, fontweight='bold')
-    ax3.set_xlabel('연령대', fontsize=12)
-    ax3.set_ylabel('환자 수', fontsize=12)
-    ax3.set_xticks(x_pos)
-    ax3.set_xticklabels([f"{int(x)}대" for x in age_prediction.index])
-    ax3.legend(loc='upper right')
-    plt.tight_layout()
-    
-    buffer3 = BytesIO()
-    plt.savefig(buffer3, format='png', dpi=100, bbox_inches='tight')
-    buffer3.seek(0)
-    image3_png = buffer3.getvalue()
-    buffer3.close()
-    image3_base64 = base64.b64encode(image3_png).decode()
-    plt.close()
-
-    
-    # 4. 위험도 분포 (히스토그램)
-    fig4, ax4 = plt.subplots(figsize=(10, 6))
-    
-    # 위험도 데이터 정리 (probability를 퍼센트로 변환)
-    risk_scores = df['probability'] * 100
-    
-    ax4.hist(risk_scores, bins=20, color='#339af0', edgecolor='black', alpha=0.7)
-    ax4.axvline(x=50, color='red', linestyle='--', linewidth=2, label='기준선 (50%)')
-    ax4.set_title('폐암 위험도 분포', fontsize=16, fontweight='bold')
-    ax4.set_xlabel('위험도 (%)', fontsize=12)
-    ax4.set_ylabel('환자 수', fontsize=12)
-    ax4.legend()
-    plt.tight_layout()
-    
-    buffer4 = BytesIO()
-    plt.savefig(buffer4, format='png', dpi=100, bbox_inches='tight')
-    buffer4.seek(0)
-    image4_png = buffer4.getvalue()
-    buffer4.close()
-    image4_base64 = base64.b64encode(image4_png).decode()
-    plt.close()
-    
-    # 통계 정보
-    stats = {
-        'total_patients': len(df),
-        'positive_patients': len(df[df['prediction'] == 'YES']),
-        'negative_patients': len(df[df['prediction'] == 'NO']),
-        'avg_age': round(df['age'].mean(), 1),
-        'male_count': len(df[df['gender'] == 1]),
-        'female_count': len(df[df['gender'] == 0]),
-        'external_data_count': len([d for d in all_data if 'source' not in d]),
-        'local_data_count': len([d for d in all_data if d.get('source') == 'local']),
-    }
-    
-    # 외부 데이터베이스 연결 상태
-    db_status = {
-        'external_connected': len(external_results) > 0,
-        'external_count': len(external_results),
+    # 차트는 데이터 버전이 들어간 URL로 제공 (visualization_chart에서 렌더링 및 캐시)
+    version = chart_cache.publish_summary(summary)
+    chart_prerender.notify(summary)
+    # 미리 렌더링 워커가 새 버전을 렌더링하는 중이면 마지막으로 게시된 버전의 차트를 참조
+    version = chart_cache.serving_version(version)
+    chart_urls = {
+        chart: reverse('lungcancer:visualization_chart', args=[version, chart, 'png'])
+        for chart in charts.CHARTS
     }
     
-    # 통계 정보 계산
-    positive_count = len([d for d in all_data if d['prediction'] == 'YES'])
-    negative_count = len([d for d in all_data if d['prediction'] == 'NO'])
-    avg_age = df['age'].mean() if len(df) > 0 else 0
-    
-    # 성별 통계 계산 - 차트와 정확히 동일한 방식으로 계산
-    # 차트에서 사용하는 gender_label 로직과 동일하게 처리
-    male_count = 0
-    female_count = 0
-    
-    for d in all_data:
-        gender = d['gender']
-        
-        # 차트의 gender_label 로직과 정확히 동일: '남성' if x == 1 or x == '1' else '여성'
-        if gender == 1 or gender == '1':
-            male_count += 1
-        else:  # 0, '0' 또는 다른 모든 값은 여성으로 처리
-            female_count += 1
-    
-    # 디버그 출력
-    
+    # 통계 정보
+    total = summary['total']
+    positive_count = summary['predictions']['YES']
+    negative_count = summary['predictions']['NO']
     stats = {
-        'total_patients': len(external_results),
+        'total_patients': total,
         'positive_patients': positive_count,
         'negative_patients': negative_count,
         'positive_count': positive_count,  # 템플릿 호환성을 위해 추가
         'negative_count': negative_count,  # 템플릿 호환성을 위해 추가
-        'avg_age': round(avg_age, 1),
-        'male_count': male_count,  # 남성 환자 수
-        'female_count': female_count,  # 여성 환자 수
-        'external_records_count': len(external_records),
-        'external_results_count': len(external_results),
-        'total_data': len(all_data),
+        'avg_age': round(summary['avg_age'], 1),
+        'male_count': sum(summary['by_gender'].get('남성', {}).values()),  # 남성 환자 수
+        'female_count': sum(summary['by_gender'].get('여성', {}).values()),  # 여성 환자 수
+        'external_records_count': external_records_count,
+        'external_results_count': total,
+        'total_data': total,
+    }
+    
+    # 외부 데이터베이스 연결 상태
+    db_status = {
+        'external_connected': True,
+        'external_count': total,
     }
     
     context = {
-        'chart1': image1_base64,
-        'chart2': image2_base64,
-        'chart3': image3_base64,
-        'chart4': image4_base64,
+        'chart_urls': chart_urls,
         'stats': stats,
         'db_status': db_status,
-        'external_records': external_records[:10],  # 최근 10개만 표시
-        'external_results': external_results[:10],  # 최근 10개만 표시
+        # 최근 10개만 표시 (템플릿에서 사용할 때만 조회)
+        'external_records': LungRecord.objects.using('heart_db').all()[:10],
+        'external_results': LungResult.objects.using('heart_db').all()[:10],
         'no_data': False,
     }
     
     return render(request, 'lungcancer/visualization.html', context)
 
+def visualization_chart(request, version, chart, fmt):
+    """시각화 차트 이미지 - URL의 데이터 버전별로 캐시하며 ETag/Cache-Control로 브라우저 캐시 허용"""
+    if chart not in charts.CHARTS or fmt not in charts.FORMATS:
+        raise Http404('차트를 찾을 수 없습니다.')
+    try:
+        dpi = int(request.GET.get('dpi', charts.DEFAULT_DPI))
+    except ValueError:
+        dpi = None
+    if dpi not in charts.DPI_CHOICES:
+        return HttpResponseBadRequest(f'dpi는 {charts.DPI_CHOICES} 중 하나여야 합니다.')
+    
+    # 같은 URL(데이터 버전, 차트, 형식, dpi)의 이미지는 바뀌지 않음
+    max_age = getattr(settings, 'CHART_CACHE', {}).get('MAX_AGE', 86400 * 30)
+    etag = f'"{version}-{chart}-{dpi}.{fmt}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        patch_cache_control(not_modified, public=True, max_age=max_age, immutable=True)
+        return not_modified
+    
+    try:
+        image, current = chart_cache.get_chart(version, chart, fmt, dpi, _visualization_summary)
+    except Exception as e:
+        logger.warning(f"차트 렌더링 실패: {e}")
+        return HttpResponse(status=503)
+    
+    if image is None:
+        # 페이지를 받은 뒤 데이터가 바뀌어 캐시에 없는 이전 버전 - 현재 버전으로 이동
+        url = reverse('lungcancer:visualization_chart', args=[current, chart, fmt])
+        if 'dpi' in request.GET:
+            url += f'?dpi={dpi}'
+        response = redirect(url)
+        add_never_cache_headers(response)
+        return response
+    
+    response = HttpResponse(image, content_type=charts.FORMATS[fmt])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age, immutable=True)
+    return response
+
 @csrf_protect
 def signup_view(request):
     """회원가입 뷰"""
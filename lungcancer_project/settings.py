@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'lungcancer',
 ]
 
@@ -53,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'lungcancer.middleware.VisitorCounterMiddleware',
+    'lungcancer.middleware.ModelReloadMiddleware',
 ]
 
 ROOT_URLCONF = 'lungcancer_project.urls'
@@ -102,7 +104,13 @@ DATABASES = {
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
-    }
+    },
+    # 합성 데이터와 벤치마크용 로컬 SQLite (generate_synthetic과 벤치마크의 기본값)
+    # 처음 사용할 때 마이그레이션과 외부 테이블(lung_cancer_survey, lung_record, lung_result)을 만듦
+    'bench': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'bench.sqlite3',
+    },
 }
 
 
@@ -156,3 +164,71 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
+
+# REST API 설정 (일괄 예측 API 등)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
+
+# 벤치마크가 행을 추가해도 되는 SQLite 외의 로컬 데이터베이스 별칭 (synthetic.require_local_database)
+BENCHMARK_DATABASES = ()
+
+# 일괄 예측 API 한 번에 받을 수 있는 최대 행 수
+BATCH_PREDICT_MAX_ROWS = 1000
+
+# 예측 모델 로드 설정
+# - ML_MODEL_WARMUP: wsgi 애플리케이션 로드 시(웹 워커 시작 시) 모델을 미리 로드
+# - ML_MODEL_MMAP_MODE: joblib 모델 파일의 배열을 메모리 매핑으로 로드 (None이면 전체 읽기)
+# - ML_MODEL_RELOAD_INTERVAL: 모델 저장소의 활성 버전 변경 확인 주기(초, None이면 확인 안 함)
+ML_MODEL_WARMUP = True
+ML_MODEL_MMAP_MODE = 'r'
+ML_MODEL_RELOAD_INTERVAL = 5
+
+# 단건 예측 마이크로 배치 (동시 요청을 최대 MAX_WAIT_MS 또는 MAX_BATCH_SIZE건까지 모아 예측)
+# 결과를 기다리는 다른 요청이 없으면(GUNICORN_THREADS=1 등) 기다리지 않고 바로 예측
+PREDICTION_BATCHING = {
+    'ENABLED': True,
+    'MAX_BATCH_SIZE': 64,
+    'MAX_WAIT_MS': 2,
+    'MAX_QUEUE': 1024,
+    'TIMEOUT_MS': 1000,
+}
+
+# 특성 벡터 기반 예측 캐시 (키: 모델 버전 + 특성 벡터)
+# - BACKEND: 'local'(프로세스 내부 LRU) 또는 'django'(CACHES[ALIAS]를 사용, 워커 간 공유)
+# - MAX_SIZE: local 백엔드의 최대 항목 수, TTL: 항목 유지 시간(초)
+PREDICTION_CACHE = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'MAX_SIZE': 4096,
+    'TTL': 3600,
+    'ALIAS': 'default',
+}
+
+# 시각화 차트 이미지 캐시 (키: 데이터 버전 + 차트 + 형식 + dpi, lungcancer/chart_cache.py)
+# - BACKEND, ALIAS: PREDICTION_CACHE와 같음 ('django'이면 워커 간 공유)
+# - MAX_SIZE: local 백엔드의 최대 항목 수 (차트 이미지와 데이터 버전별 통계), TTL: 항목 유지 시간(초)
+# - MAX_AGE: 차트 응답의 Cache-Control max-age(초) - URL에 데이터 버전이 있어 내용이 바뀌지 않으므로 길게 둠
+# - BACKEND 'files': DIRECTORY의 파일로 저장 (같은 서버의 웹 워커와 prerender_charts 명령이 공유)
+# - 미리 렌더링 (lungcancer/chart_prerender.py): prerender_charts 명령(또는 PRERENDER 'local'이면 웹 프로세스의
+#   백그라운드 스레드)이 새 데이터 버전의 PRERENDER_FORMATS x PRERENDER_DPI 차트를 렌더링하여 게시하고,
+#   워커가 STALE_TIMEOUT초 안에 동작한 기록이 있으면 페이지는 렌더링 중인 새 버전 대신 직전 게시 버전을 참조
+CHART_CACHE = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'MAX_SIZE': 64,
+    'TTL': 86400,
+    'ALIAS': 'default',
+    'MAX_AGE': 86400 * 30,
+    'DIRECTORY': str(BASE_DIR / 'lungcancer' / 'ml_model' / 'chart_cache'),
+    'PRERENDER': None,
+    'PRERENDER_FORMATS': ('png',),
+    'PRERENDER_DPI': (100,),
+    'STALE_TIMEOUT': 60,
+}
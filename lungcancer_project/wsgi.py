@@ -7,10 +7,29 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 """
 
+import logging
 import os
 
+from lungcancer import parallelism
+
+logger = logging.getLogger(__name__)
+
+# NumPy/scikit-learn이 로드되기 전에 추론 스레드 수를 고정 (gunicorn.conf.py에서 이미 고정했으면 그 값 유지)
+parallelism.configure()
+
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lungcancer_project.settings')
 
 application = get_wsgi_application()
+
+# 웹 워커 시작 시 예측 모델을 미리 로드 (gunicorn --preload 사용 시 마스터에서 한 번 로드)
+from django.conf import settings
+
+if getattr(settings, 'ML_MODEL_WARMUP', True):
+    from lungcancer import model_provider
+
+    try:
+        model_provider.warm_up()
+    except Exception as e:
+        logger.warning(f"예측 모델 워밍업 실패 (첫 예측 요청 시 다시 로드): {e}")